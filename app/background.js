@@ -421,6 +421,37 @@ const runAskLLM = createSingleFlightService({
 });
 
 
+/* ============================================================================
+ * 🧵 SERVER TASKS (GUI-bound routes)
+ * ============================================================================
+ * GUI-bound routes answer `202 { taskId }` and run on the server's FIFO task
+ * executor. Poll `/tasks/<id>` until it finishes and return the route's body,
+ * so callers still see a plain JSON response. Short polls instead of one
+ * long-held request → no HTTP timeouts on multi-minute LLM round-trips.
+ * ============================================================================ */
+const TASK_POLL_INTERVAL_MS = 1000;
+const TASK_MAX_WAIT_MS = 30 * 60 * 1000;
+
+async function fetchServerTask(path, payload) {
+	const res = await fetch(`${SERVER_BASE_URL}${path}`, {
+		method: "POST",
+		headers: { "Content-Type": "application/json" },
+		body: JSON.stringify(payload)
+	});
+	if (res.status !== 202) return res.json(); // validation error / look-ahead hit
+
+	const { taskId } = await res.json();
+	const deadline = Date.now() + TASK_MAX_WAIT_MS;
+	while (Date.now() < deadline) {
+		await new Promise((resolve) => setTimeout(resolve, TASK_POLL_INTERVAL_MS));
+		const task = await (await fetch(`${SERVER_BASE_URL}/tasks/${taskId}`)).json();
+		if (task.status === "done" || task.status === "failed") return task.result;
+		if (!task.status) throw new Error(`Task ${taskId} lost: ${JSON.stringify(task.errors)}`);
+	}
+	throw new Error(`Task ${taskId} timed out after ${TASK_MAX_WAIT_MS / 1000}s`);
+}
+
+
 
 /* ======================================================================================
  * ⚙️ AUTOMATION CONTROL HELPERS
@@ -994,14 +1025,7 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
 		// ------------------------------------------------------------
 		case 'getNearestAddress': {
 			console.log("[BG] getNearestAddress req received:", request.payload);
-			runGetNearestAddress(async () => {
-				const res = await fetch(`${SERVER_BASE_URL}/get-nearest-address`, {
-					method: "POST",
-					headers: { "Content-Type": "application/json" },
-					body: JSON.stringify(request.payload)
-				});
-				return res.json();
-			})
+			runGetNearestAddress(() => fetchServerTask("/get-nearest-address", request.payload))
 			.then(sendResponse)
 			.catch(err => sendResponse({ success: false, error: err.message }));
 
@@ -1013,14 +1037,7 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
 		// ------------------------------------------------------------
 		case 'getBestResume': {
 			console.log("[BG] getBestResume req received:", request.payload);
-			runGetBestResume(async () => {
-				const res = await fetch(`${SERVER_BASE_URL}/get-best-fit-resume`, {
-					method: "POST",
-					headers: { "Content-Type": "application/json" },
-					body: JSON.stringify(request.payload)
-				});
-				return res.json();
-			})
+			runGetBestResume(() => fetchServerTask("/get-best-fit-resume", request.payload))
 			.then(sendResponse)
 			.catch(err => sendResponse({ success: false, error: err.message }));
 
@@ -1032,14 +1049,7 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
 		// ------------------------------------------------------------
 		case 'resolveQuestionWithLLM': {
 			console.log("[BG] resolveQuestionWithLLM req received:", request.payload);
-			runResolveQuestionWithLLM(async () => {
-				const res = await fetch(`${SERVER_BASE_URL}/resolve-questions-with-llm`, {
-					method: "POST",
-					headers: { "Content-Type": "application/json" },
-					body: JSON.stringify(request.payload)
-				});
-				return res.json();
-			})
+			runResolveQuestionWithLLM(() => fetchServerTask("/resolve-questions-with-llm", request.payload))
 			.then(sendResponse)
 			.catch(err => sendResponse({ success: false, error: err.message }));
 
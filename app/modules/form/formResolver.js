@@ -210,6 +210,7 @@ export async function resolveATSQuestions(
 	 *   options?: string[],
 	 *   hints?: string[],
 	 *   relevantDBKeys?: string[],
+	 *   exactDBKeys?: string[],
 	 *   reason: "needs_llm" | "execution_failed"
 	 * }} LLMMetadata
 	 */
@@ -238,6 +239,7 @@ export async function resolveATSQuestions(
 		}
 		
 		const relevantDBKeys = [];
+		const exactDBKeys = []; // Bound to this question directly (server rules may answer from these)
 		const hints = [];
 
 		if (hint) {
@@ -254,6 +256,7 @@ export async function resolveATSQuestions(
 				|| matchedQuestionCandidate.dbAnswerKey?.startsWith('website.')
 			)) {
 				relevantDBKeys.push(matchedQuestionCandidate.dbAnswerKey);
+				if (typeof matchedQuestionCandidate.dbAnswerKey === "string") exactDBKeys.push(matchedQuestionCandidate.dbAnswerKey);
 			}
 		}
 		if (matchedQuestionCandidate?.value) {
@@ -288,6 +291,7 @@ export async function resolveATSQuestions(
 				options: options,
 				hints: hints,
 				relevantDBKeys: relevantDBKeys,
+				exactDBKeys: exactDBKeys,
 				reason: reason
 			});
 		}
@@ -1,34 +1,92 @@
+import time
+STARTUP_STARTED_AT = time.perf_counter()  # Startup timing report baseline (before any heavy import)
+
 from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 from config.env_config import *
 from app.services.shared import automation_controller
 from app.services.run_jobs import Jobs, ExecutionResult
-from app.services.question_resolver.browser_question_resolver import resolve_questions as resolve_questions_with_browser
+from app.services.database import supabase_client
+from app.services.result_journal import result_journal
+from app.services.job_mirror import job_mirror
+from app.services.timeout_model import latency_model
+from app.services.lookahead import lookahead_resolver
+from app.services.job_scheduler import PriorityScheduler
+from app.services.metrics import metrics
+from app.services.event_log import event_log
+from app.services.task_executor import task_executor, request_fingerprint, Task, TaskResult
+from app.services.question_resolver.browser_question_resolver import resolve_questions as resolve_questions_with_browser, resolve_questions_batch as resolve_questions_batch_with_browser
 from app.services.question_resolver.ollama_question_resolver import ollama_question_resolver
-from app.services.get_best_fit_resume import get_best_fit_resume, ResumeMetaModel
+from app.services.question_resolver.answer_store import answer_store
+from app.services.get_best_fit_resume import get_best_fit_resume, get_cached_best_fit_resume, ResumeMetaModel
 from app.services.get_nearest_address import get_nearest_address, GetNearestAddressResponse
 from typing import Literal, Dict, Any
 import threading
-import queue
-import time
+import socket
 import json
 
 app = Flask(__name__)
 CORS(app)
 
-# Queue for server → client messages
-job_status_queue = queue.Queue()
-sse_clients = set()
-sse_lock = threading.Lock()
-def broadcast_sse(message: str):
-    with sse_lock:
-        for client_queue in list(sse_clients):
-            try:
-                client_queue.put_nowait(message)
-            except Exception:
-                pass
+# Server → client events (shared ring buffer, replayable via Last-Event-ID)
+SSE_HEARTBEAT_INTERVAL = 15         # Seconds between keepalive pings
+SSE_RETRY_MS = 3000                 # Client reconnect delay advertised to EventSource
 
-jobs = Jobs(RUNNER_ID)
+def broadcast_sse(event_type: str, **data):
+    event_log.publish(event_type, data)
+
+# Startup timing report: seconds since process start per phase
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 5001
+startup_report: Dict[str, float] = {}
+def mark_startup(phase: str) -> None:
+    startup_report[phase] = round(time.perf_counter() - STARTUP_STARTED_AT, 3)
+
+mark_startup("imports")
+jobs = Jobs(RUNNER_ID, notify=broadcast_sse)
+mark_startup("services")
+
+def _wait_until_listening(port: int, timeout: float = 30) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def run_startup_recovery(wait_for_port: bool = True) -> None:
+    # Network-bound recovery runs once the port is bound, so the server answers immediately.
+    if wait_for_port and not _wait_until_listening(SERVER_PORT):
+        print(f"⚠️ Server not listening on {SERVER_PORT} yet — running recovery anyway")
+    mark_startup("listening")
+    jobs.recover()
+    mark_startup("recovered")
+    job_mirror.start()
+    print("⏱️ Startup report: " + ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in startup_report.items()))
+
+_startup_lock = threading.Lock()
+_started = False
+
+def ensure_started(wait_for_port: bool = False) -> None:
+    """
+    Create the data directories and start recovery exactly once per process, however
+    the app is served (`python server.py`, `flask run`, a WSGI server). `Jobs._run_loop`
+    waits for recovery, so this has to run before the first `/run-jobs`.
+    """
+    global _started
+    with _startup_lock:
+        if _started:
+            return
+        _started = True
+    ensure_directories()
+    threading.Thread(target=run_startup_recovery, args=(wait_for_port,), name="startup-recovery", daemon=True).start()
+
+@app.before_request
+def _start_once():
+    # Under `flask run` / WSGI the first request is the earliest hook; the port is already bound.
+    ensure_started()
 
 
 
@@ -40,39 +98,110 @@ Job Status Stream Service
 @app.route("/job-status", methods=["GET"])
 def job_status():
     return jsonify({
-        "isRunnerActive": automation_controller.is_automation_active    
+        # Don't build the controller (GUI stack) just to report it's idle
+        "isRunnerActive": automation_controller.is_initialized and automation_controller.is_automation_active,
+        "lastTransitionSeconds": jobs.last_transition_seconds,
+        "taskQueueDepth": task_executor.queue_depth()
 })
 
+@app.route("/startup-report", methods=["GET"])
+def get_startup_report():
+    return jsonify({
+        "phases": startup_report,
+        "automationControllerInitialized": automation_controller.is_initialized
+    })
+
+@app.route("/database-stats", methods=["GET"])
+def database_stats():
+    return jsonify(supabase_client.get_latency_stats())
+
+@app.route("/result-journal", methods=["GET"])
+def result_journal_stats():
+    return jsonify(result_journal.stats())
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    # Prometheus text exposition format
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/jobs/pending", methods=["GET"])
+def pending_jobs():
+    limit = request.args.get("limit", type=int)
+    if request.args.get("order") == "priority":
+        return jsonify(PriorityScheduler().rank(job_mirror.get_pending_jobs())[:limit])
+    return jsonify(job_mirror.get_pending_jobs(limit=limit))
+
+@app.route("/jobs/counts", methods=["GET"])
+def job_counts():
+    return jsonify(job_mirror.count_by_status())
+
+@app.route("/job-timeouts", methods=["GET"])
+def job_timeouts():
+    return jsonify(latency_model.snapshot())
+
+@app.route("/answer-store", methods=["GET"])
+def answer_store_stats():
+    return jsonify(answer_store.stats())
+
+@app.route("/answer-store", methods=["DELETE"])
+def invalidate_answer_store():
+    # ?label=<substring> drops matching answers, no label drops everything
+    removed = answer_store.invalidate(request.args.get("label"))
+    print(f"🗑️ Answer store invalidated: {removed} answer(s)")
+    return jsonify({"success": True, "removed": removed})
+
 # SSE endpoint
 @app.route('/job-status-stream')
 def job_status_stream():
-    def event_stream():
-        client_queue = queue.Queue()
-
-        # Register client
-        with sse_lock:
-            sse_clients.add(client_queue)
+    # Reconnecting EventSource sends Last-Event-ID; ?lastEventId= covers clients that can't set headers.
+    cursor = event_log.resolve_cursor(request.headers.get("Last-Event-ID") or request.args.get("lastEventId"))
 
+    def event_stream(cursor: int):
         try:
-            last_ping = time.time()
+            yield f"retry: {SSE_RETRY_MS}\n\n"
 
             while True:
-                try:
-                    # Wait max 15s for message
-                    msg = client_queue.get(timeout=15)
-                    yield f"data: {msg}\n\n"
-                except queue.Empty:
-                    # Heartbeat every 15s
+                # Wait max SSE_HEARTBEAT_INTERVAL for events after this client's cursor
+                events, missed = event_log.read_after(cursor, timeout=SSE_HEARTBEAT_INTERVAL)
+                if not events:
                     yield "event: ping\ndata: keepalive\n\n"
+                    continue
+
+                if missed:
+                    # Fell behind the ring buffer: skip ahead instead of buffering.
+                    yield f"event: lagged\ndata: {json.dumps({'type': 'lagged', 'missed': missed})}\n\n"
+                for event in events:
+                    yield event_log.format_sse(event)
+                cursor = events[-1][0]
 
         except GeneratorExit:
             # Client disconnected
             pass
-        finally:
-            with sse_lock:
-                sse_clients.discard(client_queue)
 
-    return Response(event_stream(), mimetype="text/event-stream")
+    return Response(event_stream(cursor), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+'''
+------------------------------------------------------------------------------------------
+Task Service (GUI-bound routes run on the single-worker task executor)
+------------------------------------------------------------------------------------------
+'''
+def task_accepted(task: Task):
+    # 202 + task id; result via GET /tasks/<id> or the `task_completed` SSE event
+    response = jsonify({"success": True, "taskId": task.id, "status": task.status, "queueDepth": task_executor.queue_depth()})
+    response.headers["Location"] = f"/tasks/{task.id}"
+    return response, 202
+
+@app.route("/tasks/<task_id>", methods=["GET"])
+def get_task(task_id: str):
+    task = task_executor.get(task_id)
+    if task is None:
+        return jsonify({"success": False, "errors": ["Unknown or expired task id"]}), 404
+    return jsonify(task), 200
+
+@app.route("/tasks", methods=["GET"])
+def get_task_queue():
+    return jsonify(task_executor.snapshot())
 
 
 '''
@@ -85,19 +214,8 @@ def handle_run_jobs():
     if automation_controller.is_automation_active:
         return jsonify({"success": False, "error": "Runner already active"}), 409
 
-    response = jobs.start()
-
-    if response['success'] == False:
-        if response.get('reason') == 'automation_already_running':
-            return jsonify({"success": True}), 200
-        else:
-            broadcast_sse("jobs_stopped")
-            return jsonify({"success": False}), 400
-
-    if response['success'] == True:
-        if response.get('reason') == 'all_jobs_completed':
-            broadcast_sse("all_jobs_completed")
-
+    # Queued on the job runner thread; chain outcomes arrive over SSE.
+    jobs.start()
     return jsonify({"success": True}), 200
 
 @app.route('/get-nearest-address', methods=['POST'])
@@ -113,14 +231,24 @@ def handle_get_nearest_address():
     if not location:
         return jsonify({"success": False, "payload": None, "errors": ["No location provided"]}), 400
     
-    if not automation_controller.open_llm_session('get-nearest-address'):
-        print("⚠️ Error Opening LLM Session")
-        return jsonify({"success": False, "payload": None, "errors": ["Error Opening LLM Session"]}), 400
-    # --- 4️⃣ Call service ---
-    response: GetNearestAddressResponse = get_nearest_address(location)
-    automation_controller.goto_automation_desktop()
-
-    return jsonify(response)
+    # --- 4️⃣ Look-ahead hit (pre-resolved while the previous job ran) ---
+    current_job_key = jobs.current_job["key"] if jobs.chain_enabled and jobs.current_job else None
+    cached: GetNearestAddressResponse | None = lookahead_resolver.get(current_job_key, "nearest_address", location)
+    if cached is not None:
+        print(f"⚡ Look-ahead hit: nearest address for {current_job_key}")
+        return jsonify(cached)
+
+    def run() -> TaskResult:
+        with automation_controller.foreground_llm():
+            if not automation_controller.open_llm_session('get-nearest-address'):
+                print("⚠️ Error Opening LLM Session")
+                return {"success": False, "payload": None, "errors": ["Error Opening LLM Session"]}, 400
+            # --- 5️⃣ Call service ---
+            response: GetNearestAddressResponse = get_nearest_address(location)
+            automation_controller.goto_automation_desktop()
+        return response, 200
+
+    return task_accepted(task_executor.submit('get-nearest-address', run, dedup_key=request_fingerprint('get-nearest-address', location)))
 
 @app.route('/get-best-fit-resume', methods=['POST'])
 def handle_get_best_fit_resume():
@@ -129,16 +257,33 @@ def handle_get_best_fit_resume():
     if not isinstance(data, dict):
         return jsonify({"error": "Invalid request"}), 404
 
-    if not automation_controller.open_llm_session('get-best-fit-resume'):
-        print("⚠️ Error Opening LLM Session")
-        return jsonify({"error": "Error Opening LLM Session"}), 404
-    # --- Call service ---
-    response: ResumeMetaModel | None = get_best_fit_resume(data) or None
-    automation_controller.goto_automation_desktop()
-
-    if response is None:
-        return jsonify({"error": "No resume found"}), 404
-    return jsonify(response.model_dump())  # Convert model-to-dict at the boundary
+    # --- Look-ahead hit (pre-resolved while the previous job ran) ---
+    current_job_key = jobs.current_job["key"] if jobs.chain_enabled and jobs.current_job else None
+    cached: ResumeMetaModel | None = lookahead_resolver.get(current_job_key, "best_fit_resume")
+    if cached is not None:
+        print(f"⚡ Look-ahead hit: best-fit resume for {current_job_key}")
+        return jsonify(cached.model_dump())
+
+    # --- Decision cache hit (same clues, unchanged resumes) ---
+    cached = get_cached_best_fit_resume(data)
+    if cached is not None:
+        print("⚡ Resume cache hit")
+        return jsonify(cached.model_dump())
+
+    def run() -> TaskResult:
+        with automation_controller.foreground_llm():
+            if not automation_controller.open_llm_session('get-best-fit-resume'):
+                print("⚠️ Error Opening LLM Session")
+                return {"error": "Error Opening LLM Session"}, 404
+            # --- Call service ---
+            response: ResumeMetaModel | None = get_best_fit_resume(data, check_cache=False) or None  # Route already missed the decision cache
+            automation_controller.goto_automation_desktop()
+
+        if response is None:
+            return {"error": "No resume found"}, 404
+        return response.model_dump(), 200  # Convert model-to-dict at the boundary
+
+    return task_accepted(task_executor.submit('get-best-fit-resume', run, dedup_key=request_fingerprint('get-best-fit-resume', data)))
 
 @app.route('/resolve-questions-with-llm', methods=['POST'])
 def handle_resolve_questions():
@@ -150,24 +295,61 @@ def handle_resolve_questions():
         print("Invalid or missing JSON body", data if not isinstance(data, dict) else ('Keys:' + list(data.keys())))
         return jsonify({"success": False, "payload": None, "errors": ["Invalid or missing JSON body"]}), 400
     
+    if LLM_MODE_QUESTION_RESOLVER not in ("BROWSER", "OLLAMA"):
+        return jsonify({"success": False, "payload": None, "errors": ["Invalid LLM_MODE_QUESTION_RESOLVER in env"]}), 400
+
     # Execute Question Resolver
-    if LLM_MODE_QUESTION_RESOLVER == "BROWSER":
-        response: List[Dict[str, Any] | None] = resolve_questions_with_browser(data['questions'], data['job_details']) or None
-    elif LLM_MODE_QUESTION_RESOLVER == "OLLAMA":
-        response: List[Dict[str, Any] | None] = ollama_question_resolver.resolve_questions(
-            data['questions'], 
-            data['job_details'], 
-            persist_system_prompt=False, 
-            persist_context_prompt=False
-        ) or None
-    else:
+    def run() -> TaskResult:
+        if LLM_MODE_QUESTION_RESOLVER == "BROWSER":
+            with automation_controller.foreground_llm():
+                response: List[Dict[str, Any] | None] = resolve_questions_with_browser(data['questions'], data['job_details']) or None
+                # Update UI
+                automation_controller.goto_automation_desktop()
+        else: # OLLAMA
+            response: List[Dict[str, Any] | None] = ollama_question_resolver.resolve_questions(
+                data['questions'], 
+                data['job_details'], 
+                persist_system_prompt=False, 
+                persist_context_prompt=False
+            ) or None
+            # Update UI
+            automation_controller.goto_automation_desktop()
+
+        # Return
+        return {"success": True, "payload": response, "errors": []}, 200
+
+    return task_accepted(task_executor.submit('resolve-questions-with-llm', run, dedup_key=request_fingerprint('resolve-questions-with-llm', data)))
+
+@app.route('/resolve-questions-batch', methods=['POST'])
+def handle_resolve_questions_batch():
+
+    data: dict = request.json
+
+    # Base return: { jobs: [ { id?, job_details, questions }, ... ] }
+    jobs_payload = data.get('jobs') if isinstance(data, dict) else None
+    if not isinstance(jobs_payload, list) or not jobs_payload or not all(
+        isinstance(group, dict) and isinstance(group.get('questions'), list) and isinstance(group.get('job_details'), dict)
+        for group in jobs_payload
+    ):
+        return jsonify({"success": False, "payload": None, "errors": ["Invalid or missing JSON body"]}), 400
+    if LLM_MODE_QUESTION_RESOLVER not in ("BROWSER", "OLLAMA"):
         return jsonify({"success": False, "payload": None, "errors": ["Invalid LLM_MODE_QUESTION_RESOLVER in env"]}), 400
-    
-    # Update UI
-    automation_controller.goto_automation_desktop()
 
-    # Return
-    return jsonify({"success": True, "payload": response, "errors": []}), 200
+    groups = [(group['job_details'], group['questions']) for group in jobs_payload]
+
+    def run() -> TaskResult:
+        if LLM_MODE_QUESTION_RESOLVER == "BROWSER":
+            with automation_controller.foreground_llm():
+                results = resolve_questions_batch_with_browser(groups)
+                automation_controller.goto_automation_desktop()
+        else: # OLLAMA
+            results = ollama_question_resolver.resolve_questions_batch(groups)
+
+        # Per-job results, same order as submitted
+        payload = [{"id": group.get('id'), "payload": job_results} for group, job_results in zip(jobs_payload, results)]
+        return {"success": True, "payload": payload, "errors": []}, 200
+
+    return task_accepted(task_executor.submit('resolve-questions-batch', run, dedup_key=request_fingerprint('resolve-questions-batch', data)))
 
 @app.route("/set-job-execution-result", methods=["POST"])
 def handle_set_job_execution_result() -> Dict[Literal['success', 'errors'], bool | List[str]]:
@@ -184,8 +366,8 @@ def handle_set_job_execution_result() -> Dict[Literal['success', 'errors'], bool
     if LLM_MODE_QUESTION_RESOLVER == "OLLAMA":
         ollama_question_resolver.close_session()
 
-    # Update Database
-    statusSetResponse = jobs.set_execution_result(
+    # Update Database (queued on the job runner thread)
+    statusSetResponse = jobs.submit_execution_result(
         ExecutionResult(data['result']), 
         data['id'], 
         data['fingerprint'], 
@@ -202,12 +384,12 @@ def handle_set_job_execution_result() -> Dict[Literal['success', 'errors'], bool
         print("------------------- End 🔸 Failed ---------------------------")
         return jsonify({"success": False, "errors": errors})
 
-    return jsonify({"success": True, "errors": []})
+    return jsonify({"success": True, "errors": [], "reason": statusSetResponse.get('reason')})
 
 
 @app.route("/stop-run-jobs", methods=["POST"])
 def handle_stop_run_jobs():
-    jobs.chain_enabled = False
+    jobs.stop()
     broadcast_sse("jobs_stopped")
     return jsonify({"success": True}), 200
 
@@ -217,4 +399,5 @@ Start Server
 ------------------------------------------------------------------------------------------
 '''
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, threaded=True)
+    ensure_started(wait_for_port=True)
+    app.run(host=SERVER_HOST, port=SERVER_PORT, threaded=True)
@@ -3,7 +3,14 @@
 # Imports
 # -----------------------------
 from config.env_config import SUPERBASE_PROJECT_ID, SUPERBASE_API_KEY, SUPERBASE_TABLE
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import threading
+import random
+import time
 import requests
+import urllib3
 
 
 # -----------------------------
@@ -17,8 +24,134 @@ HEADERS = {
 }
 RPC_URL = f"https://{SUPERBASE_PROJECT_ID}.supabase.co/rest/v1/rpc/upsert_job"
 RPC_FETCH_AND_LOCK = f"https://{SUPERBASE_PROJECT_ID}.supabase.co/rest/v1/rpc/fetch_and_lock_next_job"
+RPC_FETCH_AND_LOCK_BATCH = f"https://{SUPERBASE_PROJECT_ID}.supabase.co/rest/v1/rpc/fetch_and_lock_next_jobs"
+RPC_UPSERT_BATCH = f"https://{SUPERBASE_PROJECT_ID}.supabase.co/rest/v1/rpc/upsert_jobs_batch"
 RPC_RESET_URL = f"https://{SUPERBASE_PROJECT_ID}.supabase.co/rest/v1/rpc/reset_processing_jobs"
 
+POOL_MAXSIZE = 8                    # Keep-alive connections held open to Supabase
+MAX_RETRIES = 3                     # Retries after the first attempt (see `SupabaseClient.request`)
+RETRY_BACKOFF_BASE = 0.4            # Seconds; doubled every attempt
+RETRY_BACKOFF_CAP = 4.0             # Seconds; upper bound for a single backoff sleep
+RETRY_STATUS_CODES = {500, 502, 503, 504}
+JOBS_PAGE_SIZE = 500                # Rows per keyset page when reading the table
+
+
+# -----------------------------
+# Client
+# -----------------------------
+class SupabaseClient:
+    """
+    Shared Supabase REST client.
+
+    Owns a pooled keep-alive `requests.Session` (so consecutive RPCs reuse the
+    same TCP+TLS connection), applies bounded retries with jittered exponential
+    backoff, and records per-RPC latency stats.
+    """
+
+    def __init__(self, headers: Dict[str, str], pool_maxsize: int = POOL_MAXSIZE, max_retries: int = MAX_RETRIES):
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def _record(self, name: str, elapsed: float, ok: bool, retries: int) -> None:
+        with self._stats_lock:
+            stat = self._stats.setdefault(name, {
+                "calls": 0, "errors": 0, "retries": 0,
+                "total_ms": 0.0, "min_ms": float("inf"), "max_ms": 0.0, "last_ms": 0.0,
+            })
+            elapsed_ms = elapsed * 1000
+            stat["calls"] += 1
+            stat["errors"] += 0 if ok else 1
+            stat["retries"] += retries
+            stat["total_ms"] += elapsed_ms
+            stat["min_ms"] = min(stat["min_ms"], elapsed_ms)
+            stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+            stat["last_ms"] = elapsed_ms
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform(0, min(cap, base * 2^attempt))
+        return random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * (2 ** attempt)))
+
+    @staticmethod
+    def _never_sent(exc: requests.RequestException) -> bool:
+        """
+        True when the request provably never reached the server (connect timeout,
+        DNS / TCP connect failure) — the only errors safe to retry for a
+        non-idempotent RPC.
+        """
+        if isinstance(exc, requests.ConnectTimeout):
+            return True
+        if isinstance(exc, requests.ConnectionError):
+            reason = getattr(exc.args[0], "reason", None) if exc.args else None
+            return isinstance(reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError))
+        return False
+
+    def request(self, method: str, url: str, *, name: str | None = None, idempotent: bool | None = None, **kwargs: Any) -> requests.Response:
+        """
+        Send a request through the pooled session.
+
+        - Idempotent requests (GET by default) retry on connection errors / timeouts
+          and `RETRY_STATUS_CODES`.
+        - Non-idempotent ones (POST RPCs by default — `fetch_and_lock_*`, upserts) retry
+          ONLY when the request never left this host: after a read timeout or a 5xx the
+          server may already have locked / written a row, and a replay would lock a
+          second one and strand the first in `processing`.
+        4xx responses are returned immediately (callers decide via `raise_for_status`).
+        """
+        name = name or url.rsplit("/", 1)[-1]
+        if idempotent is None:
+            idempotent = method.upper() in ("GET", "HEAD", "OPTIONS")
+        start = time.perf_counter()
+        attempt = 0
+
+        while True:
+            try:
+                res = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries or not (idempotent or self._never_sent(e)):
+                    self._record(name, time.perf_counter() - start, ok=False, retries=attempt)
+                    raise
+            else:
+                if res.status_code not in RETRY_STATUS_CODES or not idempotent or attempt >= self.max_retries:
+                    self._record(name, time.perf_counter() - start, ok=res.ok, retries=attempt)
+                    return res
+
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def get_latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-RPC latency snapshot:
+        { "<rpc>": { calls, errors, retries, avg_ms, min_ms, max_ms, last_ms } }
+        """
+        with self._stats_lock:
+            snapshot = {}
+            for name, stat in self._stats.items():
+                snapshot[name] = {
+                    "calls": stat["calls"],
+                    "errors": stat["errors"],
+                    "retries": stat["retries"],
+                    "avg_ms": round(stat["total_ms"] / stat["calls"], 2) if stat["calls"] else 0.0,
+                    "min_ms": round(stat["min_ms"], 2) if stat["calls"] else 0.0,
+                    "max_ms": round(stat["max_ms"], 2),
+                    "last_ms": round(stat["last_ms"], 2),
+                }
+            return snapshot
+
+
+supabase_client = SupabaseClient(HEADERS)
+
 
 def reset_processing_jobs_on_startup() -> None:
     """
@@ -26,9 +159,10 @@ def reset_processing_jobs_on_startup() -> None:
     back to `pending` WITHOUT overwriting JSONB data.
     """
 
-    response = requests.post(
+    response = supabase_client.post(
         RPC_RESET_URL,
-        headers=HEADERS,
+        name="reset_processing_jobs",
+        idempotent=True,
         json={},  # RPC requires body, even if empty
         timeout=15
     )
@@ -48,9 +182,9 @@ def reset_processing_jobs_on_startup() -> None:
 def fetch_and_lock_next_job(runner_id: str, timeout: int = 10):
     payload = {"p_runner": runner_id}
 
-    res = requests.post(
+    res = supabase_client.post(
         RPC_FETCH_AND_LOCK,
-        headers=HEADERS,
+        name="fetch_and_lock_next_job",
         json=payload,
         timeout=timeout
     )
@@ -59,30 +193,166 @@ def fetch_and_lock_next_job(runner_id: str, timeout: int = 10):
     return res.json() if res.content else None
 
 
-# Fetch Jobs
+# Fetch Batch of Jobs
+_batch_rpc_available: bool = True
+
+def fetch_and_lock_next_jobs(runner_id: str, n: int, timeout: int = 10) -> List[Dict[str, Any]]:
+    """
+    Lock up to `n` jobs for `runner_id` in a single round-trip.
+
+    Uses the `fetch_and_lock_next_jobs(p_runner, p_limit)` RPC. When the RPC is not
+    deployed (PostgREST answers 404), falls back to `n` sequential
+    `fetch_and_lock_next_job` calls over the pooled keep-alive session.
+    """
+    global _batch_rpc_available
+
+    if n <= 0:
+        return []
+
+    if _batch_rpc_available:
+        res = supabase_client.post(
+            RPC_FETCH_AND_LOCK_BATCH,
+            name="fetch_and_lock_next_jobs",
+            json={"p_runner": runner_id, "p_limit": n},
+            timeout=timeout
+        )
+        if res.status_code == 404:
+            print("⚠️ RPC fetch_and_lock_next_jobs not found — falling back to sequential locking")
+            _batch_rpc_available = False
+        else:
+            res.raise_for_status()
+            jobs = res.json() if res.content else []
+            if isinstance(jobs, dict):
+                jobs = [jobs]
+            return [job for job in (jobs or []) if job]
+
+    jobs = []
+    for _ in range(n):
+        job = fetch_and_lock_next_job(runner_id, timeout=timeout)
+        if not job:
+            break
+        jobs.append(job)
+    return jobs
+
+
+# Fetch Jobs (keyset pagination)
+def fetch_jobs_page(
+    *,
+    select: str = "key,publish_time_ts,data",
+    after: Tuple[str, str] | None = None,
+    filters: Dict[str, str] | None = None,
+    page_size: int = JOBS_PAGE_SIZE,
+    null_publish_time: bool = False,
+    after_key: str | None = None,
+    timeout: int = 15
+) -> List[Dict[str, Any]]:
+    """
+    Fetch one page of rows ordered by (publish_time_ts ASC, key ASC).
+
+    - `select` projects only the needed columns (no `select=*`).
+    - `after` is the keyset cursor: (publish_time_ts, key) of the last row already seen.
+    - `null_publish_time=True` pages the rows WITHOUT publish_time_ts instead,
+      ordered by key with `after_key` as the cursor (NULL can't be a keyset bound).
+    - The page is bounded with a `Range` header instead of OFFSET.
+    """
+    params = {"select": select, **(filters or {})}
+    if null_publish_time:
+        params["publish_time_ts"] = "is.null"
+        params["order"] = "key.asc"
+        if after_key is not None:
+            params["key"] = f'gt."{after_key}"'
+    else:
+        params["publish_time_ts"] = "not.is.null"
+        params["order"] = "publish_time_ts.asc,key.asc"
+        if after is not None:
+            ts, key = after
+            params["or"] = f'(publish_time_ts.gt."{ts}",and(publish_time_ts.eq."{ts}",key.gt."{key}"))'
+
+    response = supabase_client.get(
+        BASE_URL,
+        name="fetch_jobs_page",
+        params=params,
+        headers={"Range-Unit": "items", "Range": f"0-{page_size - 1}"},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def iter_jobs(*, include_null_publish_time: bool = True, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate every row matching `filters`, page by page: rows without publish_time_ts
+    first (keyset on key), then the rest (keyset on publish_time_ts, key).
+    An `after` cursor only applies to — and implies — the timestamped rows.
+    """
+    page_size = kwargs.setdefault("page_size", JOBS_PAGE_SIZE)
+    after = kwargs.pop("after", None)
+
+    if include_null_publish_time and after is None:
+        after_key = None
+        while True:
+            page = fetch_jobs_page(null_publish_time=True, after_key=after_key, **kwargs)
+            yield from page
+            if len(page) < page_size:
+                break
+            after_key = page[-1]["key"]
+
+    while True:
+        page = fetch_jobs_page(after=after, **kwargs)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = (page[-1]["publish_time_ts"], page[-1]["key"])
+
+
+def fetch_jobs_by_keys(job_keys: List[str], select: str = "key,publish_time_ts,data", chunk_size: int = 100, timeout: int = 15) -> List[Dict[str, Any]]:
+    """
+    Full rows for the given keys (`key=in.(...)`, chunked to keep URLs short).
+    """
+    rows: List[Dict[str, Any]] = []
+    for i in range(0, len(job_keys), chunk_size):
+        chunk = job_keys[i:i + chunk_size]
+        quoted = ",".join('"' + key.replace('\\', '\\\\').replace('"', '\\"') + '"' for key in chunk)
+        response = supabase_client.get(
+            BASE_URL,
+            name="fetch_jobs_by_keys",
+            params={"select": select, "key": f"in.({quoted})"},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        rows.extend(response.json())
+    return rows
+
+
 def get_all_jobs():
     """
     Fetch pending jobs sorted by:
       1️⃣ publish_time_ts DESC (newest first)
       2️⃣ matchScore DESC (tie-breaker)
+
+    Reads the remote table page by page; prefer `job_mirror.get_pending_jobs()`
+    which serves the same ordering from the local mirror.
     """
 
-    params = {
-        "select": "*",
+    filters = {
         "data->>applicationStatus": "eq.init",
         "data->>executionResult": "eq.pending",
-        "order": "publish_time_ts.desc,data->>matchScore.desc"
     }
 
-    response = requests.get(BASE_URL, headers=HEADERS, params=params)
-    response.raise_for_status()
-
-    jobs = response.json()
+    jobs = list(iter_jobs(filters=filters))
+    jobs.sort(key=lambda job: (job.get("publish_time_ts") or "", _match_score(job)), reverse=True)
     print(f"📦 Pending jobs fetched: {len(jobs)}")
 
     return jobs
 
 
+def _match_score(job: Dict[str, Any]) -> float:
+    try:
+        return float((job.get("data") or {}).get("matchScore") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
 def upsert_job(
     job_key: str,
     *,
@@ -94,7 +364,7 @@ def upsert_job(
 ):
     """
     Upsert a single job into Supabase via RPC.
-    
+
     Parameters:
         job_key (str): Unique key of the job (required).
         force_update (dict | None): Keys that always overwrite existing values in JSONB.
@@ -120,9 +390,9 @@ def upsert_job(
     }
 
     try:
-        res = requests.post(
+        res = supabase_client.post(
             RPC_URL,
-            headers=HEADERS,
+            name="upsert_job",
             json=payload,
             timeout=timeout
         )
@@ -133,3 +403,121 @@ def upsert_job(
         raise RuntimeError("Supabase RPC request failed") from e
 
     return res.json() if res.content else None
+
+
+def upsert_jobs_batch(rows: List[Dict[str, Any]], timeout: int = 15):
+    """
+    Upsert many jobs in one round-trip via the `upsert_jobs_batch` RPC.
+
+    Each row: { key, fingerprint, force_data, soft_data, source } (same shape the
+    extension sends from `jobBoardUtils.prepareBatch`).
+    """
+    if not rows:
+        return None
+
+    try:
+        res = supabase_client.post(
+            RPC_UPSERT_BATCH,
+            name="upsert_jobs_batch",
+            json={"jobs": rows},
+            timeout=timeout
+        )
+        res.raise_for_status()
+    except requests.RequestException as e:
+        raise RuntimeError("Supabase batch RPC request failed") from e
+
+    return res.json() if res.content else None
+
+
+# -----------------------------
+# Leases
+# -----------------------------
+def _utc_iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def renew_job_leases(runner_id: str, job_keys: List[str], ttl: int, timeout: int = 10) -> str | None:
+    """
+    Stamp (or extend) `leaseOwner` / `leaseExpiresAt` on every job this runner holds,
+    in one `upsert_jobs_batch` round-trip. Returns the new expiry (ISO-8601, UTC).
+    """
+    if not job_keys:
+        return None
+
+    expires_at = _utc_iso(datetime.now(timezone.utc) + timedelta(seconds=ttl))
+    upsert_jobs_batch([
+        {
+            "key": job_key,
+            "fingerprint": None,
+            "force_data": {"leaseOwner": runner_id, "leaseExpiresAt": expires_at},
+            "soft_data": {},
+            "source": None
+        }
+        for job_key in job_keys
+    ], timeout=timeout)
+    return expires_at
+
+
+LEASELESS_GRACE = 180               # Seconds a `processing` row may stay lease-less before it counts as dead
+_leaseless_first_seen: Dict[str, float] = {}  # key → monotonic time this process first saw it locked without a lease
+
+
+def reclaim_expired_leases(runner_id: str, include_own: bool = True, leaseless_grace: float = LEASELESS_GRACE, exclude: Iterable[str] = ()) -> List[str]:
+    """
+    Move `processing` jobs back to `pending` ONLY when their lease is dead:
+      • lease expired (owner stopped heartbeating), or
+      • lease owned by `runner_id` itself (this runner restarted, its in-flight work is gone) — only with `include_own` (startup), or
+      • no lease at all for at least `leaseless_grace` seconds (locked by a runner that predates leases).
+    `fetch_and_lock_next_job(s)` and the lease stamp are separate writes, so a row a peer
+    locked a moment ago is briefly lease-less; a lease-less row is only reclaimed once
+    this process has seen it lease-less across sweeps for the whole grace period.
+    Live leases held by other runners are always left untouched, and so are `exclude`d
+    keys (this runner's finished jobs whose result is still journaled locally).
+    """
+    now = _utc_iso(datetime.now(timezone.utc))
+    seen_at = time.monotonic()
+    excluded = set(exclude)
+    processing = [
+        row for row in iter_jobs(
+            select="key,publish_time_ts,leaseOwner:data->>leaseOwner,leaseExpiresAt:data->>leaseExpiresAt",
+            filters={"data->>executionResult": "eq.processing"}
+        )
+        if row["key"] not in excluded
+    ]
+
+    leaseless = {row["key"] for row in processing if not row.get("leaseExpiresAt")}
+    for key in list(_leaseless_first_seen):
+        if key not in leaseless:
+            del _leaseless_first_seen[key]
+    for key in leaseless:
+        _leaseless_first_seen.setdefault(key, seen_at)
+
+    reclaimable = [
+        row["key"] for row in processing
+        if (row.get("leaseExpiresAt") and row["leaseExpiresAt"] < now)
+        or (include_own and row.get("leaseExpiresAt") and row.get("leaseOwner") == runner_id)
+        or (row["key"] in leaseless and seen_at - _leaseless_first_seen[row["key"]] >= leaseless_grace)
+    ]
+    if not reclaimable:
+        return []
+
+    failed = release_job_leases(reclaimable)
+    for key in reclaimable:
+        _leaseless_first_seen.pop(key, None)
+    print(f"🔄 Lease recovery complete: {len(reclaimable) - len(failed)} expired lease(s) → pending")
+    return [key for key in reclaimable if key not in failed]
+
+
+def release_job_leases(job_keys: List[str], timeout: int = 10) -> List[str]:
+    """
+    Hand locked-but-unstarted jobs back to the queue (`executionResult → pending`)
+    and clear their lease. Returns the keys that could NOT be released.
+    """
+    failed = []
+    for job_key in job_keys:
+        try:
+            upsert_job(job_key, force_update={"executionResult": "pending", "leaseOwner": None, "leaseExpiresAt": None}, timeout=timeout)
+        except Exception as e:
+            print(f"⚠️ Failed to release lease for {job_key}: {e}")
+            failed.append(job_key)
+    return failed
@@ -0,0 +1,85 @@
+# server\app\services\event_log.py
+# -----------------------------
+# Imports
+# -----------------------------
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+import threading
+import json
+import time
+
+
+# -----------------------------
+# Config
+# -----------------------------
+EVENT_LOG_CAPACITY = 256            # Events kept for Last-Event-ID replay
+MAX_EVENTS_PER_READ = 64            # Upper bound on events handed to one client per wake-up
+
+Event = Tuple[int, str, Dict[str, Any]]     # (id, type, data)
+
+
+class EventLog:
+    """
+    Shared ring buffer of typed server → client events with monotonic IDs.
+
+    Publishing appends once and wakes readers, so its cost doesn't depend on
+    the number of subscribers. Each SSE client only keeps a cursor (the last
+    ID it was sent) and reads forward from the shared log; a stalled client
+    holds nothing but that integer. A client whose cursor has fallen out of
+    the ring is fast-forwarded to the oldest retained event and told how many
+    it missed (`lagged` event) instead of being buffered.
+    """
+
+    def __init__(self, capacity: int = EVENT_LOG_CAPACITY):
+        self._events: deque[Event] = deque(maxlen=capacity)
+        self._last_id = 0
+        self._cond = threading.Condition()
+
+    @property
+    def last_id(self) -> int:
+        with self._cond:
+            return self._last_id
+
+    def publish(self, event_type: str, data: Dict[str, Any] | None = None) -> int:
+        with self._cond:
+            self._last_id += 1
+            self._events.append((self._last_id, event_type, {"type": event_type, "ts": time.time(), **(data or {})}))
+            self._cond.notify_all()
+            return self._last_id
+
+    def read_after(self, cursor: int, timeout: float) -> Tuple[List[Event], int]:
+        """
+        Events with ID > `cursor` (waits up to `timeout` seconds for one). Returns (events, missed),
+        where `missed` counts events that were evicted before this client read them.
+        """
+        with self._cond:
+            if self._last_id <= cursor:
+                self._cond.wait_for(lambda: self._last_id > cursor, timeout=timeout)
+            if self._last_id <= cursor or not self._events:
+                return [], 0
+
+            oldest_id = self._events[0][0]
+            missed = max(0, oldest_id - cursor - 1)
+            start = max(0, cursor + 1 - oldest_id)
+            end = min(len(self._events), start + MAX_EVENTS_PER_READ)
+            return [self._events[idx] for idx in range(start, end)], missed
+
+    def resolve_cursor(self, last_event_id: Optional[str]) -> int:
+        """
+        Starting cursor for a client: its `Last-Event-ID` (replay), or the newest ID for fresh clients.
+        IDs from a previous server process (greater than anything issued) restart at the newest ID.
+        """
+        with self._cond:
+            try:
+                cursor = int(last_event_id) if last_event_id not in (None, "") else self._last_id
+            except ValueError:
+                cursor = self._last_id
+            return cursor if 0 <= cursor <= self._last_id else self._last_id
+
+    @staticmethod
+    def format_sse(event: Event) -> str:
+        event_id, event_type, data = event
+        return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+event_log = EventLog()
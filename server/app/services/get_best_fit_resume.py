@@ -1,12 +1,13 @@
 from app.services.shared import automation_controller
-from config.env_config import USER_RESUMES_ROOT, USER_DATA_FILE, USE_TOR
-from typing import Literal, List, TypedDict, Dict
+from app.services.resume_cache import resume_cache
+from app.services.profile_store import profile_store
+from config.env_config import USER_RESUMES_ROOT, USE_TOR
+from typing import Callable, Literal, List, TypedDict, Dict
 import json
 import time
 from modules.utils.helpers import find_best_match
 from pydantic import BaseModel
 from enum import Enum
-import pyautogui
 
 # ------------------------
 # Pydantic model for clues
@@ -155,9 +156,10 @@ Do NOT include disclaimers, prefaces, boilerplate, meta-writing, preamble/lead-i
 
     return prompts
 
-def _get_resume_chatgpt(clues: ResumeMatchCluesModel) -> ResumeMetaModel | None:
+def _get_resume_chatgpt(clues: ResumeMatchCluesModel, should_cancel: Callable[[], bool] | None = None) -> ResumeMetaModel | None:
     """
     Determine the best fit resume using ChatGPT.
+    `should_cancel()` is checked between the category and region prompts (None = give up).
     """
 
     if not clues.has_job_desc:
@@ -165,12 +167,12 @@ def _get_resume_chatgpt(clues: ResumeMatchCluesModel) -> ResumeMetaModel | None:
 
     resume = dict()
 
-    # Reload the JSON file (DB)
-    with open(USER_DATA_FILE, 'r', encoding='utf-8') as f:
-        user_data = json.load(f)
+    # Current profile (re-read only when the file changed)
+    profile = profile_store.current()
+    user_data = profile.raw
 
     # Job Role
-    available_categories = {r['resumeCategory'] for r in user_data['resumes']}
+    available_categories = set(profile.resume_categories)
     category_prompts = _build_resume_category_identification_prompt(clues, available_categories)
     # Convert prompts to ChatGPT input structure
     chain_of_prompts = [
@@ -204,6 +206,7 @@ response_format = {
         if len(response) == 1: # Convert string to dict
             response: dict | None = automation_controller.chatgpt.convert_jsonic_response_to_dict(response[0])
     
+    import pyautogui # GUI stack loads on first use
     time.sleep(0.5)
     pyautogui.press('f5')
     time.sleep(5)
@@ -217,9 +220,12 @@ response_format = {
             # Use the string match percentage to find the best match
             job_class = find_best_match(available_categories, job_class, threshold=90)
         
+        if should_cancel and should_cancel():
+            return None
+
         # --- FURTHER REGION MATCHING ---
         # Find regions associated with the matched role category
-        available_regions = {resume['resumeRegion'] for resume in user_data['resumes'] if resume['resumeCategory'] == job_class}
+        available_regions = set(profile.resume_regions.get(job_class, ()))
         region_prompts: list[dict[str, str]] = _build_resume_location_identification_prompt(clues, available_regions)
         # Convert prompts to ChatGPT input structure
         chain_of_prompts = [
@@ -282,9 +288,32 @@ response_format = {
         
     return ResumeMetaModel.model_validate(resume)
 
-def get_best_fit_resume(resume_match_clues: ResumeMatchCluesDict, llmMode: LLMMode = LLMMode.chatgpt, max_retry: int = 3, retry_delay: float = 10) -> ResumeMetaModel | None:
+def _load_resumes_fingerprint() -> str:
+    return profile_store.current().resumes_fingerprint
+
+def get_cached_best_fit_resume(resume_match_clues: ResumeMatchCluesDict) -> ResumeMetaModel | None:
+    """
+    Cached decision for these clues against the current resume set, or None (no LLM / desktop work).
+    """
+    try:
+        clues = ResumeMatchCluesModel.model_validate(resume_match_clues)
+    except Exception:
+        return None
+
+    if not clues.has_job_desc:
+        return None
+
+    cached = resume_cache.get(clues.model_dump(), _load_resumes_fingerprint())
+    return ResumeMetaModel.model_validate(cached) if cached else None
+
+def get_best_fit_resume(resume_match_clues: ResumeMatchCluesDict, llmMode: LLMMode = LLMMode.chatgpt, max_retry: int = 3, retry_delay: float = 10, should_cancel: Callable[[], bool] | None = None, check_cache: bool = True) -> ResumeMetaModel | None:
     
     '''
+    `should_cancel()` (background callers) is polled between prompts and attempts;
+    once it returns True the lookup stops and returns None.
+    `check_cache=False` skips the decision-cache lookup (the caller already missed
+    via `get_cached_best_fit_resume`); the result is still stored.
+
     Output: 
     {
         'category': 'Data Science',
@@ -300,15 +329,24 @@ def get_best_fit_resume(resume_match_clues: ResumeMatchCluesDict, llmMode: LLMMo
     
     if not clues.has_job_desc:
         return None
+
+    # Repeat clues against an unchanged resume set resolve from the decision cache
+    fingerprint = _load_resumes_fingerprint()
+    cached = resume_cache.get(clues.model_dump(), fingerprint) if check_cache else None
+    if cached:
+        return ResumeMetaModel.model_validate(cached)
     
     llm_fn = _get_resume_chatgpt
 
     for attempt in range(max_retry):
+        if should_cancel and should_cancel():
+            return None
         if attempt > 0:
             time.sleep(retry_delay)
 
-        result = llm_fn(clues)
+        result = llm_fn(clues, should_cancel)
         if result:
+            resume_cache.put(clues.model_dump(), fingerprint, result.model_dump())
             return result
 
     return None
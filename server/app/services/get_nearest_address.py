@@ -1,11 +1,11 @@
 # get_best_address.py
 from app.services.shared import automation_controller
-from config.env_config import USER_DATA_FILE, USE_TOR
-from typing import List, Dict, TypedDict, Optional
+from app.services.profile_store import profile_store, build_inline_address
+from config.env_config import USE_TOR
+from typing import Callable, List, Dict, TypedDict, Optional
 import json
 import time
 from modules.utils.helpers import find_best_match
-import pyautogui
 
 # ------------------------
 # TypedDict for input
@@ -29,26 +29,11 @@ class GetNearestAddressResponse(TypedDict):
     payload: Optional[AddressModel]     # The best matched address, None if not found
     errors: List[str]                   # List of error messages, empty if no errors
 
-# ------------------------
-# Helper: build inline address for prompt
-# ------------------------
-def build_inline_address(address: Dict) -> str:
-    return "• " + ", ".join(
-        filter(None, [
-            address.get("addressLine1", ""),
-            address.get("addressLine2", ""),
-            address.get("city", ""),
-            address.get("state", ""),
-            address.get("postalCode", ""),
-            address.get("country", "")
-        ])
-    )
-
 # ------------------------
 # Build ChatGPT prompt
 # ------------------------
-def _build_address_prompt(location_str: str, addresses: List[Dict]) -> List[Dict[str, str]]:
-    address_lines = "\n".join(build_inline_address(addr) for addr in addresses)
+def _build_address_prompt(location_str: str, addresses: List[Dict], inline_addresses: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    address_lines = "\n".join(inline_addresses or [build_inline_address(addr) for addr in addresses])
 
     prompts: List[Dict[str, str]] = [
         {
@@ -90,13 +75,17 @@ Give direct answer as per the given JSON schema.
 # ------------------------
 # Get best address using ChatGPT
 # ------------------------
-def _get_nearest_address_chatgpt(location_str: str, addresses: List[Dict[str,str]], max_retry: int = 3, retry_delay: float = 5) -> AddressModel | None:
+def _get_nearest_address_chatgpt(location_str: str, addresses: List[Dict[str,str]], max_retry: int = 3, retry_delay: float = 5, inline_addresses: Optional[List[str]] = None, should_cancel: Optional[Callable[[], bool]] = None) -> AddressModel | None:
+
+    inline_addresses = inline_addresses or [build_inline_address(addr) for addr in addresses]
     
     for attempt in range(max_retry):
+        if should_cancel and should_cancel():
+            return None
         if attempt > 0:
             time.sleep(retry_delay)
 
-        prompts = _build_address_prompt(location_str, addresses)
+        prompts = _build_address_prompt(location_str, addresses, inline_addresses)
         # Convert prompts to ChatGPT input
         chain_of_prompts = [{"prompt": next(iter(p.values())), "timeout": 12} for p in prompts]
 
@@ -147,7 +136,7 @@ response_format = {
 
         # Normalize by finding exact match from available addresses
         # (LLM may slightly modify formatting)
-        inline_candidates = [build_inline_address(addr) for addr in addresses]
+        inline_candidates = inline_addresses
         candidate_strings = [", ".join(filter(None, [
             response_dict.get("addressLine1", ""),
             response_dict.get("addressLine2", ""),
@@ -167,11 +156,12 @@ response_format = {
 # ------------------------
 # Public function
 # ------------------------
-def get_nearest_address(location: str | List) -> GetNearestAddressResponse:
+def get_nearest_address(location: str | List, max_retry: int = 3, should_cancel: Optional[Callable[[], bool]] = None) -> GetNearestAddressResponse:
     """
     Finds the best/nearest address to the provided location(s).
     - a single string, e.g., "Schaumburg, IL"
     - a list of strings, e.g., ["Schaumburg, IL", "Orlando, FL"]
+    `should_cancel()` (background callers) is polled before every attempt.
 
     Output example:
     {
@@ -202,17 +192,15 @@ def get_nearest_address(location: str | List) -> GetNearestAddressResponse:
 
     
     # ------------------------
-    # Load the JSON file
+    # Load the profile (cached until userData.json changes)
     # ------------------------
-    with open(USER_DATA_FILE, "r", encoding="utf-8") as f:
-        user_data = json.load(f)
-
-    addresses: List[Dict] = user_data.get("addresses", [])
+    profile = profile_store.current()
+    addresses: List[Dict] = profile.addresses
 
     if not addresses:
         return {"success": False, "payload": None, "errors": ["No addresses available in database"]}
 
-    result = _get_nearest_address_chatgpt(location_str, addresses)
+    result = _get_nearest_address_chatgpt(location_str, addresses, max_retry=max_retry, inline_addresses=profile.address_lines, should_cancel=should_cancel)
 
     if not result:
         return {"success": False, "payload": None, "errors": ["Unable to find a matching address"]}
@@ -0,0 +1,285 @@
+# server\app\services\job_mirror.py
+# -----------------------------
+# Imports
+# -----------------------------
+from config.env_config import APP_DATA_DIR
+from app.services.database import iter_jobs, fetch_jobs_by_keys
+from app.services.result_journal import result_journal
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import threading
+import sqlite3
+import json
+import time
+
+
+# -----------------------------
+# Config
+# -----------------------------
+MIRROR_FILE = APP_DATA_DIR / "job_mirror.sqlite3"
+SYNC_INTERVAL = 5 * 60              # Seconds between background incremental syncs
+STATUS_REFRESH_EVERY = 6            # Refresh remote statuses every N syncs (status-only projection)
+STATUS_SELECT = "key,publish_time_ts,applicationStatus:data->>applicationStatus,executionResult:data->>executionResult"
+
+
+class JobMirror:
+    """
+    Local SQLite mirror of the Supabase `json_store` table.
+
+    - New rows are pulled incrementally with keyset pagination on
+      (publish_time_ts, key), starting from the last cursor seen. That cursor is the
+      job's publish time, not its insert time (the table has no insert / update
+      timestamp), so it is only a fast path: rows scraped late with an older
+      publish time, and rows without publish_time_ts, are filled in by the
+      periodic reconciliation below.
+    - Status changes made by this server are written through locally
+      (`apply_update`); changes made elsewhere are picked up by a periodic
+      reconciliation (`refresh_statuses`) that reads every remote key with a
+      narrow status projection, pulls full rows only for keys the mirror lacks and
+      drops rows deleted remotely. It runs on the first sync and every
+      `STATUS_REFRESH_EVERY` syncs after.
+    - Lookups, counts and ordering are served from indexed local columns.
+    """
+
+    def __init__(self, path: Path = MIRROR_FILE, sync_interval: float = SYNC_INTERVAL):
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self._connection: sqlite3.Connection | None = None     # Opened on first use, see `_conn`
+        self._open_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._sync_count = 0
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Directory, file and schema are created on first use, not at import
+        conn = self._connection
+        if conn is None:
+            with self._open_lock:
+                conn = self._connection
+                if conn is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript("""
+                        CREATE TABLE IF NOT EXISTS jobs (
+                            key TEXT PRIMARY KEY,
+                            publish_time_ts TEXT,
+                            application_status TEXT,
+                            execution_result TEXT,
+                            match_score REAL,
+                            data TEXT NOT NULL,
+                            synced_at REAL NOT NULL
+                        );
+                        CREATE INDEX IF NOT EXISTS idx_jobs_application_status ON jobs (application_status);
+                        CREATE INDEX IF NOT EXISTS idx_jobs_execution_result ON jobs (execution_result);
+                        CREATE INDEX IF NOT EXISTS idx_jobs_match_score ON jobs (match_score);
+                        CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (application_status, execution_result, publish_time_ts DESC, match_score DESC);
+                        CREATE TABLE IF NOT EXISTS sync_state (
+                            name TEXT PRIMARY KEY,
+                            value TEXT
+                        );
+                    """)
+                    self._connection = conn
+        return conn
+
+    # -----------------------------
+    # Helpers
+    # -----------------------------
+    @staticmethod
+    def _to_score(value: Any) -> Optional[float]:
+        try:
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def _get_state(self, name: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, name: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO sync_state (name, value) VALUES (?, ?)", (name, value))
+
+    def _upsert_rows(self, rows: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO jobs
+                    (key, publish_time_ts, application_status, execution_result, match_score, data, synced_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        row["key"],
+                        row.get("publish_time_ts"),
+                        (row.get("data") or {}).get("applicationStatus"),
+                        (row.get("data") or {}).get("executionResult"),
+                        self._to_score((row.get("data") or {}).get("matchScore")),
+                        json.dumps(row.get("data") or {}),
+                        now,
+                    )
+                    for row in rows
+                ]
+            )
+            self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _row_to_job(row: Tuple) -> Dict[str, Any]:
+        key, publish_time_ts, data = row
+        return {"key": key, "publish_time_ts": publish_time_ts, "data": json.loads(data)}
+
+    # -----------------------------
+    # Sync
+    # -----------------------------
+    def sync(self) -> int:
+        """
+        Pull rows newer than the stored (publish_time_ts, key) cursor. Returns rows pulled.
+        """
+        with self._sync_lock:
+            with self._lock:
+                cursor = self._get_state("cursor")
+            after = tuple(json.loads(cursor)) if cursor else None
+
+            pulled = 0
+            batch: List[Dict[str, Any]] = []
+            last = None
+            for row in iter_jobs(after=after):
+                batch.append(row)
+                if row.get("publish_time_ts") is not None:
+                    last = row
+                if len(batch) >= 500:
+                    self._upsert_rows(batch)
+                    pulled += len(batch)
+                    batch = []
+            if batch:
+                self._upsert_rows(batch)
+                pulled += len(batch)
+
+            if last is not None:
+                with self._lock:
+                    self._set_state("cursor", json.dumps([last["publish_time_ts"], last["key"]]))
+
+            if pulled:
+                print(f"🪞 Job mirror synced: {pulled} new/updated row(s)")
+            return pulled
+
+    def refresh_statuses(self) -> int:
+        """
+        Reconcile the mirror with every remote row: re-read only (key, applicationStatus,
+        executionResult), patch known rows, pull full rows the mirror is missing and delete
+        rows removed remotely. Rows with a result still in the journal keep their local
+        status (the remote row says `processing` until the flush lands). Returns rows
+        patched + pulled.
+        """
+        with self._sync_lock:
+            journaled = set(result_journal.pending_keys())
+            remote = list(iter_jobs(select=STATUS_SELECT))
+            remote_keys = {row["key"] for row in remote}
+            with self._lock:
+                local_keys = {row[0] for row in self._conn.execute("SELECT key FROM jobs")}
+
+            missing = [key for key in remote_keys if key not in local_keys]
+            if missing:
+                self._upsert_rows(fetch_jobs_by_keys(missing))
+
+            updates = [
+                (row.get("applicationStatus"), row.get("executionResult"), row["key"])
+                for row in remote if row["key"] in local_keys and row["key"] not in journaled
+            ]
+            deleted = [(key,) for key in local_keys - remote_keys]
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    """
+                    UPDATE jobs SET
+                        application_status = ?1,
+                        execution_result = ?2,
+                        data = json_set(data, '$.applicationStatus', ?1, '$.executionResult', ?2)
+                    WHERE key = ?3
+                    """,
+                    updates
+                )
+                self._conn.executemany("DELETE FROM jobs WHERE key = ?", deleted)
+                self._conn.execute("COMMIT")
+
+            if missing or deleted:
+                print(f"🪞 Job mirror reconciled: {len(missing)} missing row(s) pulled, {len(deleted)} deleted row(s) dropped")
+            return len(updates) + len(missing)
+
+    def apply_update(self, job_key: str, force_data: Dict[str, Any]) -> None:
+        """
+        Write-through for updates this server makes (result writes, locks, lease releases).
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE key = ?", (job_key,)).fetchone()
+            if row is None:
+                return
+            data = json.loads(row[0])
+            data.update(force_data)
+            self._conn.execute(
+                """
+                UPDATE jobs SET application_status = ?, execution_result = ?, match_score = ?, data = ?
+                WHERE key = ?
+                """,
+                (data.get("applicationStatus"), data.get("executionResult"), self._to_score(data.get("matchScore")), json.dumps(data), job_key)
+            )
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sync()
+                if self._sync_count % STATUS_REFRESH_EVERY == 0:
+                    self.refresh_statuses()
+                self._sync_count += 1
+            except Exception as e:
+                print(f"⚠️ Job mirror sync failed: {e}")
+            time.sleep(self.sync_interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="job-mirror-sync", daemon=True)
+        self._thread.start()
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def get_job(self, job_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT key, publish_time_ts, data FROM jobs WHERE key = ?", (job_key,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def get_pending_jobs(self, limit: int | None = None) -> List[Dict[str, Any]]:
+        """
+        Pending jobs ordered by publish_time_ts DESC, matchScore DESC (same as `get_all_jobs`).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT key, publish_time_ts, data FROM jobs
+                WHERE application_status = 'init' AND execution_result = 'pending'
+                ORDER BY publish_time_ts DESC, match_score DESC
+                LIMIT ?
+                """,
+                (limit if limit is not None else -1,)
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def count_by_status(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            by_application = self._conn.execute(
+                "SELECT application_status, COUNT(*) FROM jobs GROUP BY application_status"
+            ).fetchall()
+            by_execution = self._conn.execute(
+                "SELECT execution_result, COUNT(*) FROM jobs GROUP BY execution_result"
+            ).fetchall()
+        return {
+            "applicationStatus": {str(status): count for status, count in by_application},
+            "executionResult": {str(result): count for result, count in by_execution},
+        }
+
+
+job_mirror = JobMirror()
@@ -0,0 +1,154 @@
+# server\app\services\job_scheduler.py
+# -----------------------------
+# Imports
+# -----------------------------
+from app.services.timeout_model import latency_model
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from datetime import datetime, timezone
+import itertools
+import heapq
+import math
+import time
+
+
+# -----------------------------
+# Config
+# -----------------------------
+DEFAULT_MATCH_SCORE = 0.5           # Used when a job board provides no matchScore
+RECENCY_HALF_LIFE_DAYS = 7.0        # A posting's value halves every N days
+PRIOR_ATTEMPTS = 4                  # Beta prior: hosts start at PRIOR_SUCCESSES / PRIOR_ATTEMPTS success rate
+PRIOR_SUCCESSES = 2
+DEFAULT_JOB_MINUTES = 5.0           # Expected duration for hosts with no history
+MAX_DWELL_SECONDS = 30 * 60         # A buffered job waiting longer than this is started next, whatever its score
+
+HostStats = Dict[str, Any]                              # { attempts, successes, mean_seconds }
+ScoreFn = Callable[[Dict[str, Any], HostStats], float]  # (job row, host stats) -> score (higher first)
+StatsFn = Callable[[Optional[str]], HostStats]          # apply_url -> host stats
+
+
+# -----------------------------
+# Scoring
+# -----------------------------
+def _normalized_match_score(job_data: Dict[str, Any]) -> float:
+    try:
+        score = float(job_data.get("matchScore"))
+    except (TypeError, ValueError):
+        return DEFAULT_MATCH_SCORE
+    return max(0.0, min(1.0, score / 100 if score > 1 else score))
+
+
+def _age_days(job: Dict[str, Any]) -> Optional[float]:
+    published = job.get("publish_time_ts") or (job.get("data") or {}).get("publishTimeISO")
+    if not published:
+        return None
+    try:
+        published_at = datetime.fromisoformat(str(published).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if published_at.tzinfo is None:
+        published_at = published_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (datetime.now(timezone.utc) - published_at).total_seconds() / 86400)
+
+
+def expected_value_per_minute(job: Dict[str, Any], stats: HostStats) -> float:
+    """
+    Default score: P(applied) × match × recency ÷ expected minutes on the runner.
+
+    - P(applied): host success rate with a Beta prior (new hosts aren't starved or over-trusted).
+    - match: matchScore normalized to [0, 1].
+    - recency: exponential decay with `RECENCY_HALF_LIFE_DAYS` half-life.
+    - minutes: host's mean completion time.
+    """
+    job_data = job.get("data") or {}
+
+    success_rate = (stats.get("successes", 0) + PRIOR_SUCCESSES) / (stats.get("attempts", 0) + PRIOR_ATTEMPTS)
+    match = _normalized_match_score(job_data)
+    age_days = _age_days(job)
+    recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS) if age_days is not None else 0.5
+    minutes = (stats.get("mean_seconds") or DEFAULT_JOB_MINUTES * 60) / 60
+
+    return success_rate * match * recency / max(minutes, 0.5)
+
+
+# -----------------------------
+# Scheduler
+# -----------------------------
+class PriorityScheduler:
+    """
+    Max-heap of jobs ordered by a pluggable `score_fn(job, host_stats)`.
+
+    Scores are computed once on push (host stats move slowly); ties keep
+    insertion order. Used as the runner's local lease buffer, so the runner
+    always starts the highest-scoring job it currently holds — except that a
+    job buffered for more than `max_dwell` seconds goes first (oldest first),
+    so refills of better jobs can't keep a low-scoring lease waiting forever.
+    """
+
+    def __init__(self, score_fn: ScoreFn = expected_value_per_minute, stats_fn: StatsFn = latency_model.host_stats,
+                 max_dwell: float | None = MAX_DWELL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.score_fn = score_fn
+        self.stats_fn = stats_fn
+        self.max_dwell = max_dwell
+        self.clock = clock
+        self._heap: List[tuple] = []                # (-score, seq, pushed_at, job)
+        self._counter = itertools.count()
+
+    def score(self, job: Dict[str, Any]) -> float:
+        try:
+            score = self.score_fn(job, self.stats_fn((job.get("data") or {}).get("applyUrl")))
+        except Exception as e:
+            print(f"⚠️ Scoring failed for {job.get('key')}: {e}")
+            return 0.0
+        return score if math.isfinite(score) else 0.0
+
+    def push(self, job: Dict[str, Any]) -> None:
+        heapq.heappush(self._heap, (-self.score(job), next(self._counter), self.clock(), job))
+
+    def extend(self, jobs: List[Dict[str, Any]]) -> None:
+        for job in jobs:
+            self.push(job)
+
+    def _next_index(self) -> int:
+        """
+        Heap index of the job to start next: the oldest overdue entry, else the top.
+        The buffer holds a handful of jobs, so the overdue scan is linear.
+        """
+        if self.max_dwell is None:
+            return 0
+        deadline = self.clock() - self.max_dwell
+        overdue = [idx for idx, entry in enumerate(self._heap) if entry[2] <= deadline]
+        return min(overdue, key=lambda idx: self._heap[idx][1]) if overdue else 0
+
+    def pop(self) -> Dict[str, Any]:
+        if not self._heap:
+            raise IndexError("pop from an empty scheduler")
+        idx = self._next_index()
+        if idx == 0:
+            return heapq.heappop(self._heap)[3]
+        entry = self._heap[idx]
+        self._heap[idx] = self._heap[-1]
+        self._heap.pop()
+        heapq.heapify(self._heap)
+        print(f"⏳ Starting {entry[3].get('key')} after {self.clock() - entry[2]:.0f}s in the lease buffer (max dwell)")
+        return entry[3]
+
+    def peek(self) -> Optional[Dict[str, Any]]:
+        return self._heap[self._next_index()][3] if self._heap else None
+
+    def clear(self) -> None:
+        self._heap.clear()
+
+    def rank(self, jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return `jobs` sorted by score (highest first) without touching the heap.
+        """
+        return sorted(jobs, key=self.score, reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __bool__(self) -> bool:
+        return bool(self._heap)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (entry[3] for entry in self._heap)
@@ -0,0 +1,180 @@
+# server\app\services\lookahead.py
+# -----------------------------
+# Imports
+# -----------------------------
+from app.services.shared import automation_controller
+from app.services.metrics import metrics
+from app.services.task_executor import task_executor, request_fingerprint
+from app.services.get_best_fit_resume import get_best_fit_resume, get_cached_best_fit_resume, ResumeMetaModel
+from app.services.get_nearest_address import get_nearest_address, GetNearestAddressResponse
+from app.services.profile_store import profile_store
+from typing import Any, Dict, Literal, Optional, Tuple
+from functools import partial
+import threading
+import time
+
+
+# -----------------------------
+# Config
+# -----------------------------
+FOREGROUND_POLL_INTERVAL = 1.0      # Seconds between checks while an extension request owns the LLM desktop
+MAX_CACHED_JOBS = 16                # Per-job results kept before the oldest are dropped
+LOOKUP_ATTEMPTS = 3                 # LLM attempts per lookup; the lock is released (and foreground work let in) between them
+RETRY_DELAY = 5.0                   # Seconds between attempts, slept outside `llm_lock`
+
+LookaheadKind = Literal["best_fit_resume", "nearest_address"]
+
+# Kinds served for the running job whatever the request body says: the extension posts the
+# ATS page's scraped "Job Role: …" text, which never equals the clues built from the job row.
+JOB_KEYED_KINDS = {"best_fit_resume"}
+
+
+class LookaheadResolver:
+    """
+    Pre-resolves the LLM-bound lookups of the NEXT leased job while the current
+    application runs, and stashes them in a per-job result cache.
+
+    - Best-fit resume: clues built from the job row (`summary`/`title` + `locations`).
+    - Nearest address: the job row's `locations`.
+    Each lookup only runs if the matching `llm*SelectionEnabled` flag is on in the
+    user DB, and it yields to extension requests (`foreground_llm_requests` and
+    queued `task_executor` work): `llm_lock` is held for one attempt at a time,
+    and an attempt is cancelled between prompts as soon as foreground work shows
+    up, so the in-flight application waits on at most one prompt.
+
+    Nearest-address results are stored with the location they were resolved
+    from and only hit when the extension asks with the same location; best-fit
+    resumes (`JOB_KEYED_KINDS`) are served for the job they were resolved for.
+    """
+
+    def __init__(self):
+        self._cache: Dict[str, Dict[str, Tuple[str | None, Any]]] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    # -----------------------------
+    # Cache
+    # -----------------------------
+    @staticmethod
+    def _inputs_fingerprint(kind: LookaheadKind, inputs: Any) -> str | None:
+        if kind in JOB_KEYED_KINDS:
+            return None
+        if isinstance(inputs, dict):
+            inputs = {key: value for key, value in inputs.items() if value}
+        if isinstance(inputs, list) and len(inputs) == 1:
+            inputs = inputs[0]
+        return request_fingerprint(kind, inputs)
+
+    def get(self, job_key: str | None, kind: LookaheadKind, inputs: Any = None) -> Optional[Any]:
+        """
+        Pre-resolved `kind` for the job (if it was resolved from the same `inputs`, unless job-keyed).
+        """
+        if not job_key:
+            return None
+        with self._lock:
+            entry = self._cache.get(job_key, {}).get(kind)
+        if entry is None or entry[0] != self._inputs_fingerprint(kind, inputs):
+            return None
+        return entry[1]
+
+    def _put(self, job_key: str, kind: LookaheadKind, inputs: Any, value: Any) -> None:
+        fingerprint = self._inputs_fingerprint(kind, inputs)
+        with self._lock:
+            self._cache.setdefault(job_key, {})[kind] = (fingerprint, value)
+            while len(self._cache) > MAX_CACHED_JOBS:
+                self._cache.pop(next(iter(self._cache)))
+
+    def discard(self, job_key: str | None) -> None:
+        with self._lock:
+            self._cache.pop(job_key, None)
+
+    # -----------------------------
+    # Resolution
+    # -----------------------------
+    @staticmethod
+    def _foreground_busy() -> bool:
+        return automation_controller.foreground_llm_requests > 0 or task_executor.pending_count() > 0
+
+    def _wait_for_idle_llm(self) -> None:
+        while self._foreground_busy():
+            time.sleep(FOREGROUND_POLL_INTERVAL)
+
+    def _run_lookup(self, service_name: str, fn, *args) -> Any:
+        """
+        `fn(*args, max_retry=1, should_cancel=...)` up to `LOOKUP_ATTEMPTS` times,
+        each under its own `llm_lock` hold. A cancelled attempt (foreground work
+        arrived mid-chain) is retried once the LLM desktop is idle again.
+        """
+        for attempt in range(LOOKUP_ATTEMPTS):
+            if attempt > 0:
+                time.sleep(RETRY_DELAY)
+            self._wait_for_idle_llm()
+            with automation_controller.llm_lock:
+                if self._foreground_busy():
+                    continue
+                if not automation_controller.open_llm_session(service_name):
+                    print(f"[Lookahead] ⚠️ Error Opening LLM Session for {service_name}")
+                    return None
+                try:
+                    result = fn(*args, max_retry=1, should_cancel=self._foreground_busy)
+                finally:
+                    automation_controller.goto_automation_desktop()
+            if result is not None and not (isinstance(result, dict) and not result.get("success")):
+                return result
+        return None
+
+    def resolve(self, job: Dict[str, Any]) -> None:
+        job_key = job.get("key")
+        job_data: Dict[str, Any] = job.get("data") or {}
+        if not job_key:
+            return
+
+        with metrics.job_scope(job_key, job_data.get("applyUrl")):
+            self._resolve(job_key, job_data)
+
+    def _resolve(self, job_key: str, job_data: Dict[str, Any]) -> None:
+        user_data = profile_store.current().raw
+
+        locations = job_data.get("locations")
+        role_description = job_data.get("summary") or job_data.get("title")
+
+        clues = {"role_description": role_description, "location": locations}
+        if user_data.get("llmResumeSelectionEnabled") and role_description and self.get(job_key, "best_fit_resume", clues) is None:
+            start = time.perf_counter()
+            resume: ResumeMetaModel | None = get_cached_best_fit_resume(clues) or self._run_lookup(
+                "get-best-fit-resume", partial(get_best_fit_resume, check_cache=False), clues
+            )
+            if resume is not None:
+                self._put(job_key, "best_fit_resume", clues, resume)
+                print(f"[Lookahead] 📄 Best-fit resume ready for {job_key} ({time.perf_counter() - start:.1f}s)")
+
+        if user_data.get("llmAddressSelectionEnabled") and locations and self.get(job_key, "nearest_address", locations) is None:
+            start = time.perf_counter()
+            address: GetNearestAddressResponse | None = self._run_lookup(
+                "get-nearest-address", get_nearest_address, locations
+            )
+            if address and address.get("success"):
+                self._put(job_key, "nearest_address", locations, address)
+                print(f"[Lookahead] 🏠 Nearest address ready for {job_key} ({time.perf_counter() - start:.1f}s)")
+
+    def schedule(self, next_job_fn) -> None:
+        """
+        Resolve `next_job_fn()` (the next leased job, or None) in the background.
+        At most one look-ahead runs at a time.
+        """
+        def _run():
+            try:
+                job = next_job_fn()
+                if job:
+                    self.resolve(job)
+            except Exception as e:
+                print(f"[Lookahead] ❌ Look-ahead failed: {e}")
+
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=_run, name="lookahead", daemon=True)
+            self._thread.start()
+
+
+lookahead_resolver = LookaheadResolver()
@@ -0,0 +1,301 @@
+# server\app\services\metrics.py
+# -----------------------------
+# Imports
+# -----------------------------
+from config.env_config import APP_DATA_DIR
+from app.services.timeout_model import get_hostname
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from collections import deque
+from bisect import bisect_left
+from functools import wraps
+from pathlib import Path
+import threading
+import json
+import time
+import os
+
+
+# -----------------------------
+# Config
+# -----------------------------
+SPANS_FILE = APP_DATA_DIR / "job_spans.jsonl"
+SPANS_MAX_BYTES = 10 * 1024 * 1024  # Rotate the span log once it grows past this
+SPANS_BACKUP_COUNT = 3              # Rotated files kept (job_spans.jsonl.1 … .N, oldest dropped)
+
+# Phase histogram bucket upper bounds (seconds). `+Inf` is implicit.
+PHASE_BUCKETS: List[float] = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600]
+QUANTILES: List[float] = [0.5, 0.95]
+QUANTILE_WINDOW = 1000              # Most recent samples per phase used for p50 / p95
+THROUGHPUT_WINDOW = 60 * 60         # Seconds; completions inside this window make up jobs/hour
+
+MetricLabels = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """
+    Per-job phase spans, aggregated in memory and appended raw to a JSONL file
+    (size-rotated: `SPANS_MAX_BYTES` per file, `SPANS_BACKUP_COUNT` backups).
+
+    A span records how long one phase took (lease, open_automation_session,
+    desktop_switch, open_llm_session, prompt_chain, db_write, teardown, ...)
+    along with the job key and host it was spent on. The job is taken from the
+    calling thread's `job_scope()` if any, else from the runner's active job
+    (`set_active_job()`), so deep helpers (desktop switches, promptChain) don't
+    need the job threaded through.
+
+    `render_prometheus()` exposes per-phase histograms and p50/p95, job
+    completion counters and jobs/hour in Prometheus text format.
+    """
+
+    def __init__(self, spans_path: Path = SPANS_FILE, spans_max_bytes: int = SPANS_MAX_BYTES, spans_backup_count: int = SPANS_BACKUP_COUNT):
+        self.spans_path = Path(spans_path)
+        self.spans_max_bytes = spans_max_bytes
+        self.spans_backup_count = spans_backup_count
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._spans_dir_ready = False
+        self._spans_size: int | None = None    # Bytes in the current span file (stat'ed on first append)
+        self._local = threading.local()
+        self._active_job: Tuple[Optional[str], str] = (None, "")
+
+        self._phase_buckets: Dict[str, List[int]] = {}
+        self._phase_sum: Dict[str, float] = {}
+        self._phase_count: Dict[str, int] = {}
+        self._phase_errors: Dict[str, int] = {}
+        self._phase_samples: Dict[str, deque] = {}
+        self._counters: Dict[Tuple[str, MetricLabels], float] = {}
+        self._completions: deque = deque()
+
+    # -----------------------------
+    # Job context
+    # -----------------------------
+    def set_active_job(self, job_key: str | None, apply_url: str | None = None) -> None:
+        self._active_job = (job_key, get_hostname(apply_url))
+
+    @contextmanager
+    def job_scope(self, job_key: str | None, apply_url: str | None = None) -> Iterator[None]:
+        """
+        Attribute spans recorded on this thread to `job_key` (e.g. look-ahead work for the next job).
+        """
+        previous = getattr(self._local, "job", None)
+        self._local.job = (job_key, get_hostname(apply_url))
+        try:
+            yield
+        finally:
+            self._local.job = previous
+
+    def _current_job(self) -> Tuple[Optional[str], str]:
+        return getattr(self._local, "job", None) or self._active_job
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    @contextmanager
+    def span(self, phase: str, job_key: str | None = None, apply_url: str | None = None, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time the enclosed block as `phase`. Yields a dict whose items are added to the span
+        record (e.g. `span["ok"] = False`). Exceptions mark the span failed and propagate.
+        """
+        extra: Dict[str, Any] = dict(attrs)
+        start_wall = time.time()
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield extra
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            current_key, current_host = self._current_job()
+            self.record(
+                phase,
+                time.perf_counter() - start,
+                job_key=job_key or current_key,
+                host=get_hostname(apply_url) if apply_url else current_host,
+                ok=extra.pop("ok", ok),
+                started_at=start_wall,
+                **extra
+            )
+
+    def instrument(self, phase: str) -> Callable:
+        """
+        Decorator form of `span()`. A `False` / `success=False` return marks the span failed.
+        """
+        def decorator(fn: Callable) -> Callable:
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(phase) as span:
+                    result = fn(*args, **kwargs)
+                    success = getattr(result, "success", result)
+                    span["ok"] = success if isinstance(success, bool) else True
+                    return result
+            return wrapper
+        return decorator
+
+    def record(self, phase: str, seconds: float, job_key: str | None = None, host: str = "", ok: bool = True, started_at: float | None = None, **attrs: Any) -> None:
+        with self._lock:
+            if phase not in self._phase_buckets:
+                self._phase_buckets[phase] = [0] * (len(PHASE_BUCKETS) + 1)
+                self._phase_sum[phase] = 0.0
+                self._phase_count[phase] = 0
+                self._phase_errors[phase] = 0
+                self._phase_samples[phase] = deque(maxlen=QUANTILE_WINDOW)
+            self._phase_buckets[phase][bisect_left(PHASE_BUCKETS, seconds)] += 1
+            self._phase_sum[phase] += seconds
+            self._phase_count[phase] += 1
+            self._phase_samples[phase].append(seconds)
+            if not ok:
+                self._phase_errors[phase] += 1
+
+        self._append_span({
+            "ts": started_at if started_at is not None else time.time() - seconds,
+            "phase": phase,
+            "seconds": round(seconds, 4),
+            "job_key": job_key,
+            "host": host or None,
+            "ok": ok,
+            **attrs,
+        })
+
+    def increment(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record_job_completed(self, outcome: str, job_key: str | None = None, apply_url: str | None = None, seconds: float | None = None) -> None:
+        """
+        Count one finished job (any outcome, timeouts included) toward totals and jobs/hour.
+        """
+        now = time.time()
+        self.increment("jobs_completed_total", outcome=outcome)
+        with self._lock:
+            self._completions.append(now)
+            self._trim_completions(now)
+        if seconds is not None:
+            self.record("job_total", seconds, job_key=job_key, host=get_hostname(apply_url), ok=outcome == "applied", outcome=outcome)
+
+    def _trim_completions(self, now: float) -> None:
+        while self._completions and self._completions[0] < now - THROUGHPUT_WINDOW:
+            self._completions.popleft()
+
+    def _rotate_spans(self) -> None:
+        """
+        job_spans.jsonl → .1 → .2 … → .N (dropped). Caller holds `_file_lock`.
+        """
+        for idx in range(self.spans_backup_count, 0, -1):
+            source = self.spans_path if idx == 1 else self.spans_path.with_name(f"{self.spans_path.name}.{idx - 1}")
+            if source.exists():
+                os.replace(source, self.spans_path.with_name(f"{self.spans_path.name}.{idx}"))
+        if not self.spans_backup_count:
+            self.spans_path.unlink(missing_ok=True)
+        self._spans_size = 0
+
+    def _append_span(self, record: Dict[str, Any]) -> None:
+        try:
+            line = (json.dumps(record, default=str) + "\n").encode("utf-8")
+            with self._file_lock:
+                if not self._spans_dir_ready:
+                    self.spans_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._spans_dir_ready = True
+                if self._spans_size is None:
+                    self._spans_size = self.spans_path.stat().st_size if self.spans_path.exists() else 0
+                if self.spans_max_bytes and self._spans_size and self._spans_size + len(line) > self.spans_max_bytes:
+                    self._rotate_spans()
+                with open(self.spans_path, "ab") as f:
+                    f.write(line)
+                self._spans_size += len(line)
+        except Exception as e:
+            print(f"⚠️ Failed to append span: {e}")
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    @staticmethod
+    def _quantile(samples: List[float], q: float) -> Optional[float]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def jobs_per_hour(self) -> float:
+        with self._lock:
+            self._trim_completions(time.time())
+            return float(len(self._completions)) * 3600 / THROUGHPUT_WINDOW
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        { phases: { phase: { count, errors, sum_seconds, p50_seconds, p95_seconds } }, counters, jobs_per_hour }
+        """
+        with self._lock:
+            phases = {
+                phase: {
+                    "count": self._phase_count[phase],
+                    "errors": self._phase_errors[phase],
+                    "sum_seconds": round(self._phase_sum[phase], 3),
+                    **{f"p{int(q * 100)}_seconds": self._quantile(list(self._phase_samples[phase]), q) for q in QUANTILES},
+                }
+                for phase in self._phase_buckets
+            }
+            counters = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in self._counters.items()]
+        return {"phases": phases, "counters": counters, "jobs_per_hour": self.jobs_per_hour()}
+
+    @staticmethod
+    def _labels(**labels: Any) -> str:
+        escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels.items())
+        return "{" + ",".join(escaped) + "}"
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            phases = {
+                phase: (list(self._phase_buckets[phase]), self._phase_sum[phase], self._phase_count[phase], self._phase_errors[phase], list(self._phase_samples[phase]))
+                for phase in self._phase_buckets
+            }
+            counters = dict(self._counters)
+
+        lines: List[str] = [
+            "# HELP job_phase_duration_seconds Time spent per job phase.",
+            "# TYPE job_phase_duration_seconds histogram",
+        ]
+        for phase, (buckets, total, count, _, _) in phases.items():
+            running = 0
+            for bound, bucket_count in zip(PHASE_BUCKETS + [float("inf")], buckets):
+                running += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"job_phase_duration_seconds_bucket{self._labels(phase=phase, le=le)} {running}")
+            lines.append(f"job_phase_duration_seconds_sum{self._labels(phase=phase)} {total:.6f}")
+            lines.append(f"job_phase_duration_seconds_count{self._labels(phase=phase)} {count}")
+
+        lines += [
+            "# HELP job_phase_quantile_seconds Recent per-phase quantiles (last samples window).",
+            "# TYPE job_phase_quantile_seconds gauge",
+        ]
+        for phase, (_, _, _, _, samples) in phases.items():
+            for q in QUANTILES:
+                value = self._quantile(samples, q)
+                if value is not None:
+                    lines.append(f"job_phase_quantile_seconds{self._labels(phase=phase, quantile=f'{q:g}')} {value:.6f}")
+
+        lines += [
+            "# HELP job_phase_errors_total Phases that raised or reported failure.",
+            "# TYPE job_phase_errors_total counter",
+        ]
+        for phase, (_, _, _, errors, _) in phases.items():
+            lines.append(f"job_phase_errors_total{self._labels(phase=phase)} {errors}")
+
+        counter_names = sorted({name for name, _ in counters})
+        for name in counter_names:
+            lines.append(f"# TYPE {name} counter")
+            for (counter_name, labels), value in counters.items():
+                if counter_name == name:
+                    lines.append(f"{name}{self._labels(**dict(labels)) if labels else ''} {value:g}")
+
+        lines += [
+            "# HELP jobs_per_hour Jobs finished over the last hour.",
+            "# TYPE jobs_per_hour gauge",
+            f"jobs_per_hour {self.jobs_per_hour():g}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
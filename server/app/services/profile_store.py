@@ -0,0 +1,159 @@
+# server\app\services\profile_store.py
+# -----------------------------
+# Imports
+# -----------------------------
+from config.env_config import USER_DATA_FILE
+from app.services.question_resolver.utils import delete_nested_key
+from app.services.question_resolver.prompts.prompt_store import get_user_context_prompt
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+import threading
+import hashlib
+import json
+import os
+
+
+# -----------------------------
+# Config
+# -----------------------------
+# Keys never shown to the question-resolver LLM
+DROP_PATHS = [
+    "password",
+    "secondaryPassword",
+    "profile_html_card",
+    "addresses",
+    "primaryAddressContainerIdx",
+    "llmAddressSelectionEnabled",
+    "resumes",
+    "primaryResumeContainerIdx",
+    "llmResumeSelectionEnabled",
+    "enabledUserSkillsSelection",
+    "enabledJobSkillsSelection",
+    "enabledRelatedSkillsSelection",
+    "useSalaryRange",
+]
+
+
+def build_inline_address(address: Dict) -> str:
+    return "• " + ", ".join(
+        filter(None, [
+            address.get("addressLine1", ""),
+            address.get("addressLine2", ""),
+            address.get("city", ""),
+            address.get("state", ""),
+            address.get("postalCode", ""),
+            address.get("country", "")
+        ])
+    )
+
+
+def _hash_json(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")).hexdigest()
+
+
+@dataclass(eq=False)
+class ProfileSnapshot:
+    """
+    One parsed version of `userData.json` plus artifacts derived from it, each
+    computed on first access and kept until the file changes.
+
+    Shared by every caller — treat all of it as read-only.
+    """
+    raw: Dict[str, Any]
+    digest: str                     # sha256 of the file bytes
+
+    @cached_property
+    def user_db(self) -> Dict[str, Any]:
+        """
+        Profile as shown to the question resolver (`DROP_PATHS` removed).
+        """
+        stripped = json.loads(json.dumps(self.raw))
+        for path in DROP_PATHS:
+            delete_nested_key(stripped, path)
+        return stripped
+
+    @cached_property
+    def user_db_fingerprint(self) -> str:
+        return _hash_json(self.user_db)
+
+    @cached_property
+    def context_prompt(self) -> str:
+        return get_user_context_prompt(self.user_db)
+
+    @property
+    def addresses(self) -> List[Dict[str, Any]]:
+        return self.raw.get("addresses", [])
+
+    @cached_property
+    def address_lines(self) -> List[str]:
+        return [build_inline_address(address) for address in self.addresses]
+
+    @property
+    def resumes(self) -> List[Dict[str, Any]]:
+        return self.raw.get("resumes", [])
+
+    @cached_property
+    def resume_categories(self) -> FrozenSet[str]:
+        return frozenset(resume["resumeCategory"] for resume in self.resumes)
+
+    @cached_property
+    def resume_regions(self) -> Dict[str, FrozenSet[str]]:
+        """
+        resumeCategory → regions available for it.
+        """
+        regions: Dict[str, set] = {}
+        for resume in self.resumes:
+            regions.setdefault(resume["resumeCategory"], set()).add(resume["resumeRegion"])
+        return {category: frozenset(values) for category, values in regions.items()}
+
+    @cached_property
+    def resumes_fingerprint(self) -> str:
+        return _hash_json(self.resumes)
+
+
+class ProfileStore:
+    """
+    Process-wide cache of the user profile.
+
+    `current()` stats the file on every call and re-reads it only when its
+    mtime / size changed; the content hash is then compared, so a touch without
+    an edit keeps the existing snapshot (and everything memoized on it).
+    """
+
+    def __init__(self, path: Path = USER_DATA_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._snapshot: Optional[ProfileSnapshot] = None
+        self.reloads = 0
+
+    def current(self) -> ProfileSnapshot:
+        stat = os.stat(self.path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            if self._snapshot is not None and stat_key == self._stat_key:
+                return self._snapshot
+
+            data = self.path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if self._snapshot is None or digest != self._snapshot.digest:
+                self._snapshot = ProfileSnapshot(raw=json.loads(data), digest=digest)
+                self.reloads += 1
+                print(f"👤 User profile loaded ({self.path.name}, {digest[:8]})")
+            self._stat_key = stat_key
+            return self._snapshot
+
+    def context_prompt_for(self, user_db: Dict[str, Any]) -> str:
+        """
+        Memoized context prompt when `user_db` is the current stripped DB, rendered otherwise.
+        """
+        snapshot = self.current()
+        if user_db is snapshot.user_db:
+            return snapshot.context_prompt
+        return get_user_context_prompt(user_db)
+
+
+profile_store = ProfileStore()
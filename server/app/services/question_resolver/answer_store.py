@@ -0,0 +1,188 @@
+# server\app\services\question_resolver\answer_store.py
+
+from config.env_config import APP_DATA_DIR
+from app.services.metrics import metrics
+from app.services.question_resolver.batch_planner import is_job_specific
+from typing import List, Dict, Any
+from pathlib import Path
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+
+# ============================================================
+# Config
+# ============================================================
+
+ANSWER_STORE_FILE = APP_DATA_DIR / "answer_store.sqlite3"
+ANSWER_TTL = 14 * 24 * 60 * 60          # Seconds a stored answer stays valid
+
+
+# ============================================================
+# Keys
+# ============================================================
+
+def _normalize_text(value: Any) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+def answer_key(question: Dict[str, Any]) -> str:
+    """
+    normalized labelText + type + sorted options
+    """
+    options = sorted(_normalize_text(opt) for opt in question.get("options") or [])
+    identity = [_normalize_text(question.get("labelText")), _normalize_text(question.get("type")), options]
+    return hashlib.sha256(json.dumps(identity).encode("utf-8")).hexdigest()
+
+def is_cacheable(question: Dict[str, Any]) -> bool:
+    """
+    Free-text answers are written for one job (`is_job_specific`); never reuse them across applications.
+    """
+    return bool(question.get("labelText")) and not is_job_specific(question)
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+# ============================================================
+# Answer Store
+# ============================================================
+
+class AnswerStore:
+    """
+    Persistent (SQLite) answers for recurring ATS questions, shared by every resolver
+    and every job.
+
+    Answers are keyed by `answer_key(question)` and only served while the user-DB
+    fingerprint they were produced under is still current and they are younger
+    than `ttl`. The first lookup under a new fingerprint (startup, profile edit)
+    purges every entry that can no longer be served. `invalidate()` drops entries
+    by label (substring) or all of them. Hits / misses are counted for the hit
+    rate (`stats()`, `/metrics`).
+    """
+
+    def __init__(self, path: Path = ANSWER_STORE_FILE, ttl: float = ANSWER_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._connection: sqlite3.Connection | None = None     # Opened on first use, see `_conn`
+        self._open_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._purged_for: str | None = None     # Fingerprint the store was last purged against
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Directory, file and schema are created on first use, not at import
+        conn = self._connection
+        if conn is None:
+            with self._open_lock:
+                conn = self._connection
+                if conn is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript("""
+                        CREATE TABLE IF NOT EXISTS answers (
+                            key TEXT PRIMARY KEY,
+                            label TEXT NOT NULL,
+                            type TEXT,
+                            user_db_fingerprint TEXT NOT NULL,
+                            answer TEXT NOT NULL,
+                            created_at REAL NOT NULL,
+                            last_used_at REAL NOT NULL,
+                            hits INTEGER NOT NULL DEFAULT 0
+                        );
+                    """)
+                    self._connection = conn
+        return conn
+
+    # ============================================================
+    # Read / Write
+    # ============================================================
+
+    def lookup(self, questions: List[Dict[str, Any]], fingerprint: str) -> Dict[int, Any]:
+        """
+        { index in `questions`: stored answer } for every cacheable question with a valid entry.
+        """
+        if fingerprint != self._purged_for:
+            removed = self.purge_stale(fingerprint)
+            if removed:
+                print(f"[Answer Store] 🧹 Purged {removed} stale answer(s)")
+        now = time.time()
+        candidates = [(idx, answer_key(q)) for idx, q in enumerate(questions) if is_cacheable(q)]
+        found: Dict[int, Any] = {}
+
+        with self._lock:
+            for idx, key in candidates:
+                row = self._conn.execute(
+                    "SELECT answer, created_at FROM answers WHERE key = ? AND user_db_fingerprint = ?",
+                    (key, fingerprint)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    found[idx] = json.loads(row[0])
+                    self._conn.execute("UPDATE answers SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self._hits += len(found)
+            self._misses += len(candidates) - len(found)
+
+        if found:
+            metrics.increment("answer_store_requests_total", len(found), outcome="hit")
+        if len(candidates) > len(found):
+            metrics.increment("answer_store_requests_total", len(candidates) - len(found), outcome="miss")
+        return found
+
+    def store(self, question: Dict[str, Any], answer: Any, fingerprint: str) -> None:
+        if answer is None or not is_cacheable(question):
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO answers (key, label, type, user_db_fingerprint, answer, created_at, last_used_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (answer_key(question), question.get("labelText", ""), question.get("type"), fingerprint, json.dumps(answer), now, now)
+            )
+
+    # ============================================================
+    # Invalidation
+    # ============================================================
+
+    def invalidate(self, label: str | None = None) -> int:
+        """
+        Drop answers whose label contains `label` (case-insensitive), or every answer.
+        """
+        with self._lock:
+            if label:
+                return self._conn.execute("DELETE FROM answers WHERE label LIKE ? ESCAPE '\\'", (f"%{_escape_like(label)}%",)).rowcount
+            return self._conn.execute("DELETE FROM answers").rowcount
+
+    def purge_stale(self, fingerprint: str) -> int:
+        """
+        Delete expired answers and answers produced under an older user DB.
+        """
+        with self._lock:
+            self._purged_for = fingerprint
+            return self._conn.execute(
+                "DELETE FROM answers WHERE user_db_fingerprint != ? OR created_at < ?",
+                (fingerprint, time.time() - self.ttl)
+            ).rowcount
+
+    # ============================================================
+    # Stats
+    # ============================================================
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            hits, misses = self._hits, self._misses
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "ttl_seconds": self.ttl,
+        }
+
+
+answer_store = AnswerStore()
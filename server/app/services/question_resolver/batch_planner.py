@@ -0,0 +1,143 @@
+# server\app\services\question_resolver\batch_planner.py
+
+from typing import List, Dict, Optional, Any, Tuple
+from dataclasses import dataclass, field
+import hashlib
+import json
+import re
+
+# ============================================================
+# Config
+# ============================================================
+
+# Free-text answers are tailored to each job, so they are never shared across jobs.
+JOB_SPECIFIC_TYPES = {"textarea"}
+
+# Single-line free text ("Why this role?", "Relevant project") is treated the same,
+# unless its label asks for a plain profile fact (see `PROFILE_SCALAR_LABEL`).
+FREE_TEXT_TYPES = {"text", "search"}
+
+_LABEL_FILLER = {"your", "please", "enter", "provide", "what", "is", "the", "s"}
+PROFILE_SCALAR_LABEL = re.compile(r"""
+    ((legal|preferred|full|first|last|middle|family|given)\s)?name
+  | e-?mail(\saddress)?
+  | ((mobile|cell|home)\s)?phone(\snumber)?
+  | ((street|mailing|home)\s)?address(\sline\s\d)?
+  | city | state | province | country | zip(\scode)? | postal\scode | (current\s)?location
+  | (linkedin|github|twitter)(\sprofile)?(\surl)?
+  | (personal\s)?website(\surl)? | portfolio(\surl)?
+  | pronouns?
+  | ((current|most\srecent)\s)?(company|employer)(\sname)?
+  | ((current|most\srecent)\s)?(job\s)?title
+  | school(\sname)? | university | degree | major | discipline | field\sof\sstudy | gpa | graduation\s(date|year)
+""", re.X)
+
+
+# ============================================================
+# Question Fingerprint
+# ============================================================
+
+def _normalize_text(value: Any) -> str:
+    return " ".join(str(value or "").split()).casefold()
+
+def is_profile_scalar_label(label: Any) -> bool:
+    """
+    "First Name *", "Your LinkedIn profile URL:" → True; "Why do you want to join our company?" → False.
+    """
+    words = [word for word in re.sub(r"[^a-z0-9-]+", " ", _normalize_text(label)).split() if word not in _LABEL_FILLER]
+    return bool(words) and PROFILE_SCALAR_LABEL.fullmatch(" ".join(words)) is not None
+
+def is_job_specific(question: Dict[str, Any]) -> bool:
+    """
+    True when the answer may depend on the job: textareas, and single-line free
+    text whose label is not on the profile-scalar allowlist.
+    """
+    question_type = question.get("type")
+    if question_type in JOB_SPECIFIC_TYPES:
+        return True
+    return question_type in FREE_TEXT_TYPES and not is_profile_scalar_label(question.get("labelText"))
+
+def question_fingerprint(question: Dict[str, Any]) -> str:
+    """
+    Identity of a question independent of the page it came from:
+    normalized label + type + sorted options + hints + relevant DB keys.
+    """
+    options = question.get("options") or []
+    option_labels = sorted(
+        _normalize_text(opt.get("label", opt.get("value")) if isinstance(opt, dict) else opt)
+        for opt in options
+    )
+    identity = {
+        "label": _normalize_text(question.get("labelText")),
+        "type": _normalize_text(question.get("type")),
+        "options": option_labels,
+        "hints": sorted(_normalize_text(h) for h in question.get("hints") or []),
+        "dbKeys": sorted(question.get("relevantDBKeys") or []),
+    }
+    return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# Batch Plan
+# ============================================================
+
+@dataclass
+class BatchPlan:
+    """
+    groups[i]      → (job_details, questions) as submitted
+    segments[i]    → unique questions job `i` asks the LLM (its system prompt precedes them)
+    assignments[i] → per submitted question of job `i`, the unique-question key answering it
+    """
+    groups: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]
+    segments: List[List[Tuple[str, Dict[str, Any]]]] = field(default_factory=list)
+    assignments: List[List[str]] = field(default_factory=list)
+
+    @property
+    def unique_count(self) -> int:
+        return sum(len(segment) for segment in self.segments)
+
+    @property
+    def total_count(self) -> int:
+        return sum(len(questions) for _, questions in self.groups)
+
+def plan_question_batch(groups: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> BatchPlan:
+    """
+    Deduplicate questions across jobs. A job-agnostic question (see `is_job_specific`)
+    is asked once, under the first job that has it; every later job reuses that answer.
+    """
+    plan = BatchPlan(groups=groups)
+    owner: Dict[str, int] = {}
+
+    for group_idx, (_, questions) in enumerate(groups):
+        segment: List[Tuple[str, Dict[str, Any]]] = []
+        assignment: List[str] = []
+
+        for question in questions:
+            if is_job_specific(question):
+                key = f"{group_idx}:{question['questionId']}"
+            else:
+                key = question_fingerprint(question)
+
+            if key not in owner:
+                owner[key] = group_idx
+                segment.append((key, question))
+            assignment.append(key)
+
+        plan.segments.append(segment)
+        plan.assignments.append(assignment)
+
+    print(f"[Question Resolver - Batch] 🧮 Planned {len(groups)} job(s): {plan.unique_count} unique / {plan.total_count} question(s)")
+    return plan
+
+def expand_batch_results(plan: BatchPlan, answers: Dict[str, Any], sources: Optional[Dict[str, str]] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Per-job results in submission order: [[{questionId, response, resolvedBy}, ...], ...]
+    """
+    sources = sources or {}
+    return [
+        [
+            {"questionId": question["questionId"], "response": answers.get(key), "resolvedBy": sources.get(key)}
+            for question, key in zip(questions, plan.assignments[group_idx])
+        ]
+        for group_idx, (_, questions) in enumerate(plan.groups)
+    ]
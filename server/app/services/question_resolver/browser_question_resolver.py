@@ -1,20 +1,30 @@
 # server\app\services\question_resolver\browser_question_resolver.py
 
 from app.services.shared import automation_controller
-from config.env_config import USE_TOR
+from config.env_config import USE_TOR, PACKED_QUESTION_PROMPTS, PACK_TOKEN_BUDGET, COMPACT_CONTEXT_PROMPT
 from app.services.question_resolver.prompts.prompt_store import (
     # Base Prompts
     get_system_prompt, 
-    get_user_context_prompt,
     # Question Type Specific Prompts
-    get_question_prompt
+    get_question_prompt,
+    # Packed Prompts
+    plan_question_packs,
+    build_packed_question_prompt
 )
 from app.services.question_resolver.utils import (
     extract_db_snippets, 
-    get_user_db, 
-    get_parsed_response
+    get_parsed_response,
+    get_packed_parsed_response
 )
-from typing import List, Dict, Optional, Any
+from app.services.profile_store import profile_store
+from app.services.question_resolver.context_compactor import get_context_prompt
+from app.services.question_resolver.rules import resolve_fast_paths, record_answer
+from app.services.question_resolver.batch_planner import (
+    BatchPlan,
+    plan_question_batch,
+    expand_batch_results
+)
+from typing import List, Dict, Optional, Any, Tuple
 import json
 import time
 
@@ -22,7 +32,7 @@ import time
 # Prompt Chain Builder
 # ============================================================
 
-def build_prompt_chain( user_db: Dict[str, Any], job_details: Dict[str, Any], questions: List[Dict[str, Any]], add_system_prompt: bool = True, add_context_prompt: bool = True ) -> List[Dict[str, Any]]:
+def build_prompt_chain( user_db: Dict[str, Any], job_details: Dict[str, Any], questions: List[Dict[str, Any]], add_system_prompt: bool = True, add_context_prompt: bool = True, compact_context: bool = COMPACT_CONTEXT_PROMPT ) -> List[Dict[str, Any]]:
 
     prompts = []
 
@@ -32,7 +42,7 @@ def build_prompt_chain( user_db: Dict[str, Any], job_details: Dict[str, Any], qu
 
     # 2️⃣ Context Prompt — User DB
     if add_context_prompt:
-        prompts.append({ "prompt": get_user_context_prompt(user_db), "copy": False, "timeout": 60 })
+        prompts.append({ "prompt": get_context_prompt(user_db, job_details, compact_context), "copy": False, "timeout": 60 })
 
     # 3️⃣ Question Prompts
     for question in questions:
@@ -45,12 +55,80 @@ def build_prompt_chain( user_db: Dict[str, Any], job_details: Dict[str, Any], qu
 
     return prompts
 
+def build_packed_prompt_chain( user_db: Dict[str, Any], job_details: Dict[str, Any], questions: List[Dict[str, Any]], add_system_prompt: bool = True, add_context_prompt: bool = True, token_budget: int = PACK_TOKEN_BUDGET, compact_context: bool = COMPACT_CONTEXT_PROMPT ) -> Tuple[List[Dict[str, Any]], List[List[int]]]:
+    """
+    Like `build_prompt_chain`, but questions are packed into token-sized prompts that each
+    return one { questionId: value } object. Returns (prompts, packs) where packs[i] holds
+    the indices (into `questions`) answered by the i-th copied response.
+    """
+
+    prompts = []
+
+    # 1️⃣ System Prompt — Job Context
+    if add_system_prompt:
+        prompts.append({ "prompt": get_system_prompt(job_details), "copy": False, "timeout": 60 })
+
+    # 2️⃣ Context Prompt — User DB
+    if add_context_prompt:
+        prompts.append({ "prompt": get_context_prompt(user_db, job_details, compact_context), "copy": False, "timeout": 60 })
+
+    # 3️⃣ Packed Question Prompts
+    db_snippets = []
+    for question in questions:
+        try:
+            db_snippets.append(extract_db_snippets( user_db, question.get("relevantDBKeys", []) ))
+        except:
+            db_snippets.append({})
+
+    packs = plan_question_packs(questions, db_snippets, token_budget)
+    for pack in packs:
+        prompt, _ = build_packed_question_prompt([questions[i] for i in pack], [db_snippets[i] for i in pack], supports_schema=False)
+        prompts.append({ "prompt": prompt, "copy": True, "remove_unicode_punctuation": True, "timeout": 30 + 10 * len(pack) })
+
+    return prompts, packs
+
+def build_batch_prompt_chain( user_db: Dict[str, Any], plan: BatchPlan, segments: List[List[Tuple[str, Dict[str, Any]]]], add_context_prompt: bool = True, compact_context: bool = COMPACT_CONTEXT_PROMPT ) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    One chain for many jobs: each job's system prompt is swapped in right before its
+    questions, and the user DB context prompt is sent once (after the first system prompt).
+    Returns (prompts, keys) where keys[i] is the unique-question key of the i-th copied response.
+    """
+
+    prompts = []
+    keys = []
+
+    for group_idx, segment in enumerate(segments):
+        if not segment:
+            continue
+
+        # 1️⃣ System Prompt — this job's context
+        job_details = plan.groups[group_idx][0]
+        prompts.append({ "prompt": get_system_prompt(job_details), "copy": False, "timeout": 60 })
+
+        # 2️⃣ Context Prompt — User DB (shared by every job)
+        if add_context_prompt:
+            # Shared by every job in the batch → ranked against all of them
+            prompts.append({ "prompt": get_context_prompt(user_db, [job for job, _ in plan.groups], compact_context), "copy": False, "timeout": 60 })
+            add_context_prompt = False
+
+        # 3️⃣ Question Prompts
+        for key, question in segment:
+            try:
+                db_snippets = extract_db_snippets( user_db, question.get("relevantDBKeys", []) )
+            except:
+                db_snippets = {}
+
+            prompts.append({ "prompt": get_question_prompt(question, db_snippets, supports_schema=False)[0], "copy": True, "remove_unicode_punctuation": True, "timeout": 30 })
+            keys.append(key)
+
+    return prompts, keys
+
 
 # ============================================================
 # Question Resolver (MAIN)
 # ============================================================
 
-def resolve_questions(questions: List[Dict[str, Any]], job_details: Dict[str, str | List[str] | None], max_retries: int = 2 ) -> List[Optional[Dict[str, Any]]]:
+def resolve_questions(questions: List[Dict[str, Any]], job_details: Dict[str, str | List[str] | None], max_retries: int = 2, packed: bool = PACKED_QUESTION_PROMPTS, compact_context: bool = COMPACT_CONTEXT_PROMPT ) -> List[Optional[Dict[str, Any]]]:
 
     '''
 
@@ -72,10 +150,20 @@ def resolve_questions(questions: List[Dict[str, Any]], job_details: Dict[str, st
     '''
     print("\n[Question Resolver - Browser] 🚀 Starting LLM Question Resolution")
 
-    user_db: Dict[str, Any] = get_user_db()
+    profile = profile_store.current()
+    user_db: Dict[str, Any] = profile.user_db
 
     # Initialize final results as a list of dicts with questionId keys
-    final_results: List[Dict[str, Any]] = [{"questionId": q["questionId"], "response": None} for q in questions]
+    final_results: List[Dict[str, Any]] = [{"questionId": q["questionId"], "response": None, "resolvedBy": None} for q in questions]
+
+    # Fast paths (DB rules, answer store) — no LLM round-trip
+    fingerprint = profile.user_db_fingerprint
+    fast = resolve_fast_paths(questions, user_db, fingerprint)
+    for idx, (resolved_by, value) in fast.items():
+        final_results[idx].update(response=value, resolvedBy=resolved_by)
+    if len(fast) == len(questions):
+        print(f"[Question Resolver - Browser] 💡 Returning Answers: {len(questions)} resolved / {len(questions)}\n")
+        return final_results
 
     base_prompts_required = False if (
         automation_controller.chatgpt.is_session_already_open 
@@ -88,7 +176,7 @@ def resolve_questions(questions: List[Dict[str, Any]], job_details: Dict[str, st
         return final_results
 
     # Track unresolved questions
-    remaining = list(enumerate(questions))
+    remaining = [(idx, q) for idx, q in enumerate(questions) if idx not in fast]
     attempt = 0
     while remaining and attempt <= max_retries:
         attempt += 1
@@ -111,13 +199,26 @@ def resolve_questions(questions: List[Dict[str, Any]], job_details: Dict[str, st
         # Build Prompt Chain
         # ============================================================
 
-        prompts = build_prompt_chain( 
-            user_db = user_db, 
-            job_details = job_details, 
-            questions = list(retry_questions),
-            add_system_prompt = True if base_prompts_required else False,
-            add_context_prompt = True if base_prompts_required else False
-        )
+        if packed:
+            prompts, packs = build_packed_prompt_chain( 
+                user_db = user_db, 
+                job_details = job_details, 
+                questions = list(retry_questions),
+                add_system_prompt = True if base_prompts_required else False,
+                add_context_prompt = True if base_prompts_required else False,
+                compact_context = compact_context
+            )
+            print(f"[Question Resolver - Browser] 📦 Packed {len(retry_questions)} question(s) into {len(packs)} prompt(s)")
+        else:
+            prompts = build_prompt_chain( 
+                user_db = user_db, 
+                job_details = job_details, 
+                questions = list(retry_questions),
+                add_system_prompt = True if base_prompts_required else False,
+                add_context_prompt = True if base_prompts_required else False,
+                compact_context = compact_context
+            )
+            packs = [[i] for i in range(len(retry_questions))]
         
 
         # ============================================================
@@ -153,22 +254,49 @@ def resolve_questions(questions: List[Dict[str, Any]], job_details: Dict[str, st
         payload = response.payload  # contains only copied prompts
 
         # ---------- SAFETY CHECK ----------
-        if len(payload) != len(indices):
-            print(f"[Question Resolver - Browser] ⚠️ Payload length mismatch: expected {len(indices)}, got {len(payload)}")
+        if len(payload) != len(packs):
+            print(f"[Question Resolver - Browser] ⚠️ Payload length mismatch: expected {len(packs)}, got {len(payload)}")
             time.sleep(1)
             continue
 
         new_remaining = []
 
         # Parse each response
-        for idx, raw in zip(indices, payload):
+        for pack, raw in zip(packs, payload):
+            pack_indices = [indices[i] for i in pack]
+
+            if not packed:
+                idx = pack_indices[0]
+                try:
+                    # Set value
+                    final_results[idx]["response"] = get_parsed_response(raw)
+                    final_results[idx]["resolvedBy"] = "llm"
+                    record_answer(questions[idx], final_results[idx]["response"], fingerprint)
+                except Exception as e:
+                    print(f"[Question Resolver - Browser] ❌ Parsing failed for questionId {questions[idx]["questionId"]}: {e}")
+                    print(f"[Question Resolver - Browser] Raw response: {raw}") # optional, useful for debugging/retrying
+                    new_remaining.append((idx, questions[idx]))   # retry only failed questions
+                continue
+
+            # Packed → keep whatever ids parsed, re-ask only the missing ones
             try:
-                # Set value
-                final_results[idx]["response"] = get_parsed_response(raw)
+                values = get_packed_parsed_response(raw, [str(questions[idx]["questionId"]) for idx in pack_indices])
             except Exception as e:
-                print(f"[Question Resolver - Browser] ❌ Parsing failed for questionId {questions[idx]["questionId"]}: {e}")
-                print(f"[Question Resolver - Browser] Raw response: {raw}") # optional, useful for debugging/retrying
-                new_remaining.append((idx, questions[idx]))   # retry only failed questions
+                print(f"[Question Resolver - Browser] ❌ Parsing failed for packed response: {e}")
+                values = {}
+
+            for idx in pack_indices:
+                question_id = str(questions[idx]["questionId"])
+                if question_id in values:
+                    final_results[idx]["response"] = values[question_id]
+                    final_results[idx]["resolvedBy"] = "llm"
+                    record_answer(questions[idx], values[question_id], fingerprint)
+                else:
+                    new_remaining.append((idx, questions[idx]))
+
+            if len(values) < len(pack_indices):
+                print(f"[Question Resolver - Browser] ⚠️ Packed response missing {len(pack_indices) - len(values)} / {len(pack_indices)} answer(s)")
+                print(f"[Question Resolver - Browser] Raw response: {raw}")
 
         remaining = new_remaining
 
@@ -188,6 +316,95 @@ def resolve_questions(questions: List[Dict[str, Any]], job_details: Dict[str, st
 
 
 
+# ============================================================
+# Batch Question Resolver (many jobs, one session)
+# ============================================================
+
+def resolve_questions_batch(groups: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]], max_retries: int = 2, compact_context: bool = COMPACT_CONTEXT_PROMPT) -> List[List[Optional[Dict[str, Any]]]]:
+    """
+    groups --> List[(job_details, List[QuestionDict])]
+    Returns per-job results in the same order: [[{questionId, response}, ...], ...]
+    """
+    print(f"\n[Question Resolver - Browser] 🚀 Starting Batch LLM Question Resolution ({len(groups)} job(s))")
+
+    profile = profile_store.current()
+    user_db: Dict[str, Any] = profile.user_db
+    plan = plan_question_batch(groups)
+    answers: Dict[str, Any] = {}
+    sources: Dict[str, str] = {}
+    question_by_key = {key: question for segment in plan.segments for key, question in segment}
+
+    # Fast paths (DB rules, answer store) — no LLM round-trip
+    fingerprint = profile.user_db_fingerprint
+    remaining = []
+    for segment in plan.segments:
+        fast = resolve_fast_paths([question for _, question in segment], user_db, fingerprint)
+        for pos, (resolved_by, value) in fast.items():
+            answers[segment[pos][0]] = value
+            sources[segment[pos][0]] = resolved_by
+        remaining.append([item for pos, item in enumerate(segment) if pos not in fast])
+    if not any(remaining):
+        return expand_batch_results(plan, answers, sources)
+
+    if not automation_controller.open_llm_session('resolve-questions-batch'):
+        print("[Question Resolver - Browser] ⚠️ Error Opening LLM Session")
+        return expand_batch_results(plan, answers, sources)
+    add_context_prompt = True
+    attempt = 0
+    while any(remaining) and attempt <= max_retries:
+        attempt += 1
+        pending = sum(len(segment) for segment in remaining)
+        print(f"[Question Resolver - Browser] 🔁 Batch attempt {attempt} — resolving {pending} unique question(s)")
+
+        prompts, keys = build_batch_prompt_chain(user_db, plan, remaining, add_context_prompt=add_context_prompt, compact_context=compact_context)
+
+        response = automation_controller.chatgpt.promptChain(
+            prompts,
+            search_tor = USE_TOR,
+            search_incognito = True,
+            leave_session_opened = True,
+            enable_clipboard_permission_check = True if (
+                not automation_controller.chatgpt.is_session_already_open
+                or automation_controller.chatgpt.reset_occured
+            ) else False,
+            allow_retry = False
+        )
+
+        # Context prompt is already in the conversation unless the chat was reset
+        add_context_prompt = bool(automation_controller.chatgpt.reset_occured)
+
+        if not response.success:
+            print("[Question Resolver - Browser] ⚠️ promptChain failed — retrying remaining questions")
+            add_context_prompt = True
+            time.sleep(1)
+            continue
+
+        payload = response.payload
+        if len(payload) != len(keys):
+            print(f"[Question Resolver - Browser] ⚠️ Payload length mismatch: expected {len(keys)}, got {len(payload)}")
+            time.sleep(1)
+            continue
+
+        failed = set()
+        for key, raw in zip(keys, payload):
+            try:
+                answers[key] = get_parsed_response(raw)
+                sources[key] = "llm"
+                record_answer(question_by_key[key], answers[key], fingerprint)
+            except Exception as e:
+                print(f"[Question Resolver - Browser] ❌ Parsing failed for {key[:12]}: {e}")
+                failed.add(key)
+
+        # Retry only failed questions (each still under its own job's system prompt)
+        remaining = [[(key, q) for key, q in segment if key in failed] for segment in remaining]
+        if failed:
+            time.sleep(1)
+
+    unresolved = sum(len(segment) for segment in remaining)
+    print(f"[Question Resolver - Browser] 💡 Returning Batch Answers: {plan.unique_count - unresolved} resolved / {plan.unique_count} unique ({plan.total_count} total)\n")
+    return expand_batch_results(plan, answers, sources)
+
+
 if __name__ == "__main__":
 
     # ============================================================
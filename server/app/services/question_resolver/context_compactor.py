@@ -0,0 +1,217 @@
+# server\app\services\question_resolver\context_compactor.py
+
+from config.env_config import COMPACT_CONTEXT_PROMPT, CONTEXT_TOKEN_BUDGET
+from app.services.question_resolver.prompts.prompt_store import compact_json, estimate_tokens, CHARS_PER_TOKEN, job_details_digest, get_user_context_prompt
+from app.services.question_resolver.semantic_index import tokenize
+from app.services.profile_store import profile_store
+from app.services.metrics import metrics
+from typing import List, Dict, Any, Tuple
+from collections import OrderedDict, Counter
+from dataclasses import dataclass
+import threading
+import hashlib
+import json
+import math
+
+# ============================================================
+# Config
+# ============================================================
+
+LONG_TEXT_CHARS = 240                   # Strings longer than this may be truncated
+TRUNCATED_TEXT_CHARS = 160              # Length a low-relevance long string is cut down to
+CONTEXT_CACHE_SIZE = 32                 # Compacted prompts kept (one per profile × job × budget, LRU)
+
+_CONTEXT_HEADER = """You are now given the user profile database (compacted: low-relevance long text may be shortened, marked with "…").
+This database is the PRIMARY source of truth.
+
+User Profile Database:
+"""
+
+_CONTEXT_FOOTER = """
+
+END OF CONTEXT PROMPT — Keep this information (available user context) in mind along with system instructions for reference and future usage. Currently, do not respond to this."""
+
+
+@dataclass(frozen=True)
+class CompactContext:
+    prompt: str
+    original_tokens: int                # `get_user_context_prompt` (indented JSON, full text)
+    tokens: int
+    truncated: Tuple[str, ...]          # Paths of shortened strings, least relevant first
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.tokens)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "originalTokens": self.original_tokens,
+            "tokens": self.tokens,
+            "tokensSaved": self.tokens_saved,
+            "truncated": list(self.truncated),
+        }
+
+
+# ============================================================
+# Relevance (TF-IDF overlap with the job)
+# ============================================================
+
+def _job_text(job_details: Dict[str, Any] | List[Dict[str, Any]]) -> str:
+    jobs = job_details if isinstance(job_details, list) else [job_details]
+    return " ".join(str(value) for job in jobs for value in (job or {}).values() if value)
+
+def _long_strings(obj: Any, path: str = "", section: str = "") -> List[Tuple[str, str, Any, Any]]:
+    """
+    (path, section label, container, key) for every long string. The section label
+    (dict key / entry title) is scored together with the text it holds.
+    """
+    found = []
+    items = obj.items() if isinstance(obj, dict) else enumerate(obj) if isinstance(obj, list) else []
+    for key, value in items:
+        child_path = f"{path}.{key}" if isinstance(obj, dict) else f"{path}[{key}]"
+        if isinstance(value, str):
+            if len(value) > LONG_TEXT_CHARS:
+                found.append((child_path.lstrip("."), section, obj, key))
+        else:
+            label = section
+            if isinstance(value, dict):
+                label = " ".join([section, str(key) if isinstance(obj, dict) else "",
+                                  *(str(value[field]) for field in ("jobTitle", "company", "title", "name") if isinstance(value.get(field), str))])
+            found.extend(_long_strings(value, child_path, label))
+    return found
+
+def score_texts(texts: List[str], job_text: str) -> List[float]:
+    """
+    Cosine of sublinear TF-IDF vectors (IDF over `texts`) against the job text.
+    """
+    job_terms = Counter(tokenize(job_text))
+    docs = [Counter(tokenize(text)) for text in texts]
+
+    df = Counter(term for doc in docs for term in doc)
+    idf = {term: math.log((1 + len(docs)) / (1 + count)) + 1.0 for term, count in df.items()}
+
+    def weights(terms: Counter) -> Dict[str, float]:
+        return {term: (1.0 + math.log(count)) * idf.get(term, 1.0) for term, count in terms.items()}
+
+    job_weights = weights(job_terms)
+    job_norm = math.sqrt(sum(w * w for w in job_weights.values())) or 1.0
+
+    scores = []
+    for doc in docs:
+        doc_weights = weights(doc)
+        norm = math.sqrt(sum(w * w for w in doc_weights.values())) or 1.0
+        dot = sum(w * job_weights[term] for term, w in doc_weights.items() if term in job_weights)
+        scores.append(dot / (norm * job_norm))
+    return scores
+
+
+# ============================================================
+# Compaction
+# ============================================================
+
+def _truncate(text: str, limit: int) -> str:
+    cut = text[:limit].rsplit(" ", 1)[0].rstrip(" ,;:.-–—|")
+    return f"{cut}…"
+
+def compact_user_context(
+    user_db: Dict[str, Any],
+    job_details: Dict[str, Any] | List[Dict[str, Any]],
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> CompactContext:
+    """
+    Minified profile JSON within `token_budget` (estimated): long strings are
+    shortened least-relevant-to-the-job first until the prompt fits. Every key and
+    short value is kept — a profile whose fields alone exceed the budget is
+    returned minified but over budget.
+
+    `job_details` may be a list (one context prompt shared by several jobs).
+    """
+    original_tokens = estimate_tokens(get_user_context_prompt(user_db))
+
+    compacted = json.loads(json.dumps(user_db))
+    overhead = len(_CONTEXT_HEADER) + len(_CONTEXT_FOOTER)
+    chars = overhead + len(compact_json(compacted))
+    budget_chars = token_budget * CHARS_PER_TOKEN if token_budget else None
+
+    truncated: List[str] = []
+    if budget_chars is not None and chars > budget_chars:
+        candidates = _long_strings(compacted)
+        scores = score_texts([f"{section} {container[key]}" for _, section, container, key in candidates], _job_text(job_details))
+
+        # Least relevant first; longer text first on ties (more saved per cut)
+        order = sorted(range(len(candidates)), key=lambda i: (scores[i], -len(candidates[i][2][candidates[i][3]])))
+        for i in order:
+            if chars <= budget_chars:
+                break
+            path, _, container, key = candidates[i]
+            text = container[key]
+            shortened = _truncate(text, TRUNCATED_TEXT_CHARS)
+            chars -= len(compact_json(text)) - len(compact_json(shortened))
+            container[key] = shortened
+            truncated.append(path)
+
+    prompt = _CONTEXT_HEADER + compact_json(compacted) + _CONTEXT_FOOTER
+    return CompactContext(prompt=prompt, original_tokens=original_tokens, tokens=estimate_tokens(prompt), truncated=tuple(truncated))
+
+
+_context_cache: "OrderedDict[Tuple[str, str, int], CompactContext]" = OrderedDict()
+_context_lock = threading.Lock()
+
+def get_context_prompt(
+    user_db: Dict[str, Any],
+    job_details: Dict[str, Any] | List[Dict[str, Any]],
+    compact: bool = COMPACT_CONTEXT_PROMPT,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> str:
+    """
+    Context prompt for a resolver session: the full profile (`compact=False`) or
+    `compact_user_context(...).prompt`, memoized per (profile, job, budget).
+    Logs the tokens saved on every fresh compaction.
+    """
+    if not compact:
+        return profile_store.context_prompt_for(user_db)
+
+    snapshot = profile_store.current()
+    fingerprint = snapshot.user_db_fingerprint if user_db is snapshot.user_db else hashlib.sha256(
+        json.dumps(user_db, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    jobs = job_details if isinstance(job_details, list) else [job_details]
+    key = (fingerprint, "|".join(job_details_digest(job or {}) for job in jobs), token_budget)
+
+    with _context_lock:
+        cached = _context_cache.get(key)
+        if cached is not None:
+            _context_cache.move_to_end(key)
+            return cached.prompt
+
+    context = compact_user_context(user_db, job_details, token_budget)
+    metrics.increment("context_tokens_saved_total", context.tokens_saved)
+    print(f"[Context Compactor] 🗜️ Profile context {context.original_tokens} → {context.tokens} tokens "
+          f"(-{context.tokens_saved}, {len(context.truncated)} text field(s) shortened)")
+
+    with _context_lock:
+        _context_cache[key] = context
+        if len(_context_cache) > CONTEXT_CACHE_SIZE:
+            _context_cache.popitem(last=False)
+
+    return context.prompt
+
+
+if __name__ == "__main__":
+
+    # Tokens saved on the real profile for a few job profiles / budgets
+    import time
+
+    user_db = profile_store.current().user_db
+    jobs = {
+        "ml": {"title": "Machine Learning Engineer", "description": "Computer vision, deep learning, PyTorch, image models, healthcare AI."},
+        "web": {"title": "Full-Stack Developer", "description": "React, Node.js, REST APIs, web apps, IoT dashboards, databases."},
+    }
+
+    for name, job in jobs.items():
+        for budget in (3000, 2000, 1500):
+            started = time.perf_counter()
+            context = compact_user_context(user_db, job, budget)
+            elapsed = (time.perf_counter() - started) * 1e3
+            assert json.loads(context.prompt[len(_CONTEXT_HEADER):-len(_CONTEXT_FOOTER)]).keys() == user_db.keys()
+            print(f"{name:>3} / budget {budget}: {context.original_tokens} → {context.tokens} tokens "
+                  f"(-{context.tokens_saved}) in {elapsed:.1f} ms; shortened: {', '.join(context.truncated[:3]) or '-'}{' …' if len(context.truncated) > 3 else ''}")
@@ -8,18 +8,27 @@ from modules.ollama.services.interaction_service import InteractionService
 from modules.ollama.chain.prompt_models import PromptStep
 from modules.ollama.core.enums import PromptRole, ResponseFormat
 
-from config.env_config import OLLAMA_MODEL_NAME
+from config.env_config import OLLAMA_MODEL_NAME, PACKED_QUESTION_PROMPTS, PACK_TOKEN_BUDGET, COMPACT_CONTEXT_PROMPT, CONTEXT_TOKEN_BUDGET
 from app.services.question_resolver.prompts.prompt_store import (
     # Base Prompts
     get_system_prompt, 
-    get_user_context_prompt,
     # Question Type Specific Prompts
-    get_question_prompt
+    get_question_prompt,
+    # Packed Prompts
+    plan_question_packs,
+    build_packed_question_prompt
 )
 from app.services.question_resolver.utils import (
     extract_db_snippets, 
-    get_user_db, 
     get_parsed_response,
+    get_packed_parsed_response,
+)
+from app.services.profile_store import profile_store
+from app.services.question_resolver.context_compactor import get_context_prompt
+from app.services.question_resolver.rules import resolve_fast_paths, record_answer
+from app.services.question_resolver.batch_planner import (
+    plan_question_batch,
+    expand_batch_results
 )
 
 
@@ -30,10 +39,20 @@ class OllamaQuestionResolver:
         model: str = OLLAMA_MODEL_NAME,
         window_size: int = 3,
         max_retries: int = 2,
+        concurrent: bool = False,
+        packed: bool = PACKED_QUESTION_PROMPTS,
+        token_budget: int = PACK_TOKEN_BUDGET,
+        compact_context: bool = COMPACT_CONTEXT_PROMPT,
+        context_token_budget: int = CONTEXT_TOKEN_BUDGET,
     ):
         self.service = InteractionService(default_model=model)
         self.window_size = window_size
         self.max_retries = max_retries
+        self.concurrent = concurrent            # Questions are independent → dispatch them in parallel
+        self.packed = packed                    # Several questions per prompt (one generation turn per pack)
+        self.token_budget = token_budget
+        self.compact_context = compact_context  # Minified, job-relevance-trimmed profile instead of the full dump
+        self.context_token_budget = context_token_budget
         self.session_id: Optional[str] = None
         self.cache_response: bool = True
         self.cached_response: Dict[str, str] = {}
@@ -81,20 +100,28 @@ class OllamaQuestionResolver:
 
         print("\n[Question Resolver - Ollama] 🚀 Starting LLM Question Resolution")
 
-        user_db: Dict[str, Any] = get_user_db()
+        profile = profile_store.current()
+        user_db: Dict[str, Any] = profile.user_db
 
         if not self.session_id:
             self.open_session()
 
-        final_results = [{"questionId": q["questionId"], "response": None} for q in questions]
+        final_results = [{"questionId": q["questionId"], "response": None, "resolvedBy": None} for q in questions]
+
+        # Fast paths (DB rules, answer store across jobs / sessions)
+        fingerprint = profile.user_db_fingerprint
+        fast = resolve_fast_paths(questions, user_db, fingerprint)
 
         # Separate questions that need LLM call vs already cached
         remaining = []
         for idx, q in enumerate(questions):
             qid = q["questionId"]
-            if qid in self.cached_response:
+            if idx in fast:
+                final_results[idx]["resolvedBy"], final_results[idx]["response"] = fast[idx]
+            elif qid in self.cached_response:
                 # Directly use cached response
                 final_results[idx]["response"] = self.cached_response[qid]
+                final_results[idx]["resolvedBy"] = "session_cache"
             else:
                 # Needs LLM call
                 remaining.append((idx, q))
@@ -126,20 +153,31 @@ class OllamaQuestionResolver:
             if not self.context_prompt_loaded:
                 chain.append(PromptStep(
                     role=PromptRole.USER,
-                    content=get_user_context_prompt(user_db),
+                    content=get_context_prompt(user_db, job_details, self.compact_context, self.context_token_budget),
                     persist=persist_context_prompt,
                     expect_response=False,
                 ))
                 self.context_prompt_loaded = True
 
+            batch_snippets = []
             for question in batch:
-
                 try:
-                    db_snippets = extract_db_snippets( user_db, question.get("relevantDBKeys", []) )
+                    batch_snippets.append(extract_db_snippets( user_db, question.get("relevantDBKeys", []) ))
                 except:
-                    db_snippets = {}
+                    batch_snippets.append({})
+
+            if self.packed:
+                packs = plan_question_packs(list(batch), batch_snippets, self.token_budget)
+                print(f"[Question Resolver - Ollama] 📦 Packed {len(batch)} question(s) into {len(packs)} prompt(s)")
+            else:
+                packs = [[i] for i in range(len(batch))]
+
+            for pack in packs:
 
-                prompt_text, json_schema = get_question_prompt(question, db_snippets, supports_schema= True)
+                if self.packed:
+                    prompt_text, json_schema = build_packed_question_prompt([batch[i] for i in pack], [batch_snippets[i] for i in pack], supports_schema=False)
+                else:
+                    prompt_text, json_schema = get_question_prompt(batch[pack[0]], batch_snippets[pack[0]], supports_schema= True)
 
                 chain.append(
                     PromptStep(
@@ -157,7 +195,7 @@ class OllamaQuestionResolver:
             # Invoke LLM
             # ============================================================
             try:
-                responses = self.service.run_chain(self.session_id, chain)
+                responses = self.service.run_chain(self.session_id, chain, concurrent=self.concurrent)
             except Exception as e:
                 print("⚠️ LLM stalled. Resetting session.")
                 self.clear_session_memory()
@@ -169,25 +207,51 @@ class OllamaQuestionResolver:
             # Parse Response
             # ============================================================
             # ---------- SAFETY CHECK ----------
-            if len(responses) != len(indices):
-                print(f"[Question Resolver - Ollama] ⚠️ Payload length mismatch: expected {len(indices)}, got {len(responses)}")
+            if len(responses) != len(packs):
+                print(f"[Question Resolver - Ollama] ⚠️ Payload length mismatch: expected {len(packs)}, got {len(responses)}")
                 time.sleep(1)
                 continue
 
             new_remaining = []
 
+            def set_value(idx: int, value: Any) -> None:
+                final_results[idx]["response"] = value
+                final_results[idx]["resolvedBy"] = "llm"
+                record_answer(questions[idx], value, fingerprint)
+                if self.cache_response:
+                    self.cached_response[questions[idx]["questionId"]] = value
+
             # Parse each response
-            for idx, raw in zip(indices, responses):
+            for pack, raw in zip(packs, responses):
+                pack_indices = [indices[i] for i in pack]
+
+                if not self.packed:
+                    idx = pack_indices[0]
+                    try:
+                        # Set value
+                        set_value(idx, get_parsed_response(raw))
+                    except Exception as e:
+                        print(f"[Question Resolver - Ollama] ❌ Parsing failed for questionId {questions[idx]["questionId"]}: {e}")
+                        print(f"[Question Resolver - Ollama] Raw response: {raw}") # optional, useful for debugging/retrying
+                        new_remaining.append((idx, questions[idx])) # retry only failed questions
+                    continue
+
+                # Packed → keep whatever ids parsed, re-ask only the missing ones
                 try:
-                    # Set value
-                    value = get_parsed_response(raw)
-                    final_results[idx]["response"] = value
-                    if self.cache_response:
-                        self.cached_response[questions[idx]["questionId"]] = value
+                    values = get_packed_parsed_response(raw, [str(questions[idx]["questionId"]) for idx in pack_indices])
                 except Exception as e:
-                    print(f"[Question Resolver - Ollama] ❌ Parsing failed for questionId {questions[idx]["questionId"]}: {e}")
-                    print(f"[Question Resolver - Ollama] Raw response: {raw}") # optional, useful for debugging/retrying
-                    new_remaining.append((idx, questions[idx])) # retry only failed questions
+                    print(f"[Question Resolver - Ollama] ❌ Parsing failed for packed response: {e}")
+                    values = {}
+
+                for idx in pack_indices:
+                    question_id = str(questions[idx]["questionId"])
+                    if question_id in values:
+                        set_value(idx, values[question_id])
+                    else:
+                        new_remaining.append((idx, questions[idx]))
+
+                if len(values) < len(pack_indices):
+                    print(f"[Question Resolver - Ollama] ⚠️ Packed response missing {len(pack_indices) - len(values)} / {len(pack_indices)} answer(s)")
 
             remaining = new_remaining
 
@@ -200,8 +264,46 @@ class OllamaQuestionResolver:
         if not persist_context_prompt: self.context_prompt_loaded = False
         return final_results
 
+    def resolve_questions_batch(self, groups: List[tuple]) -> List[List[Optional[Dict[str, Any]]]]:
+        """
+        groups --> List[(job_details, List[QuestionDict])]
+        One session for all jobs: the context prompt persists, the system prompt is swapped
+        per job, and questions shared across jobs are asked once (see `plan_question_batch`).
+        """
+        plan = plan_question_batch(groups)
+        answers: Dict[str, Any] = {}
+        sources: Dict[str, str] = {}
+
+        self.close_session() # Fresh session, no per-job state from earlier calls
+        try:
+            for group_idx, segment in enumerate(plan.segments):
+                if not segment:
+                    continue
+                keys, questions = zip(*segment)
+
+                # New job → new system prompt; question ids are only unique within a job.
+                # Drop the previous job's rolling turns (its system prompt) — concurrent chains
+                # never write responses back, so nothing else pushes it out of the window.
+                self.reset_session_memory()
+                self.system_prompt_loaded = False
+                self.cached_response = {}
+
+                results = self.resolve_questions(
+                    list(questions),
+                    plan.groups[group_idx][0],
+                    persist_system_prompt=False,
+                    persist_context_prompt=True
+                )
+                for key, result in zip(keys, results):
+                    answers[key] = result["response"]
+                    sources[key] = result.get("resolvedBy")
+        finally:
+            self.close_session()
+
+        return expand_batch_results(plan, answers, sources)
+
 
-ollama_question_resolver = OllamaQuestionResolver(model=OLLAMA_MODEL_NAME, window_size=3, max_retries=2)
+ollama_question_resolver = OllamaQuestionResolver(model=OLLAMA_MODEL_NAME, window_size=3, max_retries=2, concurrent=True)
 
 
 if __name__ == "__main__":
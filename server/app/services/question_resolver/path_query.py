@@ -0,0 +1,192 @@
+# server\app\services\question_resolver\path_query.py
+
+from typing import List, Dict, Optional, Any, Tuple, Iterable
+from functools import lru_cache
+from dataclasses import dataclass
+import re
+
+# ============================================================
+# Config
+# ============================================================
+
+PATH_CACHE_SIZE = 4096                  # Compiled single paths kept (LRU)
+QUERY_CACHE_SIZE = 1024                 # Compiled multi-path queries (e.g. one question's relevantDBKeys) kept (LRU)
+
+_BRACKET_PATTERN = re.compile(r"\[(.*?)\]")
+
+
+class _Wildcard:
+    """
+    `[*]` / `.*` segment: every element of a list, every value of a dict.
+    """
+    def __repr__(self) -> str:
+        return "*"
+
+WILDCARD = _Wildcard()
+
+Segment = str | int | _Wildcard
+
+
+# ============================================================
+# Compilation
+# ============================================================
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def compile_path(path: str) -> Tuple[Segment, ...]:
+    """
+    "a.b[0].c"                  → ("a", "b", 0, "c")
+    "work[experience][0].title" → ("work", "experience", 0, "title")
+    "workExperiences[*].company" → ("workExperiences", *, "company")
+    """
+    if not isinstance(path, str):
+        raise TypeError("Path must be a string")
+
+    segments: List[Segment] = []
+    for part in _BRACKET_PATTERN.sub(lambda m: f".{m.group(1)}", path).split("."):
+        if not part:
+            continue
+        if part == "*":
+            segments.append(WILDCARD)
+        elif part.isdigit():
+            segments.append(int(part))
+        else:
+            segments.append(part)
+    return tuple(segments)
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    """
+    A set of paths flattened into a prefix trie in walk order.
+
+    steps[i]   → (parent node, segment) producing node i + 1 (node 0 is the root object)
+    outputs    → (path, node, has_wildcard) in request order
+    """
+    steps: Tuple[Tuple[int, Segment], ...]
+    outputs: Tuple[Tuple[str, int, bool], ...]
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(paths: Tuple[Any, ...]) -> CompiledQuery:
+    """
+    Shared prefixes become shared trie nodes, so they are evaluated once.
+    Non-string paths are skipped; duplicates collapse.
+    """
+    nodes: Dict[Tuple[int, Any], int] = {}
+    steps: List[Tuple[int, Segment]] = []
+    outputs: List[Tuple[str, int, bool]] = []
+
+    for path in dict.fromkeys(path for path in paths if isinstance(path, str)):
+        node = 0
+        segments = compile_path(path)
+        for segment in segments:
+            # (type, segment) so 0 and "0" never share a node
+            key = (node, type(segment), segment)
+            if key not in nodes:
+                steps.append((node, segment))
+                nodes[key] = len(steps)
+            node = nodes[key]
+        outputs.append((path, node, WILDCARD in segments))
+
+    return CompiledQuery(steps=tuple(steps), outputs=tuple(outputs))
+
+
+# ============================================================
+# Evaluation
+# ============================================================
+
+def _step(obj: Any, segment: Segment) -> Any:
+    if segment is WILDCARD:
+        if isinstance(obj, list):
+            return list(obj)
+        if isinstance(obj, dict):
+            return list(obj.values())
+        return []
+    if isinstance(obj, dict):
+        return obj.get(segment)
+    if isinstance(obj, list) and isinstance(segment, int):
+        return obj[segment] if segment < len(obj) else None
+    return None
+
+def evaluate(query: CompiledQuery, obj: Any, fallback: Optional[Any] = None) -> Dict[str, Any]:
+    values: List[Any] = [obj]
+    fanned: List[bool] = [False]        # Node holds a list of matches (a wildcard was crossed)
+
+    for parent, segment in query.steps:
+        current = values[parent]
+
+        if fanned[parent]:
+            matches = []
+            for item in current:
+                result = _step(item, segment)
+                if segment is WILDCARD:
+                    matches.extend(value for value in result if value is not None)
+                elif result is not None:
+                    matches.append(result)
+            values.append(matches)
+            fanned.append(True)
+        elif segment is WILDCARD:
+            values.append([value for value in _step(current, segment) if value is not None])
+            fanned.append(True)
+        else:
+            # Fast path: plain dict key
+            values.append(current.get(segment) if type(current) is dict else _step(current, segment))
+            fanned.append(False)
+
+    result = {}
+    for path, node, has_wildcard in query.outputs:
+        value = values[node]
+        result[path] = fallback if value is None or (has_wildcard and not value) else value
+    return result
+
+def extract_paths(obj: Dict[str, Any], paths: Iterable[str], *, fallback: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    { path: value } for every path, in one pass over shared prefixes.
+
+    Plain paths resolve exactly like `resolve_nested_key`. Paths with wildcards
+    return the list of matches (None dropped, nested wildcards flattened).
+    Missing values / no matches → `fallback`. Non-string paths are skipped.
+    """
+    try:
+        query = compile_query(tuple(paths))
+    except TypeError:
+        # Unhashable entries (malformed relevantDBKeys)
+        query = compile_query(tuple(path for path in paths if isinstance(path, str)))
+    return evaluate(query, obj, fallback)
+
+def query_path(obj: Dict[str, Any], path: str, *, fallback: Optional[Any] = None) -> Any:
+    return extract_paths(obj, (path,), fallback=fallback).get(path, fallback)
+
+
+if __name__ == "__main__":
+
+    # Micro-benchmark over the path forms the extension sends in relevantDBKeys
+    # (correctness checks live in server/tests/test_path_query.py)
+    import time
+    from app.services.question_resolver.utils import resolve_nested_key
+
+    db = {
+        "email": "jane@example.com",
+        "employmentInfo": {
+            "visaSponsorshipRequirement": False, "workAuthorization": True, "visaStatus": "F-1 OPT", "rightToWork": True,
+            **{f"field{i}": i for i in range(20)},
+        },
+        "workExperiences": [{"company": f"Company {i}", "jobTitle": f"Role {i}", "description": "…" * 200} for i in range(6)],
+        "education": [{"school": f"School {i}", "degree": ["BSc", "MSc"]} for i in range(3)],
+    }
+
+    # Typical question: several keys under employmentInfo / workExperiences
+    question_keys = ["employmentInfo.visaSponsorshipRequirement", "employmentInfo.workAuthorization", "employmentInfo.visaStatus",
+                     "employmentInfo.rightToWork", "workExperiences[0].company", "workExperiences[0].jobTitle", "email"]
+    ROUNDS = 50_000
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        {key: resolve_nested_key(db, key) for key in question_keys}
+    per_key = (time.perf_counter() - started) / ROUNDS * 1e6
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        extract_paths(db, question_keys)
+    compiled = (time.perf_counter() - started) / ROUNDS * 1e6
+
+    print(f"{len(question_keys)} keys / question: resolve_nested_key per key {per_key:.1f} µs, extract_paths {compiled:.1f} µs ({per_key / compiled:.1f}x)")
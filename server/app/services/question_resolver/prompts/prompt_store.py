@@ -1,13 +1,31 @@
 from config.env_config import USER_DATA_FILE, USE_TOR
 from typing import List, Dict, Optional, Any, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+import threading
+import hashlib
 import json
 
+# ============================================================
+# Config
+# ============================================================
+
+SYSTEM_PROMPT_CACHE_SIZE = 64           # Rendered system prompts kept (one per job, LRU)
+SCHEMA_CACHE_SIZE = 512                 # Serialized choice schemas kept (one per option list, LRU)
+
+
+def compact_json(value: Any) -> str:
+    """
+    Single-line JSON for prompt blocks (options, hints, snippets, schemas) — same
+    content as `indent=2`, a fraction of the tokens.
+    """
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
 # ============================================================
 # System Prompt (Injected Once)
 # ============================================================
 
-def get_system_prompt(job_details: Dict[str, Any]) -> str:
-    system_prompt = f"""
+_SYSTEM_PROMPT_HEAD = """
 You are an LLM-based form answering engine for job applications (ATS systems).
 
 You are provided with:
@@ -44,50 +62,9 @@ Answer Optimization Priority (highest to lowest):
 
 5. Hints and inferred signals
    → Use only if they improve clarity or eligibility.
-"""
-    
-    main_fields = {
-        "title": "Job Title",
-        "description": "Job Description",
-        "location": "Job Location",
-    }
-
-    if any(key in job_details for key in main_fields):
-        system_prompt += """
----
-
-=== [START] Job Details ===
-"""
-
-    # Add main sections
-    for key, label in main_fields.items():
-        if key in job_details:
-            system_prompt += f"""
-{label}:
-{job_details[key]}
-"""
-
-    # Add other job details
-    other_details = {
-        k: v for k, v in job_details.items()
-        if k not in main_fields
-    }
-
-    if other_details:
-        system_prompt += """
-Other Job Details:
-"""
-    for k, v in other_details.items():
-        system_prompt += f"{k}: {v}\n"
-
-    if any(key in job_details for key in main_fields):
-        system_prompt += """
-        
-=== [END] Job Details ===
-
 """
 
-    system_prompt += """
+_SYSTEM_PROMPT_TAIL = """
 Avoid introducing unnecessary negative or limiting signals, including:
 • Unrequested location mismatches
 • Unrelated past roles
@@ -111,13 +88,80 @@ Critical Output Rules:
   - Select the best real alternative from the database.
   - Or return the minimal truthful value by infering best real alternative (never a template)
 • Do NOT include disclaimers, prefaces, boilerplate, meta-writing, preamble/lead-in, instructional echo, self-referential commentary, epilogue, or closing niceties
-"""
-        
-    system_prompt += """
+
 END OF SYSTEM PROMPT - Keep these rules, instructions, and information (all context) in mind for reference and future usage. Currently, do not respond to this.
 """
 
-    return system_prompt.strip()
+_JOB_MAIN_FIELDS = {
+    "title": "Job Title",
+    "description": "Job Description",
+    "location": "Job Location",
+}
+
+_system_prompt_cache: "OrderedDict[Any, str]" = OrderedDict()
+_system_prompt_lock = threading.Lock()
+
+
+def _render_job_details(job_details: Dict[str, Any]) -> str:
+    has_main_fields = any(key in job_details for key in _JOB_MAIN_FIELDS)
+    parts: List[str] = []
+
+    if has_main_fields:
+        parts.append("\n---\n\n=== [START] Job Details ===\n")
+
+    # Main sections
+    for key, label in _JOB_MAIN_FIELDS.items():
+        if key in job_details:
+            parts.append(f"\n{label}:\n{job_details[key]}\n")
+
+    # Other job details
+    other_details = [(k, v) for k, v in job_details.items() if k not in _JOB_MAIN_FIELDS]
+    if other_details:
+        parts.append("\nOther Job Details:\n")
+        parts.extend(f"{k}: {v}\n" for k, v in other_details)
+
+    if has_main_fields:
+        parts.append("\n        \n=== [END] Job Details ===\n\n")
+
+    return "".join(parts)
+
+def job_details_digest(job_details: Dict[str, Any]) -> str:
+    # Key order is kept: it decides the order of "Other Job Details"
+    return hashlib.sha256(json.dumps(job_details, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+def _job_details_key(job_details: Dict[str, Any]) -> Any:
+    """
+    Items tuple when every value is hashable (str hashes are cached on the objects,
+    so repeat lookups for the same job are O(#fields)); content digest otherwise.
+    """
+    key = tuple(job_details.items())
+    try:
+        hash(key)
+        return key
+    except TypeError:
+        return job_details_digest(job_details)
+
+def get_system_prompt(job_details: Dict[str, Any]) -> str:
+    """
+    Static head / tail + the job section; rendered once per job (keyed by the
+    job details' hash) and reused on retries, session resets and later batches.
+    """
+    key = _job_details_key(job_details)
+
+    with _system_prompt_lock:
+        cached = _system_prompt_cache.get(key)
+        if cached is not None:
+            _system_prompt_cache.move_to_end(key)
+            return cached
+
+    system_prompt = (_SYSTEM_PROMPT_HEAD + _render_job_details(job_details) + _SYSTEM_PROMPT_TAIL).strip()
+
+    with _system_prompt_lock:
+        _system_prompt_cache[key] = system_prompt
+        if len(_system_prompt_cache) > SYSTEM_PROMPT_CACHE_SIZE:
+            _system_prompt_cache.popitem(last=False)
+
+    return system_prompt
 
 # ============================================================
 # Context Prompt (Injected Once)
@@ -135,51 +179,117 @@ END OF CONTEXT PROMPT — Keep this information (available user context) in mind
 """.strip()
 
 # ============================================================
-# Prompt Builders
+# Response Schemas
 # ============================================================
-    
-def _common_context(label: str, hints: List[str], db_snippets: Dict[str, Any]) -> str:
-    shared_prompt = f"""
-Question:
 
---- START OF QUESTION ---
+def _value_schema() -> Dict:
+    return {
+        "type": "json_schema",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "value": {"type": "string"}
+            },
+            "required": ["value"]
+        }
+    }
 
-{label}
+def _single_choice_schema(options: List[str]) -> Dict:
+    return {
+        "type": "json_schema",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "value": {
+                    "type": "string",
+                    "enum": options
+                }
+            },
+            "required": ["value"]
+        }
+    }
 
---- END OF QUESTION ---
-"""
-    
-    if hints:
-        shared_prompt += f"""
-Hints (may or may not be useful):
-{json.dumps(hints or [], indent=2)}
+def _multi_choice_schema(options: List[str]) -> Dict:
+    items_schema = {"type": "string", "enum": options} if options else {"type": "string"}
+    return {
+        "type": "json_schema",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "values": {
+                    "type": "array",
+                    "items": items_schema
+                }
+            },
+            "required": ["values"]
+        }
+    }
+
+def _date_schema(required: bool) -> Dict:
+    return {
+        "type": "json_schema",
+        "schema": {
+            "type": "object",
+            "properties": {
+                "value": {
+                    "type": "string" if required else ["string", "null"],
+                    "pattern": r"^\d{4}-\d{2}-\d{2}$"
+                }
+            },
+            "required": ["value"]
+        }
+    }
+
+@lru_cache(maxsize=SCHEMA_CACHE_SIZE)
+def _choice_schema_json(kind: str, options: Tuple[str, ...]) -> str:
+    if kind == "single":
+        return compact_json(_single_choice_schema(list(options)))
+    return compact_json(_multi_choice_schema(list(options)))
+
+def _options_key(options: List[Any]) -> Optional[Tuple]:
+    try:
+        key = tuple(options)
+        hash(key)
+        return key
+    except TypeError:
+        return None
+
+def _schema_json(kind: str, options: List[Any], schema: Dict) -> str:
+    key = _options_key(options)
+    return _choice_schema_json(kind, key) if key is not None else compact_json(schema)
+
+# ============================================================
+# Prompt Templates (static sections compiled once at import)
+# ============================================================
+
+_VALUE_SCHEMA_JSON = compact_json(_value_schema())
+_DATE_SCHEMA_JSON = {required: compact_json(_date_schema(required)) for required in (True, False)}
+
+_RESPONSE_FORMAT = """
+
+Response JSON schema:
+{schema}
+
+Example:
+{example}
+
+Return the answer strictly in JSON.
 """
-        
-    if db_snippets:
-        shared_prompt += f"""
-Database information (may or may not be useful):
-{json.dumps(db_snippets or {}, indent=2)}
+
+_RESPONSE_FORMAT_SCHEMA_SUPPORTED = """
+
+Return the answer strictly in JSON.
 """
-    
-    return shared_prompt.strip()
 
+_COMMON_CONTEXT = """Question:
 
-def build_scalar_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
-    
-    def _get_scalar_schema() -> Dict:
-        return {
-            "type": "json_schema",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "value": {"type": "string"}
-                },
-                "required": ["value"]
-            }
-        }
+--- START OF QUESTION ---
+
+{label}
 
+--- END OF QUESTION ---"""
 
-    scalar_prompt = f"""{_common_context(meta["labelText"], meta.get("hints"), db_snippets)}
+_SCALAR_TEMPLATE = """{context}
 
 You are answering a short single-line input field.
 
@@ -189,50 +299,27 @@ Rules:
 • NEVER use markdown or link formatting - URLs must be plain text.
 • No explanations
 • Use database values if available, otherwise infer safely
-"""
-    
-    if meta.get("required", True):
-        scalar_prompt += """• This is a REQUIRED field — value must be a real, non-empty string (Empty string is NOT allowed)
-"""
-
-    scalar_prompt += f"""• Never return template-style, example-style, or instructional language
+{required_rule}• Never return template-style, example-style, or instructional language
 • Lookout provided system instructions, rules, information and user context for additional inference.
-"""
-    if not supports_schema:
-        scalar_prompt += f"""
+{response_format}"""
+
+_SCALAR_REQUIRED_RULE = "• This is a REQUIRED field — value must be a real, non-empty string (Empty string is NOT allowed)\n"
+
+_SCALAR_RESPONSE_FORMAT = f"""
 Response JSON schema:
-{json.dumps(_get_scalar_schema(), indent=2)}
+{_VALUE_SCHEMA_JSON}
 
 Response Format Example:
-{{
-  "value": "string"
-}}
+{{"value":"string"}}
 
 Return the most appropriate short and concise answer (strictly in JSON).
 """
-    else:
-        scalar_prompt += """
+
+_SCALAR_RESPONSE_FORMAT_SCHEMA_SUPPORTED = """
 Return the most appropriate short and concise answer.
 """
-    
-    return scalar_prompt.strip(), _get_scalar_schema() if supports_schema else None
 
-
-def build_textarea_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
-
-    def _get_textarea_schema() -> Dict:
-        return {
-            "type": "json_schema",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "value": {"type": "string"}
-                },
-                "required": ["value"]
-            }
-        }
-
-    textarea_prompt = f"""{_common_context(meta["labelText"], meta.get("hints"), db_snippets)}
+_TEXTAREA_TEMPLATE = """{context}
 
 You are answering a long-form text question.
 
@@ -247,58 +334,27 @@ Rules:
 • NEVER use placeholders such as:
   "[your email]", "[phone number]", "[City]", "[State]", "[Country]", "XXX", "XYZ", "ABC", or similar
   it must be genuine, authentic, and realistic answer.
-"""
-    
-    textarea_prompt += """• This is a REQUIRED question — response must not be empty
+• This is a REQUIRED question — response must not be empty
 • You must provide a real, truthful answer even if brief
-"""
-    
-    textarea_prompt += """• Lookout provided system instructions, rules, information and user context for additional inference.
-"""
+• Lookout provided system instructions, rules, information and user context for additional inference.
+{response_format}"""
 
-    if not supports_schema:
-        textarea_prompt += f"""
+_TEXTAREA_RESPONSE_FORMAT = f"""
 Response JSON schema:
-{json.dumps(_get_textarea_schema(), indent=2)}
+{_VALUE_SCHEMA_JSON}
 
 Response Format Example:
-{{
-  "value": "string"
-}}
+{{"value":"string"}}
 
 Return the answer strictly in JSON.
 """
-    else:
-        textarea_prompt += """
+
+_TEXTAREA_RESPONSE_FORMAT_SCHEMA_SUPPORTED = """
 Return the most appropriate long-form response not exceed 150 words (preferably 30-60 words).
 Ensure the output matches the required JSON schema.
 """
 
-
-    return textarea_prompt.strip(), _get_textarea_schema() if supports_schema else None
-
-
-def build_single_choice_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
-    
-    def _get_single_choice_schema(options) -> Dict:
-        return {
-            "type": "json_schema",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "value": {
-                        "type": "string",
-                        "enum": options
-                    }
-                },
-                "required": ["value"]
-            }
-        }
-
-    options = meta.get("options", [])
-    schema = _get_single_choice_schema(options)
-
-    single_choice_prompt = f"""{_common_context(meta["labelText"], meta.get("hints"), db_snippets)}
+_SINGLE_CHOICE_TEMPLATE = """{context}
 
 You are selecting ONE option from a fixed list.
 
@@ -311,199 +367,319 @@ Rules:
 • Lookout provided system instructions, rules, information and user context for additional inference.
 
 Options:
-{json.dumps(options, indent=2)}
+{options}
 
 Choose exactly ONE option from the list above.
 The value must match exactly (case-sensitive).
-"""
+{response_format}"""
 
-    if not supports_schema:
-        single_choice_prompt += f"""
+_MULTI_CHOICE_TEMPLATE = """{context}
 
-Response JSON schema:
-{json.dumps(schema, indent=2)}
+{options_block}
 
-Example:
-{{
-  "value": "string"
-}}
+Choose {count} OR MORE options.
 
-Return the answer strictly in JSON.
-"""
-    else:
-        single_choice_prompt += """
+Rules:
+• Return an array
+• {values_rule}
+• Infer from database if relevant context exists
+• {required_rule}
+• Lookout provided system instructions, rules, information and user context for additional inference.
+{response_format}"""
 
-Return the answer strictly in JSON.
-"""
+_DATE_TEMPLATE = """{context}
 
-    return single_choice_prompt.strip(), schema if supports_schema else None
+You are answering a date input field.
 
+Rules:
+• Output ISO-8601 format: YYYY-MM-DD
+• Use database date if available
+• If only year/month known, infer day as 01
+• If no cluse is available, {fallback_rule}
+• Lookout provided system instructions, rules, information and user context for additional inference.
+{response_format}"""
 
-def build_multi_choice_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+# ============================================================
+# Prompt Builders
+# ============================================================
 
-    def _get_multi_choice_schema(meta: Dict) -> Dict:
-        has_options = bool(meta.get("options"))
-
-        items_schema = (
-            {
-                "type": "string",
-                "enum": meta["options"]
-            }
-            if has_options
-            else {
-                "type": "string"
-            }
-        )
-
-        return {
-            "type": "json_schema",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "values": {
-                        "type": "array",
-                        "items": items_schema
-                    }
-                },
-                "required": ["values"]
-            }
-        }
+def _common_context(label: str, hints: List[str], db_snippets: Dict[str, Any]) -> str:
+    shared_prompt = _COMMON_CONTEXT.format(label=label)
 
-    has_options = bool(meta.get("options"))
-    options = meta.get("options", [])
-    schema = _get_multi_choice_schema(meta)
+    if hints:
+        shared_prompt += f"\n\nHints (may or may not be useful):\n{compact_json(hints)}"
 
-    multi_choice_prompt = f"""
-{_common_context(meta["labelText"], meta.get("hints"), db_snippets)}
+    if db_snippets:
+        shared_prompt += f"\n\nDatabase information (may or may not be useful):\n{compact_json(db_snippets)}"
 
-{f"Options:\n{json.dumps(options, indent=2)}" if has_options else "No predefined options exist. Generate the most appropriate concise answer(s) that increase eligibility and hiring chance."}
+    return shared_prompt
 
-Choose {"ONE" if meta.get("required", True) else "ZERO"} OR MORE options.
 
-Rules:
-• Return an array
-• {"Every value must exist in the options list" if has_options else "Values may be inferred when no options are provided"}
-• Infer from database if relevant context exists
-• {"Return at least one answer in array" if meta.get("required", True) else "If none apply, return empty list"}
-• Lookout provided system instructions, rules, information and user context for additional inference.
-"""
+def build_scalar_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+    scalar_prompt = _SCALAR_TEMPLATE.format(
+        context=_common_context(meta["labelText"], meta.get("hints"), db_snippets),
+        required_rule=_SCALAR_REQUIRED_RULE if meta.get("required", True) else "",
+        response_format=_SCALAR_RESPONSE_FORMAT_SCHEMA_SUPPORTED if supports_schema else _SCALAR_RESPONSE_FORMAT,
+    )
+    return scalar_prompt.strip(), _value_schema() if supports_schema else None
 
-    if not supports_schema:
-        multi_choice_prompt += f"""
 
-Response JSON schema:
-{json.dumps(schema, indent=2)}
+def build_textarea_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+    textarea_prompt = _TEXTAREA_TEMPLATE.format(
+        context=_common_context(meta["labelText"], meta.get("hints"), db_snippets),
+        response_format=_TEXTAREA_RESPONSE_FORMAT_SCHEMA_SUPPORTED if supports_schema else _TEXTAREA_RESPONSE_FORMAT,
+    )
+    return textarea_prompt.strip(), _value_schema() if supports_schema else None
 
-Example:
-{{
-  "values": ["string"]
-}}
 
-Return the answer strictly in JSON.
-"""
-    else:
-        multi_choice_prompt += """
+def build_single_choice_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+    options = meta.get("options", [])
+    schema = _single_choice_schema(options)
+
+    single_choice_prompt = _SINGLE_CHOICE_TEMPLATE.format(
+        context=_common_context(meta["labelText"], meta.get("hints"), db_snippets),
+        options=compact_json(options),
+        response_format=_RESPONSE_FORMAT_SCHEMA_SUPPORTED if supports_schema else _RESPONSE_FORMAT.format(
+            schema=_schema_json("single", options, schema),
+            example='{"value":"string"}',
+        ),
+    )
+    return single_choice_prompt.strip(), schema if supports_schema else None
 
-Return the answer strictly in JSON.
-"""
 
+def build_multi_choice_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+    options = meta.get("options") or []
+    has_options = bool(options)
+    required = meta.get("required", True)
+    schema = _multi_choice_schema(options)
+
+    multi_choice_prompt = _MULTI_CHOICE_TEMPLATE.format(
+        context=_common_context(meta["labelText"], meta.get("hints"), db_snippets),
+        options_block=f"Options:\n{compact_json(options)}" if has_options else "No predefined options exist. Generate the most appropriate concise answer(s) that increase eligibility and hiring chance.",
+        count="ONE" if required else "ZERO",
+        values_rule="Every value must exist in the options list" if has_options else "Values may be inferred when no options are provided",
+        required_rule="Return at least one answer in array" if required else "If none apply, return empty list",
+        response_format=_RESPONSE_FORMAT_SCHEMA_SUPPORTED if supports_schema else _RESPONSE_FORMAT.format(
+            schema=_schema_json("multi", options, schema),
+            example='{"values":["string"]}',
+        ),
+    )
     return multi_choice_prompt.strip(), schema if supports_schema else None
 
 
 def build_date_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+    required = bool(meta.get("required", True))
+
+    date_prompt = _DATE_TEMPLATE.format(
+        context=_common_context(meta["labelText"], meta.get("hints"), db_snippets),
+        fallback_rule="return today's date" if required else "the value in JSON must be null",
+        response_format=_RESPONSE_FORMAT_SCHEMA_SUPPORTED if supports_schema else _RESPONSE_FORMAT.format(
+            schema=_DATE_SCHEMA_JSON[required],
+            example='{"value":"YYYY-MM-DD"}',
+        ),
+    )
+    return date_prompt.strip(), _date_schema(required) if supports_schema else None
 
-    def _get_date_schema(meta: Dict) -> Dict:
-        required = meta.get("required", True)
-
-        return {
-            "type": "json_schema",
-            "schema": {
-                "type": "object",
-                "properties": {
-                    "value": {
-                        "type": "string" if required else ["string", "null"],
-                        "pattern": r"^\d{4}-\d{2}-\d{2}$"
-                    }
-                },
-                "required": ["value"]
-            }
-        }
-
-    required = meta.get("required", True)
-    schema = _get_date_schema(meta)
-
-    date_prompt = f"""
-{_common_context(meta["labelText"], meta.get("hints"), db_snippets)}
-
-You are answering a date input field.
-
-Rules:
-• Output ISO-8601 format: YYYY-MM-DD
-• Use database date if available
-• If only year/month known, infer day as 01
-• If no cluse is available, {"return today's date" if required else "the value in JSON must be null"}
-• Lookout provided system instructions, rules, information and user context for additional inference.
-"""
-
-    if not supports_schema:
-        date_prompt += f"""
-
-Response JSON schema:
-{json.dumps(schema, indent=2)}
+# ============================================================
+# Prompt Router
+# ============================================================
 
-Example:
-{{
-  "value": "YYYY-MM-DD"
-}}
+SCALAR_TYPES = {"text", "email", "number", "tel", "url", "search", "password"}
+TEXTAREA_TYPES = {"textarea"}
+SINGLE_CHOICE_TYPES = {"radio", "select", "dropdown"}
+MULTI_CHOICE_TYPES = {"checkbox", "multiselect"}
+DATE_TYPES = {"date"}
 
-Return the answer strictly in JSON.
-"""
-    else:
-        date_prompt += """
+_PROMPT_BUILDERS = {
+    **{q_type: build_scalar_prompt for q_type in SCALAR_TYPES},
+    **{q_type: build_textarea_prompt for q_type in TEXTAREA_TYPES},
+    **{q_type: build_single_choice_prompt for q_type in SINGLE_CHOICE_TYPES},
+    **{q_type: build_multi_choice_prompt for q_type in MULTI_CHOICE_TYPES},
+    **{q_type: build_date_prompt for q_type in DATE_TYPES},
+}
 
-Return the answer strictly in JSON.
-"""
+def get_question_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+    builder = _PROMPT_BUILDERS.get(meta["type"])
+    if builder is None:
+        raise ValueError(f"❌ Unsupported question type: {meta['type']}")
+    return builder(meta, db_snippets, supports_schema)
 
-    return date_prompt.strip(), schema if supports_schema else None
 
 # ============================================================
-# Prompt Router
+# Packed Prompts (K questions → one JSON object)
 # ============================================================
 
-def get_question_prompt(meta: Dict, db_snippets: Dict, supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+CHARS_PER_TOKEN = 4                     # Rough English / JSON average, good enough for sizing packs
+PACK_OVERHEAD_TOKENS = 400              # Shared rules + response format block
+MAX_PACK_SIZE = 12                      # Keep each answer object small enough to copy / parse reliably
+ANSWER_TOKEN_ESTIMATES = {"textarea": 250, "checkbox": 40, "multiselect": 40}
+DEFAULT_ANSWER_TOKENS = 20
+
+PACKED_TYPE_RULES = {
+    "text": "short single-line input → one concise plain string",
+    "email": "short single-line input → one concise plain string",
+    "number": "short single-line input → one concise plain string",
+    "tel": "short single-line input → one concise plain string",
+    "url": "short single-line input → one concise plain string (plain URL, no markdown)",
+    "search": "short single-line input → one concise plain string",
+    "password": "short single-line input → one concise plain string",
+    "textarea": "long-form text → professional, ATS-safe, 30-60 words (max 150), no placeholders",
+    "radio": "select exactly ONE option → string matching an option exactly (case-sensitive)",
+    "select": "select exactly ONE option → string matching an option exactly (case-sensitive)",
+    "dropdown": "select exactly ONE option → string matching an option exactly (case-sensitive)",
+    "checkbox": "select one or more options → array of strings, each matching an option exactly",
+    "multiselect": "select one or more options → array of strings, each matching an option exactly",
+    "date": "date → ISO-8601 string YYYY-MM-DD",
+}
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def _packed_value_schema(meta: Dict) -> Dict:
     q_type = meta["type"]
+    options = meta.get("options") or []
+    nullable = not meta.get("required", True)
+
+    if q_type in ("checkbox", "multiselect"):
+        return {"type": "array", "items": {"type": "string", "enum": options} if options else {"type": "string"}}
+    if q_type in ("radio", "select", "dropdown") and options:
+        return {"type": "string", "enum": options}
+    if q_type == "date":
+        return {"type": ["string", "null"] if nullable else "string", "pattern": r"^\d{4}-\d{2}-\d{2}$"}
+    return {"type": ["string", "null"] if nullable else "string"}
+
+def get_packed_schema(metas: List[Dict]) -> Dict:
+    """
+    One object keyed by questionId → that question's value schema.
+    """
+    return {
+        "type": "json_schema",
+        "schema": {
+            "type": "object",
+            "properties": {str(meta["questionId"]): _packed_value_schema(meta) for meta in metas},
+            "required": [str(meta["questionId"]) for meta in metas]
+        }
+    }
 
-    # ============================================================
-    # Question Type Groups
-    # ============================================================
-
-    SCALAR_TYPES = {"text", "email", "number", "tel", "url", "search", "password"}
+def _packed_question_block(meta: Dict, db_snippets: Dict) -> str:
+    if meta["type"] not in PACKED_TYPE_RULES:
+        raise ValueError(f"❌ Unsupported question type: {meta['type']}")
 
-    TEXTAREA_TYPES = {"textarea"}
+    block = f"""
+### questionId: "{meta["questionId"]}"
+Question: {meta["labelText"]}
+Type: {PACKED_TYPE_RULES[meta["type"]]}
+Required: {"yes" if meta.get("required", True) else "no (null allowed)"}
+"""
+    if meta.get("options"):
+        block += f"Options: {compact_json(meta['options'])}\n"
+    if meta.get("hints"):
+        block += f"Hints (may or may not be useful): {compact_json(meta['hints'])}\n"
+    if db_snippets:
+        block += f"Database information (may or may not be useful): {compact_json(db_snippets)}\n"
+    return block.strip()
+
+def plan_question_packs(metas: List[Dict], db_snippets: List[Dict], token_budget: int, max_pack_size: int = MAX_PACK_SIZE) -> List[List[int]]:
+    """
+    Greedy packing in question order: a pack closes once its estimated prompt + answer
+    tokens would exceed `token_budget` (or it holds `max_pack_size` questions).
+    Returns packs of indices into `metas`.
+    """
+    packs: List[List[int]] = []
+    current: List[int] = []
+    used = PACK_OVERHEAD_TOKENS
+
+    for idx, (meta, snippets) in enumerate(zip(metas, db_snippets)):
+        cost = estimate_tokens(_packed_question_block(meta, snippets)) + ANSWER_TOKEN_ESTIMATES.get(meta["type"], DEFAULT_ANSWER_TOKENS)
+        if current and (used + cost > token_budget or len(current) >= max_pack_size):
+            packs.append(current)
+            current, used = [], PACK_OVERHEAD_TOKENS
+        current.append(idx)
+        used += cost
+
+    if current:
+        packs.append(current)
+    return packs
+
+def build_packed_question_prompt(metas: List[Dict], db_snippets: List[Dict], supports_schema: bool = False) -> Tuple[str, Optional[Dict]]:
+    """
+    One prompt answering every question in `metas`; the response is a single JSON
+    object { questionId: value }.
+    """
+    schema = get_packed_schema(metas)
+    question_ids = [str(meta["questionId"]) for meta in metas]
+    blocks = "\n\n".join(_packed_question_block(meta, snippets) for meta, snippets in zip(metas, db_snippets))
+
+    packed_prompt = f"""
+You are answering {len(metas)} job application questions at once.
 
-    SINGLE_CHOICE_TYPES = {"radio", "select", "dropdown"}
+Rules:
+• Answer every question independently and key each answer by its questionId
+• Use database values if available, otherwise infer safely (never optimize legal / compliance answers)
+• Choice answers must match the listed options exactly — never invent new values
+• NEVER use markdown or link formatting - URLs must be plain text.
+• Required answers must be real and non-empty; never return template-style, example-style, or instructional language
+• Lookout provided system instructions, rules, information and user context for additional inference.
 
-    MULTI_CHOICE_TYPES = {"checkbox", "multiselect"}
+Questions:
 
-    DATE_TYPES = {"date"}
+{blocks}
+"""
 
-    # ============================================================
-    # Prompt Dispatch
-    # ============================================================
+    if not supports_schema:
+        packed_prompt += f"""
+Response JSON schema:
+{compact_json(schema)}
+"""
 
-    if q_type in SCALAR_TYPES:
-        return build_scalar_prompt(meta, db_snippets, supports_schema)
+    packed_prompt += f"""
+Return ONE JSON object (strictly JSON) with exactly these keys: {compact_json(question_ids)}
+"""
 
-    if q_type in TEXTAREA_TYPES:
-        return build_textarea_prompt(meta, db_snippets, supports_schema)
+    return packed_prompt.strip(), schema if supports_schema else None
 
-    if q_type in SINGLE_CHOICE_TYPES:
-        return build_single_choice_prompt(meta, db_snippets, supports_schema)
 
-    if q_type in MULTI_CHOICE_TYPES:
-        return build_multi_choice_prompt(meta, db_snippets, supports_schema)
+if __name__ == "__main__":
 
-    if q_type in DATE_TYPES:
-        return build_date_prompt(meta, db_snippets, supports_schema)
+    # Per-question prompt build cost + system prompt reuse
+    import time
 
-    raise ValueError(f"❌ Unsupported question type: {q_type}")
+    job_details = {
+        "title": "Senior Backend Engineer",
+        "description": "Design and operate Python services for hiring workflows. " * 60,
+        "location": "Remote (US)",
+        "company": "Acme",
+        "employmentType": "Full-time",
+    }
+    metas = [
+        {"questionId": "1", "type": "text", "labelText": "LinkedIn profile URL", "hints": ["linkedin"]},
+        {"questionId": "2", "type": "textarea", "labelText": "Why do you want to work here?"},
+        {"questionId": "3", "type": "select", "labelText": "Are you authorized to work in the US?", "options": ["Yes", "No"]},
+        {"questionId": "4", "type": "checkbox", "labelText": "Which languages do you use?", "options": [f"Language {i}" for i in range(40)]},
+        {"questionId": "5", "type": "date", "labelText": "Earliest start date", "required": False},
+    ]
+    db_snippets = {"workExperiences[0].company": "Globex", "employmentInfo.visaStatus": "Citizen", "email": "jane@example.com"}
+    ROUNDS = 20_000
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        cold = (_SYSTEM_PROMPT_HEAD + _render_job_details(job_details) + _SYSTEM_PROMPT_TAIL).strip()
+    cold_us = (time.perf_counter() - started) / ROUNDS * 1e6
+    get_system_prompt(job_details)
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        get_system_prompt(job_details)
+    cached_us = (time.perf_counter() - started) / ROUNDS * 1e6
+    assert get_system_prompt(dict(job_details)) is get_system_prompt(job_details)
+    print(f"system prompt ({len(cold)} chars): render {cold_us:.1f} µs, cached lookup {cached_us:.1f} µs")
+
+    for meta in metas:
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            prompt, _ = get_question_prompt(meta, db_snippets, supports_schema=False)
+        per_question = (time.perf_counter() - started) / ROUNDS * 1e6
+        print(f"{meta['type']:>9}: {per_question:5.1f} µs / prompt, ~{estimate_tokens(prompt)} tokens")
+
+    options = metas[3]["options"]
+    print(f"options block: ~{estimate_tokens(json.dumps(options, indent=2))} tokens indented → ~{estimate_tokens(compact_json(options))} compact")
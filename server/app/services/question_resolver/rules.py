@@ -0,0 +1,273 @@
+# server\app\services\question_resolver\rules.py
+
+from app.services.question_resolver.utils import filter_and_normalize
+from app.services.question_resolver.path_query import extract_paths
+from app.services.question_resolver.answer_store import answer_store
+from app.services.question_resolver.semantic_index import semantic_index
+from app.services.metrics import metrics
+from modules.utils.helpers import find_best_match
+from typing import List, Dict, Optional, Any, Callable, Tuple
+import re
+
+# ============================================================
+# Config
+# ============================================================
+
+SCALAR_TYPES = {"text", "email", "number", "tel", "url", "search"}
+SINGLE_CHOICE_TYPES = {"radio", "select", "dropdown"}
+MULTI_CHOICE_TYPES = {"checkbox", "multiselect"}
+DATE_TYPES = {"date"}
+
+OPTION_MATCH_THRESHOLD = 85             # Fuzzy score (0-100) a DB value needs to claim an option
+
+YES_WORDS = {"yes", "y", "true"}
+NO_WORDS = {"no", "n", "false"}
+
+# Labels phrased in the negative invert the meaning of a DB boolean — leave those to the LLM.
+NEGATION_PATTERN = re.compile(r"\b(not|never|none|without)\b|n't\b", re.IGNORECASE)
+
+# Only keys the extension bound to the question directly (its matched question's `dbAnswerKey`) feed the
+# rules; `relevantDBKeys` also carries fuzzy label-candidate keys that are context for the LLM, not answers.
+EXACT_KEYS_FIELD = "exactDBKeys"
+# Re-asked because the extension's own deterministic answer failed on the page — never answer it the same way.
+SKIP_REASONS = {"execution_failed"}
+
+# Key words too generic to identify what a boolean is about ("workAuthorization" is about authorization).
+GENERIC_KEY_WORDS = {"status", "requirement", "requirements", "restrictions", "history", "info", "check", "work", "have", "with", "has", "is"}
+TOPIC_PREFIX_CHARS = 6                  # "authorization" ~ "authorized", "requirement" ~ "require"
+ISO_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+RuleResult = Tuple[Any]                 # 1-tuple wrapping the answer (the answer itself may be falsy)
+Rule = Callable[[Dict[str, Any], List[Any]], Optional[RuleResult]]
+
+
+# ============================================================
+# Helpers
+# ============================================================
+
+def _option_label(option: Any) -> str:
+    if isinstance(option, dict):
+        return str(option.get("label", option.get("value", "")))
+    return str(option)
+
+def _first_word(text: str) -> str:
+    words = re.findall(r"[a-z]+", text.casefold())
+    return words[0] if words else ""
+
+def _key_topic_words(key: str) -> List[str]:
+    """
+    "employmentInfo.visaSponsorshipRequirement" → ["visa", "sponsorship"]
+    """
+    leaf = re.sub(r"\[[^\]]*\]", "", str(key)).split(".")[-1]
+    words = re.findall(r"[a-z]+", re.sub(r"([a-z])([A-Z])", r"\1 \2", leaf).casefold())
+    return [word for word in words if len(word) >= 3 and word not in GENERIC_KEY_WORDS]
+
+def label_matches_key(label: str, key: str) -> bool:
+    """
+    True when the label mentions the key's topic: "Will you require visa sponsorship?" is about
+    `visaSponsorshipRequirement`, not `workAuthorization`. Keys without topic words never match.
+    """
+    label_prefixes = {word[:TOPIC_PREFIX_CHARS] for word in re.findall(r"[a-z]+", (label or "").casefold())}
+    return any(word[:TOPIC_PREFIX_CHARS] in label_prefixes for word in _key_topic_words(key))
+
+def match_boolean_option(options: List[Any], flag: bool) -> Optional[str]:
+    """
+    The one option meaning yes (flag=True) or no (flag=False):
+    "Yes" / "Yes, I am authorized" / "No, I will require sponsorship" ...
+    Falls back to fuzzy matching; ambiguous or missing → None.
+    """
+    words = YES_WORDS if flag else NO_WORDS
+    labels = [_option_label(opt) for opt in options]
+
+    matches = [label for label in labels if _first_word(label) in words]
+    if len(matches) == 1:
+        return matches[0]
+    if matches:
+        return None
+
+    return find_best_match(labels, "Yes" if flag else "No", threshold=OPTION_MATCH_THRESHOLD)
+
+def match_value_option(options: List[Any], value: Any) -> Optional[str]:
+    """
+    Option whose label equals (case-insensitive) or fuzzily matches a DB value.
+    """
+    labels = [_option_label(opt) for opt in options]
+    text = " ".join(str(value).split()).casefold()
+
+    for label in labels:
+        if " ".join(label.split()).casefold() == text:
+            return label
+    return find_best_match(labels, str(value), threshold=OPTION_MATCH_THRESHOLD)
+
+
+# ============================================================
+# Default Rules
+# ============================================================
+
+def scalar_rule(question: Dict[str, Any], values: List[Any]) -> Optional[RuleResult]:
+    """
+    Plain input whose DB keys agree on one non-empty scalar (email, firstName, phoneNumber, linkedin ...).
+    """
+    if question.get("type") not in SCALAR_TYPES:
+        return None
+    distinct = {value for value in values if isinstance(value, (str, int, float)) and not isinstance(value, bool)}
+    if len(distinct) != 1:
+        return None
+    value = filter_and_normalize(distinct.pop())
+    return (value,) if value not in (None, "") else None
+
+def date_rule(question: Dict[str, Any], values: List[Any]) -> Optional[RuleResult]:
+    if question.get("type") not in DATE_TYPES:
+        return None
+    distinct = {value for value in values if isinstance(value, str) and ISO_DATE_PATTERN.match(value)}
+    return (distinct.pop(),) if len(distinct) == 1 else None
+
+def boolean_choice_rule(question: Dict[str, Any], values: List[Any]) -> Optional[RuleResult]:
+    """
+    employmentInfo-style booleans → the matching yes / no option, only when the
+    label is about the bound key's topic (`label_matches_key`).
+    """
+    if question.get("type") not in SINGLE_CHOICE_TYPES or not question.get("options"):
+        return None
+    flags = {value for value in values if isinstance(value, bool)}
+    if len(flags) != 1 or len(flags) != len(values):
+        return None
+    label = question.get("labelText") or ""
+    if NEGATION_PATTERN.search(label):
+        return None
+    if not all(label_matches_key(label, key) for key in question.get(EXACT_KEYS_FIELD) or []):
+        return None
+    option = match_boolean_option(question["options"], flags.pop())
+    return (option,) if option else None
+
+def value_choice_rule(question: Dict[str, Any], values: List[Any]) -> Optional[RuleResult]:
+    """
+    Single choice whose DB value names one of the options (gender, visaStatus ...).
+    """
+    if question.get("type") not in SINGLE_CHOICE_TYPES or not question.get("options"):
+        return None
+    distinct = {value for value in values if isinstance(value, str) and value.strip()}
+    if len(distinct) != 1 or len(values) != 1:
+        return None
+    option = match_value_option(question["options"], distinct.pop())
+    return (option,) if option else None
+
+def multi_choice_rule(question: Dict[str, Any], values: List[Any]) -> Optional[RuleResult]:
+    """
+    Multi choice backed by one DB list (ethnicity ...) — every item must map to an option.
+    """
+    if question.get("type") not in MULTI_CHOICE_TYPES or not question.get("options"):
+        return None
+    if len(values) != 1 or not isinstance(values[0], list) or not values[0]:
+        return None
+    selected = [match_value_option(question["options"], item) for item in values[0]]
+    if not all(selected):
+        return None
+    return (list(dict.fromkeys(selected)),)
+
+
+# ============================================================
+# Rule Engine
+# ============================================================
+
+class RuleEngine:
+    """
+    Deterministic fast path in front of the LLM.
+
+    Every rule receives the question and the values its exact key bindings
+    (`EXACT_KEYS_FIELD`) resolve to (`extract_paths`, missing keys dropped) and
+    returns `(answer,)` when it is confident, else None. Questions without exact
+    bindings, or re-sent after the extension's own answer failed (`SKIP_REASONS`),
+    are never answered by rules. Rules run in registration order; the first
+    confident one wins. Questions no rule claims go to the LLM. `register()` adds
+    rules (usable as a decorator).
+    """
+
+    def __init__(self):
+        self._rules: List[Tuple[str, Rule]] = []
+
+    def register(self, name: str, rule: Rule | None = None):
+        if rule is None:
+            return lambda fn: self.register(name, fn)
+        self._rules.append((name, rule))
+        return rule
+
+    @property
+    def rule_names(self) -> List[str]:
+        return [name for name, _ in self._rules]
+
+    def resolve(self, question: Dict[str, Any], user_db: Dict[str, Any]) -> Optional[Tuple[str, Any]]:
+        """
+        (rule name, answer) or None.
+        """
+        if question.get("reason") in SKIP_REASONS:
+            return None
+        keys = question.get(EXACT_KEYS_FIELD) or []
+        values = [value for value in extract_paths(user_db, keys).values() if value is not None]
+        if not values:
+            return None
+
+        for name, rule in self._rules:
+            try:
+                result = rule(question, values)
+            except Exception as e:
+                print(f"[Question Resolver - Rules] ⚠️ Rule '{name}' failed for questionId={question.get('questionId')}: {e}")
+                continue
+            if result is not None:
+                return name, result[0]
+        return None
+
+    def resolve_all(self, questions: List[Dict[str, Any]], user_db: Dict[str, Any]) -> Dict[int, Tuple[str, Any]]:
+        """
+        { index in `questions`: (rule name, answer) } for every question a rule answered.
+        """
+        resolved: Dict[int, Tuple[str, Any]] = {}
+        for idx, question in enumerate(questions):
+            match = self.resolve(question, user_db)
+            if match is not None:
+                resolved[idx] = match
+                metrics.increment("question_rule_resolutions_total", rule=match[0])
+        return resolved
+
+
+rule_engine = RuleEngine()
+rule_engine.register("scalar", scalar_rule)
+rule_engine.register("date", date_rule)
+rule_engine.register("boolean_choice", boolean_choice_rule)
+rule_engine.register("value_choice", value_choice_rule)
+rule_engine.register("multi_choice", multi_choice_rule)
+
+
+# ============================================================
+# Fast Paths (rules → answer store → semantic index)
+# ============================================================
+
+def resolve_fast_paths(questions: List[Dict[str, Any]], user_db: Dict[str, Any], fingerprint: str) -> Dict[int, Tuple[str, Any]]:
+    """
+    Everything answerable without the LLM: { index in `questions`: (resolvedBy, answer) }
+    resolvedBy → "rule:<name>" | "answer_store" | "semantic_index"
+    """
+    resolved = {idx: (f"rule:{name}", value) for idx, (name, value) in rule_engine.resolve_all(questions, user_db).items()}
+
+    pending = [idx for idx in range(len(questions)) if idx not in resolved]
+    stored = answer_store.lookup([questions[idx] for idx in pending], fingerprint)
+    for pos, value in stored.items():
+        resolved[pending[pos]] = ("answer_store", value)
+
+    # Paraphrases of questions answered before
+    pending = [idx for idx in pending if idx not in resolved]
+    similar = semantic_index.search([questions[idx] for idx in pending], fingerprint) if pending else {}
+    for pos, (value, score, matched_label) in similar.items():
+        resolved[pending[pos]] = ("semantic_index", value)
+        print(f"[Question Resolver] 🧭 Reusing answer of {matched_label!r} for {questions[pending[pos]].get('labelText')!r} (similarity {score:.2f})")
+
+    if resolved:
+        print(f"[Question Resolver] ⚡ Fast path: {len(resolved) - len(stored) - len(similar)} by rules, {len(stored)} from answer store, {len(similar)} by similarity / {len(questions)} question(s)")
+    return resolved
+
+def record_answer(question: Dict[str, Any], answer: Any, fingerprint: str) -> None:
+    """
+    Make an LLM answer reusable: exact matches (answer store) and paraphrases (semantic index).
+    """
+    answer_store.store(question, answer, fingerprint)
+    semantic_index.add(question, answer, fingerprint)
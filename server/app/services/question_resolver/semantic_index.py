@@ -0,0 +1,403 @@
+# server\app\services\question_resolver\semantic_index.py
+
+from config.env_config import APP_DATA_DIR
+from app.services.question_resolver.answer_store import is_cacheable
+from app.services.metrics import metrics
+from typing import List, Dict, Optional, Any, Tuple, FrozenSet
+from dataclasses import dataclass, field
+from pathlib import Path
+import numpy as np
+import threading
+import hashlib
+import json
+import math
+import time
+import re
+
+# ============================================================
+# Config
+# ============================================================
+
+SEMANTIC_INDEX_FILE = APP_DATA_DIR / "semantic_index.jsonl"
+EMBEDDING_DIM = 1024                    # Hashed feature buckets per vector
+SIMILARITY_THRESHOLD = 0.75             # Minimum cosine similarity to reuse an answer (free-text types)
+SEARCH_BLOCK_ROWS = 16384               # Rows scored per matmul (bounds temporary memory)
+IDF_REFRESH_RATIO = 0.1                 # Recompute IDF once the corpus grew / shrank by this fraction
+
+# Words carrying no meaning for matching. Negations, temporal words (now / currently /
+# future) and countries are deliberately NOT here — they flip the answer to a yes/no question.
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "at", "by", "with", "from", "as",
+    "is", "are", "was", "were", "be", "been", "being", "am", "do", "does", "did", "will", "would",
+    "shall", "should", "can", "could", "may", "might", "you", "your", "yours", "we", "our", "us",
+    "this", "that", "these", "those", "it", "its", "any", "please",
+    "if", "so", "such", "there", "which", "what", "who", "whom", "have", "has", "had",
+}
+
+# ATS paraphrases that mean the same thing
+SYNONYMS = {
+    "need": "require", "needs": "require", "needed": "require", "requires": "require", "required": "require", "requiring": "require",
+    "sponsor": "sponsorship", "sponsored": "sponsorship", "sponsoring": "sponsorship",
+    "authorised": "authorized", "authorization": "authorized", "authorisation": "authorized", "eligible": "authorized", "permitted": "authorized",
+    "legally": "legal", "lawfully": "legal",
+    "relocating": "relocate", "relocation": "relocate", "move": "relocate",
+    "employment": "work", "employed": "work", "working": "work", "job": "work",
+    "current": "currently", "presently": "currently", "today": "currently",
+    "no": "not", "never": "not", "cannot": "not", "without": "not",
+    "usa": "us_country", "america": "us_country", "american": "us_country",
+    "uk": "uk_country", "britain": "uk_country", "british": "uk_country", "england": "uk_country",
+    "canada": "ca_country", "canadian": "ca_country", "india": "in_country", "indian": "in_country",
+    "australia": "au_country", "australian": "au_country", "germany": "de_country", "german": "de_country",
+    "ireland": "ie_country", "irish": "ie_country", "france": "fr_country", "french": "fr_country",
+    "netherlands": "nl_country", "dutch": "nl_country", "singapore": "sg_country", "mexico": "mx_country",
+}
+
+# Rewritten before tokenizing: multi-word country names, and "US" / "U.S." (case-sensitive — "us" is a pronoun)
+COUNTRY_PHRASES = [
+    (re.compile(r"\bunited\s+states(\s+of\s+america)?\b", re.IGNORECASE), " us_country "),
+    (re.compile(r"\bunited\s+kingdom\b|\bgreat\s+britain\b", re.IGNORECASE), " uk_country "),
+    (re.compile(r"\bU\.?S\.?(A\.?)?(?![A-Za-z])"), " us_country "),
+    (re.compile(r"\bU\.?K\.?(?![A-Za-z])"), " uk_country "),
+]
+
+NEGATION_TOKEN = "not"
+TEMPORAL_TOKENS = {"now", "currently", "future", "past", "previously", "ever"}
+CHOICE_TYPES = {"radio", "select", "dropdown", "checkbox", "multiselect"}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'._]*")
+
+
+# ============================================================
+# Embedding (hashed TF-IDF)
+# ============================================================
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[: -len(suffix)]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    text = text or ""
+    for pattern, replacement in COUNTRY_PHRASES:
+        text = pattern.sub(replacement, text)
+    tokens = []
+    for raw in _TOKEN_PATTERN.findall(text.casefold()):
+        raw = raw.rstrip(".")
+        word = NEGATION_TOKEN if raw.endswith("n't") else SYNONYMS.get(raw, raw)
+        if word and word not in STOPWORDS:
+            tokens.append(SYNONYMS.get(_stem(word), _stem(word)))
+    return tokens
+
+def content_tokens(text: str) -> FrozenSet[str]:
+    return frozenset(tokenize(text))
+
+def _critical_tokens(tokens: FrozenSet[str]) -> FrozenSet[str]:
+    """
+    Tokens two labels must agree on before one's answer may be reused for the other.
+    """
+    return frozenset(token for token in tokens if token == NEGATION_TOKEN or token in TEMPORAL_TOKENS or token.endswith("_country"))
+
+def _bucket(token: str) -> Tuple[int, float]:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % EMBEDDING_DIM, (1.0 if (value >> 63) else -1.0)
+
+def term_frequencies(text: str) -> Dict[int, float]:
+    """
+    Sparse hashed term frequencies { bucket: signed sublinear tf }.
+    """
+    counts: Dict[str, int] = {}
+    for token in tokenize(text):
+        counts[token] = counts.get(token, 0) + 1
+
+    tf: Dict[int, float] = {}
+    for token, count in counts.items():
+        bucket, sign = _bucket(token)
+        tf[bucket] = tf.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+    return tf
+
+def partition_key(question: Dict[str, Any], fingerprint: str) -> Tuple[str, str, Tuple[str, ...]]:
+    """
+    Answers are only reusable for the same user DB, question type and option set.
+    """
+    options = tuple(sorted(" ".join(str(opt.get("label", opt.get("value")) if isinstance(opt, dict) else opt).split()).casefold() for opt in question.get("options") or []))
+    return fingerprint, str(question.get("type") or "").casefold(), options
+
+
+# ============================================================
+# Semantic Index
+# ============================================================
+
+@dataclass
+class _Partition:
+    tfs: List[Dict[int, float]] = field(default_factory=list)
+    answers: List[Any] = field(default_factory=list)
+    labels: List[str] = field(default_factory=list)
+    tokens: List[FrozenSet[str]] = field(default_factory=list)
+    rows: Dict[str, int] = field(default_factory=dict)  # Normalized label → row (one row per label)
+    token_rows: Dict[FrozenSet[str], int] = field(default_factory=dict)  # Content-token set → latest row (choice types)
+    matrix: Optional[np.ndarray] = None         # Cached L2-normalized TF-IDF rows (None → rebuild)
+
+class SemanticIndex:
+    """
+    Local vector index of previously answered questions, for paraphrase reuse
+    ("Are you legally authorized to work in the United States?" ≈ "Are you legally authorised to work in the USA?").
+
+    Labels are embedded with hashed TF-IDF (CPU-only, no model) and stored per
+    partition (user-DB fingerprint + type + option set), so a match can only reuse
+    an answer that is valid for the same field. `search()` scores a whole batch of
+    questions per partition with one NumPy matmul and reuses the best match at or
+    above `threshold`. Entries are appended to a JSONL file and loaded lazily.
+
+    Similar is not enough for a yes/no answer: a match is never reused across a
+    negation, temporal or country difference ("currently" vs "in the future", US
+    vs UK), and choice questions (`CHOICE_TYPES`) only reuse an answer whose label
+    has exactly the same content tokens (stopwords, synonyms and word order aside).
+    """
+
+    def __init__(self, path: Path = SEMANTIC_INDEX_FILE, threshold: float = SIMILARITY_THRESHOLD, persist: bool = True):
+        self.path = Path(path)
+        self.threshold = threshold
+        self.persist = persist
+        self._partitions: Dict[Tuple, _Partition] = {}
+        self._df = np.zeros(EMBEDDING_DIM, dtype=np.float64)   # Document frequency per bucket
+        self._size = 0
+        self._idf: Optional[np.ndarray] = None
+        self._idf_size = 0
+        self._fingerprint: Optional[str] = None
+        self._loaded = not persist
+        self._lock = threading.Lock()
+
+    # ============================================================
+    # Persistence
+    # ============================================================
+
+    def _ensure_loaded(self) -> None:
+        # Caller holds `_lock`
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    self._insert(entry["question"], entry["answer"], entry["fingerprint"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+        print(f"🧭 Semantic index loaded: {self._size} question(s)")
+
+    def _sync_fingerprint(self, fingerprint: str) -> None:
+        # Caller holds `_lock`. A new user DB makes every older answer unusable.
+        if fingerprint == self._fingerprint:
+            return
+        stale = [key for key in self._partitions if key[0] != fingerprint]
+        if stale:
+            for key in stale:
+                for tf in self._partitions.pop(key).tfs:
+                    self._df[list(tf)] -= 1
+                    self._size -= 1
+            if self.persist:
+                self._rewrite()
+        self._fingerprint = fingerprint
+
+    def _rewrite(self) -> None:
+        # Caller holds `_lock`
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for (fingerprint, q_type, options), partition in self._partitions.items():
+                for label, answer in zip(partition.labels, partition.answers):
+                    question = {"labelText": label, "type": q_type, "options": list(options)}
+                    f.write(json.dumps({"question": question, "answer": answer, "fingerprint": fingerprint}) + "\n")
+        tmp.replace(self.path)
+
+    # ============================================================
+    # Write
+    # ============================================================
+
+    def _insert(self, question: Dict[str, Any], answer: Any, fingerprint: str) -> None:
+        # Caller holds `_lock`
+        label = question.get("labelText", "")
+        tf = term_frequencies(label)
+        if not tf:
+            return
+        partition = self._partitions.setdefault(partition_key(question, fingerprint), _Partition())
+        normalized = " ".join(label.split()).casefold()
+        tokens = content_tokens(label)
+        if normalized in partition.rows:
+            # Same question answered again → latest answer wins, vectors unchanged
+            partition.answers[partition.rows[normalized]] = answer
+            partition.token_rows[tokens] = partition.rows[normalized]
+            return
+        partition.rows[normalized] = len(partition.tfs)
+        partition.token_rows[tokens] = len(partition.tfs)
+        partition.tokens.append(tokens)
+        partition.tfs.append(tf)
+        partition.answers.append(answer)
+        partition.labels.append(question.get("labelText", ""))
+        partition.matrix = None
+        self._df[list(tf)] += 1
+        self._size += 1
+
+    def add(self, question: Dict[str, Any], answer: Any, fingerprint: str) -> None:
+        if answer is None or not is_cacheable(question):
+            return
+        with self._lock:
+            self._ensure_loaded()
+            self._sync_fingerprint(fingerprint)
+            self._insert(question, answer, fingerprint)
+            if self.persist:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"question": {k: question.get(k) for k in ("labelText", "type", "options")}, "answer": answer, "fingerprint": fingerprint}) + "\n")
+
+    # ============================================================
+    # Vectors
+    # ============================================================
+
+    def _current_idf(self) -> np.ndarray:
+        # Caller holds `_lock`. Refreshed only on a significant corpus change so cached matrices stay valid.
+        if self._idf is None or abs(self._size - self._idf_size) > IDF_REFRESH_RATIO * max(self._idf_size, 1):
+            self._idf = (np.log((1.0 + self._size) / (1.0 + self._df)) + 1.0).astype(np.float32)
+            self._idf_size = self._size
+            for partition in self._partitions.values():
+                partition.matrix = None
+        return self._idf
+
+    def _vectorize(self, tfs: List[Dict[int, float]], idf: np.ndarray) -> np.ndarray:
+        matrix = np.zeros((len(tfs), EMBEDDING_DIM), dtype=np.float32)
+        for row, tf in enumerate(tfs):
+            if tf:
+                matrix[row, list(tf)] = list(tf.values())
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def _matrix(self, partition: _Partition, idf: np.ndarray) -> np.ndarray:
+        if partition.matrix is None:
+            partition.matrix = self._vectorize(partition.tfs, idf)
+        return partition.matrix
+
+    # ============================================================
+    # Search
+    # ============================================================
+
+    def search(self, questions: List[Dict[str, Any]], fingerprint: str) -> Dict[int, Tuple[Any, float, str]]:
+        """
+        { index in `questions`: (answer, similarity, matched label) } for every
+        cacheable question whose best match clears the threshold.
+        """
+        grouped: Dict[Tuple, List[int]] = {}
+        for idx, question in enumerate(questions):
+            if is_cacheable(question):
+                grouped.setdefault(partition_key(question, fingerprint), []).append(idx)
+
+        found: Dict[int, Tuple[Any, float, str]] = {}
+        with self._lock:
+            self._ensure_loaded()
+            self._sync_fingerprint(fingerprint)
+            idf = self._current_idf()
+
+            for key, indices in grouped.items():
+                partition = self._partitions.get(key)
+                if partition is None or not partition.tfs:
+                    continue
+
+                # Choice questions: exact content-token match only
+                if key[1] in CHOICE_TYPES:
+                    for idx in indices:
+                        row = partition.token_rows.get(content_tokens(questions[idx].get("labelText", "")))
+                        if row is not None:
+                            found[idx] = (partition.answers[row], 1.0, partition.labels[row])
+                    continue
+
+                queries = self._vectorize([term_frequencies(questions[idx].get("labelText", "")) for idx in indices], idf)
+                matrix = self._matrix(partition, idf)
+
+                # Block-wise scoring keeps the (queries x rows) temporary bounded
+                best_scores = np.full(len(indices), -1.0, dtype=np.float32)
+                best_rows = np.zeros(len(indices), dtype=np.int64)
+                for start in range(0, matrix.shape[0], SEARCH_BLOCK_ROWS):
+                    scores = queries @ matrix[start:start + SEARCH_BLOCK_ROWS].T
+                    block_best = scores.argmax(axis=1)
+                    block_scores = scores[np.arange(len(indices)), block_best]
+                    better = block_scores > best_scores
+                    best_scores[better] = block_scores[better]
+                    best_rows[better] = block_best[better] + start
+
+                for idx, score, row in zip(indices, best_scores, best_rows):
+                    if score < self.threshold:
+                        continue
+                    if _critical_tokens(content_tokens(questions[idx].get("labelText", ""))) != _critical_tokens(partition.tokens[row]):
+                        continue
+                    found[idx] = (partition.answers[row], float(score), partition.labels[row])
+
+        candidates = sum(len(indices) for indices in grouped.values())
+        if found:
+            metrics.increment("semantic_index_requests_total", len(found), outcome="hit")
+        if candidates > len(found):
+            metrics.increment("semantic_index_requests_total", candidates - len(found), outcome="miss")
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": self._size, "partitions": len(self._partitions), "threshold": self.threshold, "dim": EMBEDDING_DIM}
+
+
+semantic_index = SemanticIndex()
+
+
+if __name__ == "__main__":
+
+    # Lookup latency benchmark at 100k stored questions (in-memory, nothing persisted).
+    # Uses a non-choice type so every lookup goes through the TF-IDF matmul path.
+    import random
+
+    STORED = 100_000
+    BATCH = 25
+    FINGERPRINT = "benchmark"
+
+    subjects = ["visa sponsorship", "work authorization", "relocation", "remote work", "background check", "security clearance",
+                "non-compete agreement", "veteran status", "disability status", "travel", "overtime", "night shifts", "drug test",
+                "driver's license", "certification", "bachelor's degree", "master's degree", "years of experience", "on-call rotation"]
+    templates = ["Do you now or in the future require {s} at {c}?", "Are you willing to undergo {s} for {c}?", "Please confirm your {s} ({c})",
+                 "Will you require {s} for this role at {c}?", "Do you have {s}? ({c})", "Are you comfortable with {s} at {c}?",
+                 "Is {s} something you can accommodate at {c}?", "Select your {s} for {c}"]
+    companies = [f"company{i}" for i in range(20000)]
+    yes_no = ["Yes", "No"]
+
+    def make_question(rng: random.Random) -> Dict[str, Any]:
+        label = rng.choice(templates).format(s=rng.choice(subjects), c=rng.choice(companies))
+        return {"labelText": label, "type": "number", "options": []}
+
+    rng = random.Random(7)
+    index = SemanticIndex(persist=False)
+
+    started = time.perf_counter()
+    for _ in range(STORED):
+        index.add(make_question(rng), rng.choice(yes_no), FINGERPRINT)
+    print(f"Indexed {STORED:,} questions ({index.stats()['entries']:,} distinct labels) in {time.perf_counter() - started:.2f}s (single partition, worst case)")
+
+    started = time.perf_counter()
+    index.search([make_question(rng)], FINGERPRINT)
+    print(f"First search (builds TF-IDF matrix): {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    for batch in (1, BATCH):
+        timings = []
+        for _ in range(20):
+            queries = [make_question(rng) for _ in range(batch)]
+            started = time.perf_counter()
+            index.search(queries, FINGERPRINT)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(f"Batch of {batch:>2}: p50 {timings[len(timings) // 2] * 1000:.2f} ms, p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.2f} ms")
+
+    probe = SemanticIndex(persist=False)
+    probe.add({"labelText": "Do you now or in the future require visa sponsorship?", "type": "radio", "options": yes_no}, "No", FINGERPRINT)
+    for label in ("Will you now or in the future need visa sponsorship?", "Will you need sponsorship?", "Do you currently require visa sponsorship?", "Are you legally authorized to work in the US?"):
+        match = probe.search([{"labelText": label, "type": "radio", "options": yes_no}], FINGERPRINT)
+        print(f"{label!r} → {match.get(0)}")
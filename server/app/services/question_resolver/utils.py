@@ -1,33 +1,18 @@
 from typing import List, Dict, Optional, Any
 import re
 import json
-from config.env_config import USER_DATA_FILE
 from modules.utils.helpers import safe_load_json
+from app.services.question_resolver.path_query import compile_path, extract_paths
 
-def _parse_path(path: str) -> list:
+def _parse_path(path: str) -> tuple:
     """
     Convert:
-      "a.b[0].c" → ["a", "b", 0, "c"]
-      "work[experience][0].title" → ["work", "experience", 0, "title"]
-    """
-    if not isinstance(path, str):
-        raise TypeError("Path must be a string")
-
-    # Convert bracket notation to dot notation
-    # e.g. a[b][0].c → a.b.0.c
-    _PATH_REGEX = re.compile(r"\[(.*?)\]")
-    normalized = _PATH_REGEX.sub(lambda m: f".{m.group(1)}", path)
-
-    parts = []
-    for part in normalized.split("."):
-        if not part:
-            continue
-        if part.isdigit():
-            parts.append(int(part))
-        else:
-            parts.append(part)
+      "a.b[0].c" → ("a", "b", 0, "c")
+      "work[experience][0].title" → ("work", "experience", 0, "title")
 
-    return parts
+    Compiled once per distinct path (see `path_query.compile_path`).
+    """
+    return compile_path(path)
 
 def resolve_nested_key( obj: Dict[str, Any], path: str, *, fallback: Optional[Any] = None, value: Optional[Any] = None ) -> Any:
     """
@@ -125,43 +110,16 @@ def delete_nested_key(obj: Dict[str, Any], path: str) -> None:
             return
 
 def get_user_db() -> Dict[str, Any]:
-
-    with open(USER_DATA_FILE, "r", encoding="utf-8") as f:
-        user_db: Dict[str, Any] = json.load(f)
-
-    DROP_PATHS = [
-        "password",
-        "secondaryPassword",
-        "profile_html_card",
-        "addresses",
-        "primaryAddressContainerIdx",
-        "llmAddressSelectionEnabled",
-        "resumes",
-        "primaryResumeContainerIdx",
-        "llmResumeSelectionEnabled",
-        "enabledUserSkillsSelection",
-        "enabledJobSkillsSelection",
-        "enabledRelatedSkillsSelection",
-        "useSalaryRange",
-    ]
-
-    for path in DROP_PATHS:
-        delete_nested_key(user_db, path)
-
-    return user_db
+    """
+    Stripped user DB (see `profile_store.DROP_PATHS`), re-read only when userData.json changes.
+    Shared across callers — do not mutate.
+    """
+    from app.services.profile_store import profile_store
+    return profile_store.current().user_db
 
 def extract_db_snippets(user_db: Dict, keys: List[str]) -> Dict[str, Any]:
-    snippets = {}
-
-    for key in keys or []:
-        try:
-            # You already have similar logic elsewhere
-            value = resolve_nested_key(user_db, key)
-            snippets[key] = value
-        except Exception:
-            continue
-
-    return snippets
+    # One traversal for all keys (shared prefixes walked once, compiled paths cached)
+    return extract_paths(user_db, keys or [])
 
 def filter_and_normalize(value):
     if value is None:
@@ -308,4 +266,34 @@ def get_parsed_response(raw_response):
     # Filter and Normalize:
     value = filter_and_normalize(value)
 
-    return value
\ No newline at end of file
+    return value
+
+def get_packed_parsed_response(raw_response, question_ids: List[str]) -> Dict[str, Any]:
+    """
+    { questionId: value } for every expected id present in a packed response.
+    Missing ids are left out so the caller can re-ask only those.
+    """
+    if isinstance(raw_response, dict):
+        parsed: dict | None = raw_response
+    else:
+        parsed: dict | None = convert_jsonic_response_to_dict(raw_response)
+
+    if parsed is None:
+        return {}
+
+    values = {}
+    for question_id in question_ids:
+        if question_id not in parsed:
+            continue
+        value = parsed[question_id]
+
+        # Tolerate { "<id>": { "value": ... } }
+        if isinstance(value, dict):
+            value = next(iter(value.values()), None)
+
+        if isinstance(value, (str, list)):
+            value = get_normalized_value(value)
+
+        values[question_id] = filter_and_normalize(value)
+
+    return values
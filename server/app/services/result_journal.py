@@ -0,0 +1,301 @@
+# server\app\services\result_journal.py
+# -----------------------------
+# Imports
+# -----------------------------
+from config.env_config import APP_DATA_DIR
+from app.services.database import upsert_jobs_batch
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import threading
+import sqlite3
+import random
+import requests
+import json
+import time
+
+
+# -----------------------------
+# Config
+# -----------------------------
+JOURNAL_FILE = APP_DATA_DIR / "result_journal.sqlite3"
+FLUSH_BATCH_SIZE = 25               # Rows sent per `upsert_jobs_batch` call
+FLUSH_INTERVAL = 2.0                # Seconds between idle flusher wake-ups
+FLUSH_BACKOFF_CAP = 60.0            # Seconds; upper bound between failed flush attempts
+MAX_REJECTIONS = 3                  # A row Supabase rejected (4xx) this many times on its own → dead letter
+STALL_AFTER = 300.0                 # Seconds the oldest pending row may wait before the journal counts as stalled
+TRANSIENT_STATUS_CODES = {408, 429} # 4xx answers that are retried like outages, never dead-lettered
+
+
+class JournalStalledError(RuntimeError):
+    """
+    The journal holds rows it has not been able to flush for `STALL_AFTER` seconds.
+    Results are still recorded locally; Supabase is behind.
+    """
+
+
+def _is_rejection(error: Exception) -> bool:
+    """
+    True when Supabase answered and refused the payload (4xx) — retrying the same
+    rows will not help. Outages, timeouts and 5xx are transient.
+    """
+    cause = error.__cause__ if error.__cause__ is not None else error
+    response = getattr(cause, "response", None)
+    if not isinstance(cause, requests.HTTPError) or response is None:
+        return False
+    return 400 <= response.status_code < 500 and response.status_code not in TRANSIENT_STATUS_CODES
+
+
+class ResultJournal:
+    """
+    Durable write-behind journal for job result writes.
+
+    `append()` commits the upsert payload to a local SQLite file and returns
+    immediately; a background flusher drains the journal to Supabase in batches
+    (via `upsert_jobs_batch`) with jittered backoff on failure. Rows are only
+    deleted after Supabase acknowledges them, so a crash or network outage never
+    loses a result — `replay()` drains whatever is left on the next startup.
+
+    A batch Supabase rejects (4xx) is split and sent row by row, so one bad
+    payload cannot hold back every later result. `attempts` counts those
+    rejections; a row rejected `MAX_REJECTIONS` times on its own is moved to the
+    `dead_letter` table (see `stats()`), and later rows for the same job wait
+    behind it until then so writes never apply out of order.
+    """
+
+    def __init__(self, path: Path = JOURNAL_FILE, batch_size: int = FLUSH_BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._connection: sqlite3.Connection | None = None     # Opened on first use, see `_conn`
+        self._open_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher: threading.Thread | None = None
+        self._failures = 0
+        self._last_error: Optional[str] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Directory, file and schema are created on first use, not at import
+        conn = self._connection
+        if conn is None:
+            with self._open_lock:
+                conn = self._connection
+                if conn is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS journal (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            job_key TEXT NOT NULL,
+                            payload TEXT NOT NULL,
+                            attempts INTEGER NOT NULL DEFAULT 0,
+                            last_error TEXT,
+                            created_at REAL NOT NULL
+                        )
+                    """)
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS dead_letter (
+                            id INTEGER PRIMARY KEY,
+                            job_key TEXT NOT NULL,
+                            payload TEXT NOT NULL,
+                            attempts INTEGER NOT NULL,
+                            last_error TEXT,
+                            created_at REAL NOT NULL,
+                            dead_at REAL NOT NULL
+                        )
+                    """)
+                    self._connection = conn
+        return conn
+
+    # -----------------------------
+    # Write path
+    # -----------------------------
+    def append(self, job_key: str, payload: Dict[str, Any]) -> int:
+        """
+        Record one upsert row ({ key, fingerprint, force_data, soft_data, source }).
+        Raises on local I/O failure only.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO journal (job_key, payload, created_at) VALUES (?, ?, ?)",
+                (job_key, json.dumps(payload), time.time())
+            )
+        self._wakeup.set()
+        return cur.lastrowid
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def pending_keys(self) -> List[str]:
+        """
+        Jobs whose result has not reached Supabase yet (their remote row is still `processing`).
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT job_key FROM journal")]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending, oldest, rejected = self._conn.execute(
+                "SELECT COUNT(*), MIN(created_at), COALESCE(SUM(attempts > 0), 0) FROM journal"
+            ).fetchone()
+            dead = self._conn.execute(
+                "SELECT job_key, attempts, last_error, dead_at FROM dead_letter ORDER BY id DESC LIMIT 20"
+            ).fetchall()
+            dead_count = self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
+        return {
+            "pending": pending,
+            "oldestPendingSeconds": round(time.time() - oldest, 1) if oldest else None,
+            "rejectedPending": rejected,
+            "consecutiveFlushFailures": self._failures,
+            "lastError": self._last_error,
+            "deadLetterCount": dead_count,
+            "deadLetter": [
+                {"jobKey": job_key, "attempts": attempts, "lastError": last_error, "deadAt": dead_at}
+                for job_key, attempts, last_error, dead_at in dead
+            ],
+        }
+
+    def raise_if_stalled(self) -> None:
+        with self._lock:
+            oldest = self._conn.execute("SELECT MIN(created_at) FROM journal").fetchone()[0]
+        if oldest is not None and time.time() - oldest > STALL_AFTER:
+            raise JournalStalledError(
+                f"Result journal stalled for {time.time() - oldest:.0f}s ({self.pending_count()} pending): {self._last_error}"
+            )
+
+    # -----------------------------
+    # Drain path
+    # -----------------------------
+    def _next_batch(self) -> List[Tuple[int, str, Dict[str, Any], int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, job_key, payload, attempts FROM journal ORDER BY id LIMIT ?", (self.batch_size,)
+            ).fetchall()
+        return [(row_id, job_key, json.loads(payload), attempts) for row_id, job_key, payload, attempts in rows]
+
+    def _delete(self, ids: List[int]) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM journal WHERE id IN ({','.join('?' * len(ids))})", ids)
+
+    def _mark_failed(self, ids: List[int], error: Exception, rejected: bool) -> None:
+        self._last_error = f"{error}: {error.__cause__}" if error.__cause__ is not None else str(error)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE journal SET attempts = attempts + ?, last_error = ? WHERE id IN ({','.join('?' * len(ids))})",
+                (1 if rejected else 0, self._last_error, *ids)
+            )
+
+    def _dead_letter(self, row_id: int) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "INSERT INTO dead_letter (id, job_key, payload, attempts, last_error, created_at, dead_at) "
+                "SELECT id, job_key, payload, attempts, last_error, created_at, ? FROM journal WHERE id = ?",
+                (time.time(), row_id)
+            )
+            self._conn.execute("DELETE FROM journal WHERE id = ?", (row_id,))
+            self._conn.execute("COMMIT")
+
+    def _flush_rows(self, batch: List[Tuple[int, str, Dict[str, Any], int]]) -> int:
+        """
+        Row-by-row drain of a rejected batch: good rows go through, each rejected
+        row is counted (and dead-lettered after `MAX_REJECTIONS`), and later rows of
+        a job with a held-back row wait. Transient errors stop the pass and raise.
+        """
+        flushed = 0
+        held_keys = set()
+        for row_id, job_key, payload, attempts in batch:
+            if job_key in held_keys:
+                continue
+            try:
+                upsert_jobs_batch([payload])
+            except Exception as e:
+                rejected = _is_rejection(e)
+                self._mark_failed([row_id], e, rejected)
+                if not rejected:
+                    raise
+                if attempts + 1 >= MAX_REJECTIONS:
+                    self._dead_letter(row_id)
+                    print(f"☠️ Journal row for {job_key} rejected {attempts + 1}x by Supabase → dead letter: {e}")
+                else:
+                    held_keys.add(job_key)
+                continue
+            self._delete([row_id])
+            flushed += 1
+        return flushed
+
+    def flush_once(self) -> int:
+        """
+        Send the oldest batch. Returns rows flushed (dead-lettered rows count as
+        drained); raises on transient failure or when nothing could be drained.
+        """
+        batch = self._next_batch()
+        if not batch:
+            return 0
+
+        ids = [row_id for row_id, *_ in batch]
+        try:
+            upsert_jobs_batch([payload for _, _, payload, _ in batch])
+        except Exception as e:
+            if not _is_rejection(e):
+                self._mark_failed(ids, e, rejected=False)
+                raise
+            # Isolate the bad row(s) instead of retrying the whole batch forever
+            self._flush_rows(batch)
+            remaining = len(self._remaining_ids(ids))
+            if remaining == len(batch):
+                raise
+            return len(batch) - remaining
+
+        self._delete(ids)
+        return len(ids)
+
+    def _remaining_ids(self, ids: List[int]) -> List[int]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute(f"SELECT id FROM journal WHERE id IN ({','.join('?' * len(ids))})", ids)]
+
+    def replay(self) -> int:
+        """
+        Drain everything left over from a previous run. Stops at the first failed
+        batch (the flusher keeps retrying afterwards).
+        """
+        flushed = 0
+        while True:
+            try:
+                count = self.flush_once()
+            except Exception as e:
+                print(f"⚠️ Journal replay interrupted ({self.pending_count()} pending): {e}")
+                break
+            if not count:
+                break
+            flushed += count
+        if flushed:
+            print(f"📜 Journal replay complete: {flushed} result(s) flushed to Supabase")
+        return flushed
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            try:
+                while self.flush_once():
+                    pass
+                self._failures = 0
+            except Exception as e:
+                self._failures += 1
+                delay = random.uniform(0, min(FLUSH_BACKOFF_CAP, self.flush_interval * (2 ** self._failures)))
+                print(f"⚠️ Journal flush failed (attempt {self._failures}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def start(self) -> None:
+        if self._flusher and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._run, name="result-journal-flusher", daemon=True)
+        self._flusher.start()
+
+
+result_journal = ResultJournal()
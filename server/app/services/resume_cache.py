@@ -0,0 +1,171 @@
+# server\app\services\resume_cache.py
+# -----------------------------
+# Imports
+# -----------------------------
+from config.env_config import APP_DATA_DIR
+from app.services.metrics import metrics
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+
+
+# -----------------------------
+# Config
+# -----------------------------
+RESUME_CACHE_FILE = APP_DATA_DIR / "resume_cache.sqlite3"
+RESUME_CACHE_TTL = 30 * 24 * 60 * 60    # Seconds a decision stays valid
+RESUME_CACHE_MAX_ENTRIES = 5000         # LRU bound (least recently used rows are evicted first)
+
+
+def _normalize_text(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold() or None
+    return value
+
+
+def normalize_clues(clues: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Canonical form of `ResumeMatchCluesModel` content: whitespace/case folded,
+    empty fields dropped, location lists de-duplicated and sorted.
+    """
+    normalized: Dict[str, Any] = {}
+    for field, value in clues.items():
+        if isinstance(value, list):
+            value = sorted({_normalize_text(str(v)) for v in value if v}) or None
+            if value and len(value) == 1:
+                value = value[0]
+        else:
+            value = _normalize_text(value)
+        if value:
+            normalized[field] = value
+    return normalized
+
+
+def resumes_fingerprint(resumes: List[Dict[str, Any]]) -> str:
+    """
+    Hash of the `resumes` section of the user DB. Any edit (added / removed resume,
+    category, region or path change) yields a new fingerprint.
+    """
+    return hashlib.sha256(json.dumps(resumes, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")).hexdigest()
+
+
+class ResumeCache:
+    """
+    Disk-backed (SQLite) cache of best-fit-resume decisions.
+
+    Rows are keyed by a hash of the normalized job clues and store the
+    `resumes` fingerprint they were decided against; a lookup only hits when
+    that fingerprint matches the current one, and rows from an older
+    fingerprint are purged the first time a new one is seen. Entries expire
+    after `ttl` seconds and the table is trimmed least-recently-used first.
+    """
+
+    def __init__(self, path: Path = RESUME_CACHE_FILE, ttl: float = RESUME_CACHE_TTL, max_entries: int = RESUME_CACHE_MAX_ENTRIES):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._connection: sqlite3.Connection | None = None     # Opened on first use, see `_conn`
+        self._open_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # Directory, file and schema are created on first use, not at import
+        conn = self._connection
+        if conn is None:
+            with self._open_lock:
+                conn = self._connection
+                if conn is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript("""
+                        CREATE TABLE IF NOT EXISTS resume_cache (
+                            key TEXT PRIMARY KEY,
+                            resumes_fingerprint TEXT NOT NULL,
+                            clues TEXT NOT NULL,
+                            result TEXT NOT NULL,
+                            created_at REAL NOT NULL,
+                            last_used_at REAL NOT NULL,
+                            hits INTEGER NOT NULL DEFAULT 0
+                        );
+                        CREATE INDEX IF NOT EXISTS idx_resume_cache_last_used ON resume_cache (last_used_at);
+                    """)
+                    self._connection = conn
+        return conn
+
+    @staticmethod
+    def _key(normalized_clues: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(normalized_clues, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+    def _sync_fingerprint(self, fingerprint: str) -> None:
+        # Caller holds `_lock`
+        if fingerprint != self._fingerprint:
+            purged = self._conn.execute("DELETE FROM resume_cache WHERE resumes_fingerprint != ?", (fingerprint,)).rowcount
+            if purged:
+                print(f"🗑️ Resume cache invalidated: {purged} decision(s) from an older resume set")
+            self._fingerprint = fingerprint
+
+    # -----------------------------
+    # Read / write
+    # -----------------------------
+    def get(self, clues: Dict[str, Any], fingerprint: str) -> Optional[Dict[str, Any]]:
+        key = self._key(normalize_clues(clues))
+        now = time.time()
+        with self._lock:
+            self._sync_fingerprint(fingerprint)
+            row = self._conn.execute(
+                "SELECT result, created_at FROM resume_cache WHERE key = ? AND resumes_fingerprint = ?",
+                (key, fingerprint)
+            ).fetchone()
+            if row and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM resume_cache WHERE key = ?", (key,))
+                row = None
+            if row:
+                self._conn.execute("UPDATE resume_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+
+        metrics.increment("resume_cache_requests_total", outcome="hit" if row else "miss")
+        return json.loads(row[0]) if row else None
+
+    def put(self, clues: Dict[str, Any], fingerprint: str, result: Dict[str, Any]) -> None:
+        normalized = normalize_clues(clues)
+        now = time.time()
+        with self._lock:
+            self._sync_fingerprint(fingerprint)
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO resume_cache (key, resumes_fingerprint, clues, result, created_at, last_used_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (self._key(normalized), fingerprint, json.dumps(normalized), json.dumps(result), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # Caller holds `_lock`
+        self._conn.execute("DELETE FROM resume_cache WHERE created_at < ?", (now - self.ttl,))
+        self._conn.execute(
+            """
+            DELETE FROM resume_cache WHERE key IN (
+                SELECT key FROM resume_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+
+    def clear(self) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM resume_cache").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, hits = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM resume_cache").fetchone()
+        return {"entries": entries, "hits": hits, "ttl_seconds": self.ttl, "max_entries": self.max_entries}
+
+
+resume_cache = ResumeCache()
@@ -1,13 +1,22 @@
 # app/services/run_jobs.py
-from typing import Literal, List, Dict, Optional, Any
+from typing import Literal, List, Dict, Optional, Any, Callable
 from app.services.shared import automation_controller
 import time
 import re
+import queue
+from collections import OrderedDict
 import threading
+from dataclasses import dataclass, field
 from enum import Enum
 from urllib.parse import urlparse
 from datetime import datetime, timezone
-from app.services.database import upsert_job, fetch_and_lock_next_job, reset_processing_jobs_on_startup
+from app.services.database import fetch_and_lock_next_jobs, release_job_leases, renew_job_leases, reclaim_expired_leases
+from app.services.result_journal import result_journal
+from app.services.job_mirror import job_mirror
+from app.services.timeout_model import latency_model, get_hostname
+from app.services.lookahead import lookahead_resolver
+from app.services.job_scheduler import PriorityScheduler
+from app.services.metrics import metrics
 from pprint import pprint
 from modules.breakpoint_notifier.breakpoint_notifier import BreakpointNotifier
 from config.env_config import FAILURE_ACTION
@@ -18,6 +27,14 @@ from config.env_config import FAILURE_ACTION
 DEFAULT_JOB_TIMEOUT = 5 * 60  # 5 minutes
 MAX_SUBSEQUENT_RUN_JOBS_FAILURE_ALLOWED = 3  # max attempts for CONTINUE mode
 MAX_SUBSEQUENT_EXECUTION_FAILURES_ALLOWED = 5
+LEASE_BATCH_SIZE = 5  # jobs locked per round-trip into the local lease buffer (also the scheduler's choice window)
+LEASE_REFILL_THRESHOLD = 2  # refill in background once the buffer drops to this size
+LEASE_TTL = 90  # seconds a lease stays valid without a heartbeat
+LEASE_HEARTBEAT_INTERVAL = 30  # seconds between lease renewals (must be well below LEASE_TTL)
+LEASE_RECLAIM_EVERY = 10  # heartbeats between sweeps for other runners' expired leases
+NON_FATAL_REASONS = {'automation_already_running', 'stale_result_ignored'}  # failed outcomes that leave the chain running
+MAX_FINISHED_TRACKED = 512  # finished job keys / fingerprints remembered per chain to recognise stale result posts
+RESULT_WAIT_TIMEOUT = 15  # seconds `/set-job-execution-result` waits for the runner thread's outcome before answering "queued"
 
 PLATFORM_TIMEOUTS = [
     # Workday is slow
@@ -56,6 +73,21 @@ class FailureAction(Enum):
     ALERT_STOP = "ALERT_STOP"
     SILENT_STOP = "SILENT_STOP"
 
+class JobEventType(Enum):
+    START = "start"
+    RESULT = "result"
+    TIMEOUT = "timeout"
+    STOP = "stop"
+
+
+@dataclass
+class JobEvent:
+    type: JobEventType
+    payload: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.monotonic)
+    handled: threading.Event = field(default_factory=threading.Event)   # Set once `outcome` is known
+    outcome: Dict[str, Any] | None = None
+
 
 '''
 ======================================================================
@@ -67,6 +99,11 @@ def resolve_job_timeout(apply_url: str) -> int:
     if not apply_url:
         return DEFAULT_JOB_TIMEOUT
 
+    # Learned from past completions on this host (None until enough samples)
+    learned_timeout = latency_model.learned_timeout(apply_url)
+    if learned_timeout is not None:
+        return learned_timeout
+
     hostname = urlparse(apply_url).hostname or ""
 
     for pattern, timeout in PLATFORM_TIMEOUTS:
@@ -91,6 +128,9 @@ def _validate_enum(value: str, enum_cls: Enum, field_name: str):
 def update_database(job_key: str, fingerprint: str = None, application_status: ApplicationStatus = None, execution_result: ExecutionResult = None, soft_update_payload: dict | None = None, source: str | None = None, timeout: int = 10):
     """
     Update one or both of data.applicationStatus and data.executionResult for a single job row.
+    The write is journaled locally and flushed to Supabase in the background (see `result_journal`).
+    Raises on local I/O failure, or `JournalStalledError` (after journaling) when the journal
+    has not been able to reach Supabase for a while.
     """
     force_update_payload = {}
 
@@ -111,52 +151,119 @@ def update_database(job_key: str, fingerprint: str = None, application_status: A
     if not force_update_payload:
         raise ValueError("Nothing to update. Provide at least one of status or result.")
 
-    upsert_job(
-        job_key=job_key,
-        fingerprint=fingerprint,
-        force_update=force_update_payload,
-        soft_update=soft_update_payload,
-        source=source,
-        timeout=timeout
-    )
+    # Write-behind: record locally, the journal flusher drains to Supabase.
+    with metrics.span("db_write", job_key=job_key):
+        result_journal.append(job_key, {
+            "key": job_key,
+            "fingerprint": fingerprint,
+            "force_data": force_update_payload,
+            "soft_data": soft_update_payload or {},
+            "source": source
+        })
 
-    print(f"✅ Updated → {job_key}: {force_update_payload}")
+        job_mirror.apply_update(job_key, force_update_payload)
+
+    print(f"✅ Journaled → {job_key}: {force_update_payload}")
+
+    # The result is safe locally either way; surface a journal that stopped draining
+    # (Supabase down / rejecting) as a database failure so the chain's failure policy applies.
+    result_journal.raise_if_stalled()
 
 
 class Jobs:
-    def __init__(self, runner_id: str):
+    """
+    Job chain driven by a single runner thread.
+
+    Results, watchdog timeouts, start and stop commands are queued as `JobEvent`s
+    and every state transition runs on the runner thread, one event at a time.
+    HTTP handlers and timers only enqueue, so they return immediately and two
+    finish events can never race on `automation_controller` state. Chain
+    outcomes are pushed to the UI through `notify` ("all_jobs_completed" /
+    "jobs_stopped").
+    """
+
+    def __init__(self, runner_id: str, notify: Callable[[str], None] | None = None):
         self.runner_id = runner_id
+        self.notify = notify or (lambda message: None)
         self.current_job = None
+        self.current_job_started_at: float | None = None
         self.chain_enabled = False
         self.current_subsequent_execution_failure_count = 0
         self._execution_timer = None
         self.failure_action = FailureAction(FAILURE_ACTION)
-        reset_processing_jobs_on_startup()
+        self._lease_buffer = PriorityScheduler()  # pops highest expected-value-per-minute job first
+        self._lease_lock = threading.Lock()
+        self._refill_thread: threading.Thread | None = None
+        self._recovered = threading.Event()       # Runner thread waits for `recover()` before leasing
         self.breakpoint_notifier = BreakpointNotifier()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="lease-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+        self._events: queue.Queue[JobEvent] = queue.Queue()
+        self.last_transition_seconds: float | None = None  # result/timeout received → next job started
+        self._finished_in_chain: "OrderedDict[str, None]" = OrderedDict()  # runner thread only
+        self._runner_thread = threading.Thread(target=self._run_loop, name="job-runner", daemon=True)
+        self._runner_thread.start()
+
+    # -----------------------------
+    # Startup recovery
+    # -----------------------------
+    def recover(self) -> None:
+        """
+        Network-bound startup work: drain the result journal and take back this runner's
+        stale leases. Run off the request path (after the server is listening); queued
+        events wait for it, so no job is leased before recovery finished.
+        """
+        try:
+            result_journal.replay()
+            result_journal.start()
+            reclaim_expired_leases(self.runner_id, exclude=result_journal.pending_keys())
+        except Exception as e:
+            print(f"⚠️ Startup recovery failed: {e}")
+        finally:
+            self._recovered.set()
+
+    # -----------------------------
+    # Lease heartbeat
+    # -----------------------------
+    def _held_lease_keys(self) -> List[str]:
+        """
+        Buffered + running jobs, and finished jobs whose result is still in the journal
+        (their remote row stays `processing` until the flush lands, so the lease must too).
+        """
+        with self._lease_lock:
+            keys = [job["key"] for job in self._lease_buffer]
+        current_job = self.current_job
+        if current_job:
+            keys.append(current_job["key"])
+        try:
+            keys.extend(key for key in result_journal.pending_keys() if key not in keys)
+        except Exception as e:
+            print(f"⚠️ Could not read journaled job keys: {e}")
+        return keys
 
-    def _start_execution_timeout(self, job_key: str, timeout: int):
-        self._cancel_execution_timeout()
-
-        def on_timeout():
-
-            print(f"『⩇⩇:⩇⩇』 Job timed out: {job_key}")
-
+    def _heartbeat_loop(self) -> None:
+        beats = 0
+        while True:
+            time.sleep(LEASE_HEARTBEAT_INTERVAL)
+            beats += 1
+            if beats % LEASE_RECLAIM_EVERY == 0:
+                try:
+                    reclaim_expired_leases(self.runner_id, include_own=False, exclude=result_journal.pending_keys())
+                except Exception as e:
+                    print(f"⚠️ Expired lease sweep failed: {e}")
+            keys = self._held_lease_keys()
+            if not keys:
+                continue
             try:
-                update_database(
-                    job_key, 
-                    execution_result=ExecutionResult.FAILED,
-                    application_status=ApplicationStatus.FAILED
-                )
+                renew_job_leases(self.runner_id, keys, LEASE_TTL)
             except Exception as e:
-                print(f"Failed to update executionResult on timeout: {e}")
+                print(f"⚠️ Lease heartbeat failed for {len(keys)} job(s): {e}")
 
-            # Continue pipeline
-            automation_controller.close_llm_session()
-            automation_controller.close_automation_session()
-            self.current_job = None
-            print("------------------- End 🔸 Timeout ---------------------------")
-            if self.chain_enabled:
-                self.run_next_job() # Continue chain
+    def _start_execution_timeout(self, job_key: str, timeout: int, apply_url: str | None = None):
+        self._cancel_execution_timeout()
+
+        def on_timeout():
+            self._events.put(JobEvent(JobEventType.TIMEOUT, {"job_key": job_key, "apply_url": apply_url}))
 
         self._execution_timer = threading.Timer(timeout, on_timeout)
         self._execution_timer.daemon = True
@@ -167,8 +274,194 @@ class Jobs:
             self._execution_timer.cancel()
             self._execution_timer = None
 
-    def start(self):
-        return self.run_next_job()
+    # -----------------------------
+    # Lease buffer
+    # -----------------------------
+    def _refill_lease_buffer(self) -> None:
+        with self._lease_lock:
+            missing = LEASE_BATCH_SIZE - len(self._lease_buffer)
+        if missing <= 0:
+            return
+        try:
+            leased = fetch_and_lock_next_jobs(self.runner_id, missing)
+        except Exception as e:
+            print(f"⚠️ Failed to refill lease buffer: {e}")
+            return
+        try:
+            renew_job_leases(self.runner_id, [job["key"] for job in leased], LEASE_TTL)
+        except Exception as e:
+            # The next heartbeat stamps them (buffered keys are renewed); peers wait out LEASELESS_GRACE meanwhile
+            print(f"⚠️ Failed to stamp leases on {len(leased)} job(s): {e}")
+        for job in leased:
+            job_mirror.apply_update(job["key"], {"executionResult": ExecutionResult.PROCESSING.value})
+        with self._lease_lock:
+            self._lease_buffer.extend(leased)
+        if leased:
+            print(f"📥 Leased {len(leased)} job(s) → buffer size {len(self._lease_buffer)}")
+
+    def _refill_lease_buffer_async(self) -> None:
+        with self._lease_lock:
+            if self._refill_thread and self._refill_thread.is_alive():
+                return
+            self._refill_thread = threading.Thread(target=self._refill_lease_buffer, daemon=True)
+            self._refill_thread.start()
+
+    def _wait_for_refill(self) -> None:
+        refill_thread = self._refill_thread
+        if refill_thread and refill_thread.is_alive():
+            refill_thread.join()
+
+    def _next_leased_job(self) -> Optional[Dict[str, Any]]:
+        """
+        Pop the next locked job from the local buffer. Only blocks on the database
+        when the buffer is empty; otherwise a background refill keeps it topped up.
+        """
+        self._wait_for_refill()
+        with self._lease_lock:
+            job = self._lease_buffer.pop() if self._lease_buffer else None
+
+        if job is None:
+            self._refill_lease_buffer()
+            with self._lease_lock:
+                job = self._lease_buffer.pop() if self._lease_buffer else None
+
+        with self._lease_lock:
+            low = len(self._lease_buffer) <= LEASE_REFILL_THRESHOLD
+        if job is not None and low:
+            self._refill_lease_buffer_async()
+
+        return job
+
+    def _peek_next_leased_job(self) -> Optional[Dict[str, Any]]:
+        self._wait_for_refill()
+        with self._lease_lock:
+            return self._lease_buffer.peek()
+
+    def release_unused_leases(self) -> None:
+        self._wait_for_refill()
+        with self._lease_lock:
+            keys = [job["key"] for job in self._lease_buffer]
+            self._lease_buffer.clear()
+        if not keys:
+            return
+        failed = release_job_leases(keys)
+        for key in set(keys) - set(failed):
+            job_mirror.apply_update(key, {"executionResult": ExecutionResult.PENDING.value})
+            lookahead_resolver.discard(key)
+        print(f"🔓 Released {len(keys) - len(failed)}/{len(keys)} unused lease(s)")
+
+    # -----------------------------
+    # Event loop
+    # -----------------------------
+    def start(self) -> Dict[Literal['success', 'reason'], bool | str]:
+        self._events.put(JobEvent(JobEventType.START))
+        return {'success': True, 'reason': 'queued'}
+
+    def stop(self) -> None:
+        self._events.put(JobEvent(JobEventType.STOP))
+
+    def submit_execution_result(self, result: ExecutionResult, key: str, fingerprint: str, soft_data: dict | None, source: str | None, wait: float = RESULT_WAIT_TIMEOUT) -> Dict[Literal['success', 'reason', 'error'], bool | str]:
+        """
+        Queue the result and wait up to `wait` seconds for the runner thread to handle it.
+        Returns the handler's outcome, or { success: True, reason: 'queued' } if it is
+        still waiting behind other events (it will be applied later).
+        """
+        event = JobEvent(JobEventType.RESULT, {
+            "result": result, "key": key, "fingerprint": fingerprint, "soft_data": soft_data, "source": source
+        })
+        self._events.put(event)
+        if event.handled.wait(wait) and event.outcome is not None:
+            return event.outcome
+        return {'success': True, 'reason': 'queued'}
+
+    def _handle_timeout(self, job_key: str, apply_url: str | None) -> Dict[Literal['success', 'reason'], bool | str]:
+        # Stale timer (job already finished and the chain moved on)
+        if not self.current_job or self.current_job["key"] != job_key:
+            return {'success': True, 'reason': 'stale_timeout_ignored'}
+
+        print(f"『⩇⩇:⩇⩇』 Job timed out: {job_key}")
+        self._mark_finished(job_key)
+        elapsed = time.monotonic() - self.current_job_started_at if self.current_job_started_at else None
+        latency_model.record_timeout(apply_url, elapsed or 0)
+        metrics.record_job_completed("timeout", job_key, apply_url, elapsed)
+
+        try:
+            update_database(job_key, execution_result=ExecutionResult.FAILED) # ApplicationStatus stays init
+        except Exception as e:
+            print(f"Failed to update executionResult on timeout: {e}")
+
+        # Continue pipeline
+        with metrics.span("teardown", job_key=job_key):
+            automation_controller.close_llm_session()
+            automation_controller.close_automation_session()
+        lookahead_resolver.discard(job_key)
+        self.current_job = None
+        metrics.set_active_job(None)
+        print("------------------- End 🔸 Timeout ---------------------------")
+        return {'success': True, 'reason': 'continue_chain'}
+
+    def _handle_stop(self) -> Dict[Literal['success', 'reason'], bool | str]:
+        self.chain_enabled = False
+        threading.Thread(target=self.release_unused_leases, daemon=True).start()
+        return {'success': True, 'reason': 'chain_disabled'}
+
+    def _mark_finished(self, *keys: str | None) -> None:
+        # Job keys / result fingerprints finished in this chain (late posts for them are stale)
+        for key in keys:
+            if key:
+                self._finished_in_chain[key] = None
+                self._finished_in_chain.move_to_end(key)
+        while len(self._finished_in_chain) > MAX_FINISHED_TRACKED:
+            self._finished_in_chain.popitem(last=False)
+
+    def _handle_event(self, event: JobEvent) -> Dict[Literal['success', 'reason', 'error'], bool | str]:
+        if event.type == JobEventType.START:
+            if not self.chain_enabled:
+                self._finished_in_chain.clear()
+            return self.run_next_job()
+        if event.type == JobEventType.RESULT:
+            return self.set_execution_result(**event.payload)
+        if event.type == JobEventType.TIMEOUT:
+            return self._handle_timeout(**event.payload)
+        if event.type == JobEventType.STOP:
+            return self._handle_stop()
+        raise ValueError(f"Unknown job event: {event.type}")
+
+    def _run_loop(self) -> None:
+        self._recovered.wait()
+        while True:
+            event = self._events.get()
+            was_chained = self.chain_enabled or event.type == JobEventType.START
+            try:
+                outcome = self._handle_event(event)
+                event.outcome = outcome
+                event.handled.set()
+
+                # Chain transition happens here (iteratively), never by nested calls.
+                if outcome.get('reason') == 'continue_chain':
+                    outcome = self.run_next_job() if self.chain_enabled else {'success': True, 'reason': 'disabled_chain_ended_execution'}
+                    if outcome.get('reason') == 'started':
+                        self.last_transition_seconds = time.monotonic() - event.created_at
+                        print(f"⏱️ Job transition took {self.last_transition_seconds:.2f}s")
+
+            except Exception as e:
+                automation_controller.is_automation_active = False
+                print(f"❌ Fatal error handling {event.type.value} event: {e}")
+                if self.failure_action == FailureAction.ALERT_STOP:
+                    self.breakpoint_notifier.notify_and_keep_playing()
+                outcome = {'success': False, 'reason': 'fatal_error_handling_job_event', 'error': str(e)}
+                if not event.handled.is_set():
+                    event.outcome = outcome
+                    event.handled.set()
+
+            if outcome.get('reason') == 'all_jobs_completed':
+                self.chain_enabled = False
+                self.notify("all_jobs_completed")
+            elif was_chained and outcome.get('success') is False and outcome.get('reason') not in NON_FATAL_REASONS:
+                self.chain_enabled = False
+                self.notify("jobs_stopped")
+                if outcome.get('reason') or outcome.get('error'):
+                    print(f"🔸 Chain stopped: {outcome.get('reason')} {outcome.get('error', '')}".rstrip())
 
     def run_next_job(self) -> Dict[Literal['success', 'reason'], bool | str]:
         current_subsequent_run_jobs_failure_count = 0
@@ -178,7 +471,8 @@ class Jobs:
 
             # jobs -> List[ Dict[ Literal[key, data], Any ] ]
             # job -> Dict[ Literal[key, data], Any ]
-            job = fetch_and_lock_next_job(self.runner_id)
+            lease_started_at = time.perf_counter()
+            job = self._next_leased_job()
 
             if not job:
                 print("💤 No jobs available")
@@ -186,11 +480,14 @@ class Jobs:
                 return {'success': True, 'reason': 'all_jobs_completed'}
 
             self.current_job = job
+            self.current_job_started_at = time.monotonic()
             apply_url = job["data"].get("applyUrl")
+            metrics.set_active_job(job["key"], apply_url)
+            metrics.record("lease", time.perf_counter() - lease_started_at, job_key=job["key"], host=get_hostname(apply_url))
             timeout = resolve_job_timeout(apply_url)
 
             print(f"🔒 Locked job {job['key']} for execution with watchdog timer {timeout}s")
-            self._start_execution_timeout(job["key"], timeout)
+            self._start_execution_timeout(job["key"], timeout, apply_url)
 
             if apply_url:
                 success = automation_controller.open_automation_session(apply_url) # (note: autofill must be enabled)
@@ -217,6 +514,11 @@ class Jobs:
                             return {'success': False, 'reason': 'faild_to_open_automation_session'}
 
             else:
+                # Terminal FAILED: a lease left `processing` would be reclaimed and re-leased every LEASE_TTL
+                print(f"⚠️ Job {job['key']} has no applyUrl")
+                self._cancel_execution_timeout()
+                try: update_database(job['key'], execution_result=ExecutionResult.FAILED)
+                except Exception as e: print(f"Failed to mark job without applyUrl as failed: {e}")
                 if self.failure_action == FailureAction.CONTINUE:
                     automation_controller.is_automation_active = False
                     self.current_job = None
@@ -230,16 +532,24 @@ class Jobs:
 
             print("------------------- Started 🔹 Running job ---------------------------")
             self.chain_enabled = True
+            lookahead_resolver.schedule(self._peek_next_leased_job) # Pre-resolve next job's LLM lookups
             return {'success': True, 'reason': 'started'}
     
 
-    # Jobs execution result, database update, and next-job in queue execution goes here.
+    # Jobs execution result and database update go here (runs on the runner thread; the loop starts the next job).
     def set_execution_result(self, result: ExecutionResult, key: str, fingerprint: str, soft_data: dict | None, source: str | None) -> Dict[Literal['success', 'reason', 'error'], bool | str]:
 
         # Helper
         execution_failure_type: bool = False
         is_orphan = not self.chain_enabled
 
+        # Provably stale: a late / duplicate post for a job this chain already finished
+        if not is_orphan and self.current_job and key != self.current_job["key"] and (
+            key in self._finished_in_chain or (fingerprint and fingerprint in self._finished_in_chain)
+        ):
+            print(f"⚠️ Dropping stale execution result '{result.value}' for {key}: already finished (running job is {self.current_job['key']})")
+            return {'success': False, 'reason': 'stale_result_ignored'}
+
         # Fix in-flight key (incase mis-compuation or link redirection by worker)
         if not is_orphan and self.current_job: key = self.current_job["key"]
 
@@ -287,6 +597,16 @@ class Jobs:
         if not is_orphan:
             self._cancel_execution_timeout()
 
+        # --------------------------------------------------
+        # Record completion time for adaptive per-platform timeouts
+        # --------------------------------------------------
+        if not is_orphan and self.current_job and self.current_job_started_at and result != ExecutionResult.PENDING:
+            latency_model.record(self.current_job["data"].get("applyUrl"), time.monotonic() - self.current_job_started_at, outcome=result.value)
+            metrics.record_job_completed(result.value, key, self.current_job["data"].get("applyUrl"), time.monotonic() - self.current_job_started_at)
+        if not is_orphan:
+            lookahead_resolver.discard(key)
+            self._mark_finished(key, fingerprint)
+
         # Update DB, and UI. Start next Job if chain is active (current job result is not orphan)
         try:
 
@@ -337,20 +657,23 @@ class Jobs:
                     return {'success': False, 'reason': 'invalid_execution_result', 'error': f'Error: {result} is invalid execution result type enum.'}
 
             # -------------------- Update UI --------------------
-            automation_controller.close_llm_session()
-            automation_controller.goto_automation_desktop()
+            with metrics.span("teardown", job_key=key):
+                automation_controller.close_llm_session()
+                automation_controller.goto_automation_desktop()
+                if not is_orphan:
+                    automation_controller.close_automation_session()
             if is_orphan:
                 automation_controller.is_automation_active = False
                 print("------------------- End 🔹 Success ---------------------------")
                 return {"success": True, 'reason': 'oprhan_job_execution_complete'}
             else: # Represents Chain of Jobs when commanded to execute all.
-                automation_controller.close_automation_session()
                 self.current_job = None
+                metrics.set_active_job(None)
                 print("------------------- End 🔹 Success ---------------------------")
                 if self.chain_enabled:
                     if execution_failure_type: self.current_subsequent_execution_failure_count += 1
                     else: self.current_subsequent_execution_failure_count = 0
-                    return self.run_next_job() # Continue chain
+                    return {"success": True, "reason": "continue_chain"} # Runner loop starts the next job
                 else:
                     return {"success": True, "reason": "disabled_chain_ended_execution"}
 
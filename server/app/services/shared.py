@@ -1,46 +1,70 @@
 # app/services/shared.py
 import time
-import pyautogui
 from config.env_config import BROWSER_PATH, CHROME_PATH, ENFORCE_CONSOLE_PASTING
-from modules.browser.browser_utils import BrowserUtils
-from modules.chatgpt.chatgpt import ChatGPT
-from modules.utils.pyautogui_utils import ScreenUtility
+from app.services.metrics import metrics
 import threading
+from contextlib import contextmanager
 from urllib.parse import urlparse
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from modules.utils.pyautogui_utils import ScreenUtility
+
+# GUI / OCR stacks (pyautogui, cv2, pytesseract, skimage) are imported on first use,
+# not at server import — see `LazyAutomationController`.
 
 CHATGPT_URL = "https://chatgpt.com"
 _cleanup_lock = threading.Lock()
-screen_util = ScreenUtility(screen_resolution=pyautogui.size())
+_foreground_lock = threading.Lock()
+_init_lock = threading.Lock()
+_screen_util: "ScreenUtility | None" = None
+
+def get_screen_util() -> "ScreenUtility":
+    global _screen_util
+    if _screen_util is None:
+        import pyautogui
+        from modules.utils.pyautogui_utils import ScreenUtility
+        _screen_util = ScreenUtility(screen_resolution=pyautogui.size())
+    return _screen_util
 
 class AutomationController:
 
     def __init__(self):
+        from modules.browser.browser_utils import BrowserUtils
+        from modules.chatgpt.chatgpt import ChatGPT
+
         self.current_window_num = 1
         self.is_automation_active = False
         self.last_active_service = None
+        self.llm_lock = threading.RLock()           # Serializes everything that drives the LLM desktop
+        self.foreground_llm_requests = 0            # Extension requests waiting on / holding `llm_lock`
 
         self.chatgpt = ChatGPT(browser=BrowserUtils(BROWSER_PATH))
         self.chatgpt.enforce_console_pasting = ENFORCE_CONSOLE_PASTING
+        self.chatgpt.promptChain = metrics.instrument("prompt_chain")(self.chatgpt.promptChain) # Time every promptChain, whichever service calls it
         self.automation_browser = BrowserUtils(CHROME_PATH)
 
     def goto_automation_desktop(self) -> None:
         if self.current_window_num == 1:
             return
         elif self.current_window_num == 2:
-            screen_util.switch_desktop("left", steps=1)
-            self.current_window_num = 1
-            time.sleep(1)
+            with metrics.span("desktop_switch", direction="left"):
+                get_screen_util().switch_desktop("left", steps=1)
+                self.current_window_num = 1
+                time.sleep(1)
             return
 
     def goto_llm_desktop(self) -> None:
         if self.current_window_num == 1:
-            screen_util.switch_desktop("right", steps=1)
-            self.current_window_num = 2
-            time.sleep(1)
+            with metrics.span("desktop_switch", direction="right"):
+                get_screen_util().switch_desktop("right", steps=1)
+                self.current_window_num = 2
+                time.sleep(1)
             return
         elif self.current_window_num == 2:
             return
     
+    @metrics.instrument("open_automation_session")
     def open_automation_session(self, apply_url) -> bool:
         
         # Base return
@@ -68,6 +92,7 @@ class AutomationController:
         self.is_automation_active = False
         return True
 
+    @metrics.instrument("open_llm_session")
     def open_llm_session(self, service_name) -> bool:
 
         # Base return
@@ -83,6 +108,7 @@ class AutomationController:
                 pass
             else: # Was not open for this service
                 # Reload the page
+                import pyautogui
                 pyautogui.press('f5')
                 time.sleep(2)
                 # Wait for page to settle
@@ -101,11 +127,26 @@ class AutomationController:
         self.last_active_service = service_name
         return True
 
+    @contextmanager
+    def foreground_llm(self):
+        """
+        Hold `llm_lock` for an extension request. Background work (look-ahead) yields
+        while `foreground_llm_requests` > 0, so in-flight applications go first.
+        """
+        with _foreground_lock:
+            self.foreground_llm_requests += 1
+        try:
+            with self.llm_lock:
+                yield
+        finally:
+            with _foreground_lock:
+                self.foreground_llm_requests -= 1
+
     def close_llm_session(self) -> None:
 
         if automation_controller.is_automation_active:
 
-            with _cleanup_lock:
+            with self.llm_lock, _cleanup_lock:
                 
                 if not self.chatgpt.is_session_already_open:
                     self.last_active_service = None
@@ -116,4 +157,38 @@ class AutomationController:
                 self.last_active_service = None
 
 
-automation_controller = AutomationController()
\ No newline at end of file
+class LazyAutomationController:
+    """
+    Stand-in for the `AutomationController` singleton. The real controller (two
+    `BrowserUtils`, `ChatGPT` and its promptChain script, `ScreenUtility`, and the
+    GUI/OCR imports behind them) is built on first attribute access, so importing
+    the server stays cheap. `is_initialized` can be checked without building it.
+    """
+
+    def __init__(self):
+        object.__setattr__(self, "_instance", None)
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._instance is not None
+
+    def _get(self) -> AutomationController:
+        instance = self._instance
+        if instance is None:
+            with _init_lock:
+                instance = self._instance
+                if instance is None:
+                    start = time.perf_counter()
+                    instance = AutomationController()
+                    object.__setattr__(self, "_instance", instance)
+                    print(f"🖥️ Automation controller initialized ({time.perf_counter() - start:.2f}s)")
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
+
+
+automation_controller = LazyAutomationController()
\ No newline at end of file
@@ -0,0 +1,205 @@
+# server\app\services\task_executor.py
+# -----------------------------
+# Imports
+# -----------------------------
+from app.services.event_log import event_log
+from app.services.metrics import metrics
+from typing import Any, Callable, Deque, Dict, Literal, Optional, Tuple
+from dataclasses import dataclass, field
+from collections import deque, OrderedDict
+import threading
+import hashlib
+import json
+import uuid
+import time
+
+
+# -----------------------------
+# Config
+# -----------------------------
+MAX_FINISHED_TASKS = 256            # Finished tasks kept for polling before the oldest are dropped
+
+TaskStatus = Literal["queued", "running", "done", "failed"]
+TaskResult = Tuple[Any, int]        # (JSON body, HTTP status) - what the route would have returned
+TaskFn = Callable[[], TaskResult]
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def request_fingerprint(name: str, payload: Any) -> str:
+    """
+    Stable hash of a route name + request body (key order, whitespace and case insensitive).
+    """
+    normalized = json.dumps(_normalize(payload), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{name}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Task:
+    id: str
+    name: str
+    fn: TaskFn
+    dedup_key: Optional[str] = None
+    status: TaskStatus = "queued"
+    body: Any = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "taskId": self.id,
+            "name": self.name,
+            "status": self.status,
+            "result": self.body if self.status in ("done", "failed") else None,
+            "statusCode": self.status_code,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+class TaskExecutor:
+    """
+    Single-worker FIFO executor for everything that drives `automation_controller`
+    (LLM desktop / ChatGPT tab).
+
+    Routes `submit()` a callable returning `(body, status_code)` and answer `202`
+    with the task ID right away; the worker runs tasks strictly one at a time in
+    arrival order, so the desktop is never contended and no HTTP request stays
+    open for an LLM round-trip. Completion is published on the event log
+    (`task_completed`) and kept for polling (`get()`).
+
+    Submissions carrying a `dedup_key` (see `request_fingerprint`) coalesce:
+    while a task with the same key is queued or running, identical requests
+    get that task back instead of queueing another LLM round-trip.
+    """
+
+    def __init__(self, max_finished: int = MAX_FINISHED_TASKS):
+        self.max_finished = max_finished
+        self._queue: Deque[Task] = deque()
+        self._tasks: "OrderedDict[str, Task]" = OrderedDict()
+        self._inflight: Dict[str, Task] = {}      # dedup_key -> queued / running task
+        self._cond = threading.Condition()
+        self._current: Optional[Task] = None
+        self._thread = threading.Thread(target=self._run, name="task-executor", daemon=True)
+        self._thread.start()
+
+    # -----------------------------
+    # Submission
+    # -----------------------------
+    def submit(self, name: str, fn: TaskFn, dedup_key: str | None = None) -> Task:
+        with self._cond:
+            existing = self._inflight.get(dedup_key) if dedup_key else None
+            if existing is None:
+                task = Task(id=uuid.uuid4().hex, name=name, fn=fn, dedup_key=dedup_key)
+                self._tasks[task.id] = task
+                self._queue.append(task)
+                if dedup_key:
+                    self._inflight[dedup_key] = task
+                self._cond.notify()
+
+        if existing is not None:
+            metrics.increment("task_coalesced_total", task=name)
+            print(f"🔗 Task coalesced: {name} → in-flight {existing.id[:8]}")
+            return existing
+
+        metrics.increment("task_submitted_total", task=name)
+        print(f"📥 Task queued: {name} ({task.id[:8]}), queue depth {self.queue_depth()}")
+        return task
+
+    # -----------------------------
+    # Worker
+    # -----------------------------
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                task = self._queue.popleft()
+                task.status = "running"
+                task.started_at = time.time()
+                self._current = task
+
+            error: Optional[str] = None
+            try:
+                body, status_code = task.fn()
+            except Exception as e:
+                print(f"❌ Task {task.name} ({task.id[:8]}) failed: {e}")
+                error = str(e)
+                body, status_code = {"success": False, "errors": [error]}, 500
+
+            with self._cond:
+                task.body, task.status_code, task.error = body, status_code, error
+                task.status = "failed" if error else "done"
+                task.finished_at = time.time()
+                task.fn = None  # Drop closure (request payload) once finished
+                if task.dedup_key and self._inflight.get(task.dedup_key) is task:
+                    del self._inflight[task.dedup_key]
+                self._current = None
+                self._evict_finished()
+
+            event_log.publish("task_completed", {"taskId": task.id, "name": task.name, "status": task.status, "statusCode": task.status_code})
+
+    def _evict_finished(self) -> None:
+        finished = [task_id for task_id, task in self._tasks.items() if task.status in ("done", "failed")]
+        for task_id in finished[:max(0, len(finished) - self.max_finished)]:
+            self._tasks.pop(task_id, None)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            snapshot = task.to_dict()
+            snapshot["position"] = self._position(task)
+            snapshot["queueDepth"] = len(self._queue)
+        return snapshot
+
+    def _position(self, task: Task) -> Optional[int]:
+        """
+        1-based place in line (0 = running, None = finished).
+        """
+        if task.status == "running":
+            return 0
+        if task.status != "queued":
+            return None
+        for idx, queued in enumerate(self._queue):
+            if queued is task:
+                return idx + 1
+        return None
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def pending_count(self) -> int:
+        """
+        Queued + running tasks.
+        """
+        with self._cond:
+            return len(self._queue) + (1 if self._current else 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "queueDepth": len(self._queue),
+                "running": self._current.to_dict() if self._current else None,
+                "queued": [{"taskId": task.id, "name": task.name, "createdAt": task.created_at} for task in self._queue],
+            }
+
+
+task_executor = TaskExecutor()
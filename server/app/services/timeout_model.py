@@ -0,0 +1,198 @@
+# server\app\services\timeout_model.py
+# -----------------------------
+# Imports
+# -----------------------------
+from config.env_config import APP_DATA_DIR
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+from pathlib import Path
+from bisect import bisect_left
+import threading
+import json
+import os
+
+
+# -----------------------------
+# Config
+# -----------------------------
+LATENCY_MODEL_FILE = APP_DATA_DIR / "platform_latency.json"
+
+# Histogram bucket upper bounds (seconds). The last bucket is open-ended.
+BUCKET_BOUNDS: List[int] = [15, 30, 45, 60, 90, 120, 150, 180, 240, 300, 360, 420, 480, 600, 720, 900, 1200, 1800]
+
+TIMEOUT_PERCENTILE = 0.95           # Learned timeout covers this share of past completions
+TIMEOUT_MARGIN_RATIO = 1.25         # ... multiplied by this
+TIMEOUT_MARGIN_SECONDS = 30         # ... plus this
+MIN_SAMPLES = 5                     # Below this, fall back to the static PLATFORM_TIMEOUTS table
+MIN_LEARNED_TIMEOUT = 90
+MAX_LEARNED_TIMEOUT = 20 * 60
+MODEL_VERSION = 2                   # Bump when the meaning of recorded samples changes (v2: applied + censored timeouts only)
+SUCCESS_OUTCOME = "applied"         # `ExecutionResult` value whose duration enters the histogram
+
+
+def get_hostname(url: str | None) -> str:
+    return (urlparse(url).hostname or "").lower() if url else ""
+
+
+class PlatformLatencyModel:
+    """
+    Per-hostname completion-time histograms, persisted as JSON.
+
+    Only successful completions (`applied`) go into the histogram — fast
+    failures say nothing about how long a real application takes. Timed-out
+    jobs are recorded as censored samples at the time they were cut off (the
+    real duration is at least that), so a host that keeps timing out pushes its
+    own percentile up to the current timeout and the learned timeout grows by
+    the margins instead of converging on the survivors. Once a host has
+    `MIN_SAMPLES`, its watchdog timeout becomes the `TIMEOUT_PERCENTILE`
+    sample (histogram upper bound) scaled by the margins and clamped to
+    [MIN_LEARNED_TIMEOUT, MAX_LEARNED_TIMEOUT]. Other outcomes are only counted.
+    """
+
+    def __init__(self, path: Path = LATENCY_MODEL_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"⚠️ Failed to load platform latency model: {e}")
+            return
+
+        if data.get("bounds") != BUCKET_BOUNDS or data.get("version") != MODEL_VERSION:
+            print("⚠️ Platform latency model layout changed — starting fresh")
+            return
+        self._hosts = data.get("hosts", {})
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MODEL_VERSION, "bounds": BUCKET_BOUNDS, "hosts": self._hosts}, f)
+        os.replace(tmp_path, self.path)
+
+    def _host_entry(self, hostname: str) -> Dict[str, Any]:
+        entry = self._hosts.setdefault(hostname, {
+            "buckets": [0] * (len(BUCKET_BOUNDS) + 1),
+            "count": 0,                 # Histogram samples: completions + censored timeouts
+            "total_seconds": 0.0,       # Completions only
+            "timeouts": 0,
+        })
+        entry.setdefault("outcomes", {})
+        return entry
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def record(self, apply_url: str | None, duration: float, outcome: str | None = None) -> None:
+        """
+        Record one finished job. `outcome` is the `ExecutionResult` value it ended with;
+        only `SUCCESS_OUTCOME` durations enter the histogram.
+        """
+        hostname = get_hostname(apply_url)
+        if not hostname or duration <= 0:
+            return
+        with self._lock:
+            entry = self._host_entry(hostname)
+            if outcome:
+                entry["outcomes"][outcome] = entry["outcomes"].get(outcome, 0) + 1
+            if outcome == SUCCESS_OUTCOME:
+                entry["buckets"][bisect_left(BUCKET_BOUNDS, duration)] += 1
+                entry["count"] += 1
+                entry["total_seconds"] += duration
+            self._save()
+
+    def record_timeout(self, apply_url: str | None, elapsed: float) -> None:
+        """
+        Record a job the watchdog cut off after `elapsed` seconds, as a censored
+        sample: it would have taken at least that long.
+        """
+        hostname = get_hostname(apply_url)
+        if not hostname:
+            return
+        with self._lock:
+            entry = self._host_entry(hostname)
+            entry["timeouts"] += 1
+            if elapsed > 0:
+                entry["buckets"][bisect_left(BUCKET_BOUNDS, elapsed)] += 1
+                entry["count"] += 1
+            self._save()
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    @staticmethod
+    def _percentile(buckets: List[int], count: int, q: float) -> Optional[int]:
+        if not count:
+            return None
+        target = q * count
+        running = 0
+        for idx, bucket_count in enumerate(buckets):
+            running += bucket_count
+            if running >= target:
+                return BUCKET_BOUNDS[idx] if idx < len(BUCKET_BOUNDS) else MAX_LEARNED_TIMEOUT
+        return MAX_LEARNED_TIMEOUT
+
+    def learned_timeout(self, apply_url: str | None) -> Optional[int]:
+        """
+        Learned watchdog timeout for the URL's host, or None when there's not enough data.
+        """
+        hostname = get_hostname(apply_url)
+        with self._lock:
+            entry = self._hosts.get(hostname)
+            if not entry or entry["count"] < MIN_SAMPLES:
+                return None
+            p = self._percentile(entry["buckets"], entry["count"], TIMEOUT_PERCENTILE)
+
+        timeout = int(p * TIMEOUT_MARGIN_RATIO + TIMEOUT_MARGIN_SECONDS)
+        return max(MIN_LEARNED_TIMEOUT, min(MAX_LEARNED_TIMEOUT, timeout))
+
+    def host_stats(self, apply_url: str | None) -> Dict[str, Any]:
+        """
+        { attempts, successes, mean_seconds } for the URL's host. Timeouts count as failed attempts.
+        """
+        hostname = get_hostname(apply_url)
+        with self._lock:
+            entry = self._hosts.get(hostname)
+            if not entry:
+                return {"attempts": 0, "successes": 0, "mean_seconds": None}
+            outcomes = entry.get("outcomes", {})
+            return {
+                "attempts": sum(outcomes.values()) + entry["timeouts"],
+                "successes": outcomes.get("applied", 0),
+                "mean_seconds": entry["total_seconds"] / outcomes[SUCCESS_OUTCOME] if outcomes.get(SUCCESS_OUTCOME) else None,
+            }
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        { hostname: { samples, timeouts, outcomes, mean_seconds, p50_seconds, p95_seconds, learned_timeout } }
+        """
+        with self._lock:
+            hosts = {hostname: dict(entry, buckets=list(entry["buckets"]), outcomes=dict(entry.get("outcomes", {}))) for hostname, entry in self._hosts.items()}
+
+        snapshot = {}
+        for hostname, entry in hosts.items():
+            count = entry["count"]
+            successes = entry["outcomes"].get(SUCCESS_OUTCOME, 0)
+            snapshot[hostname] = {
+                "samples": count,
+                "timeouts": entry["timeouts"],
+                "outcomes": entry["outcomes"],
+                "mean_seconds": round(entry["total_seconds"] / successes, 1) if successes else None,
+                "p50_seconds": self._percentile(entry["buckets"], count, 0.5),
+                "p95_seconds": self._percentile(entry["buckets"], count, TIMEOUT_PERCENTILE),
+                "learned_timeout": self.learned_timeout(f"https://{hostname}"),
+            }
+        return snapshot
+
+
+latency_model = PlatformLatencyModel()
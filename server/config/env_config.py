@@ -40,12 +40,20 @@ USER_DATA_FILE = USER_DATABASE_DIR / os.getenv("USER_DATA_FILE", "userData.json"
 USER_RESUMES_ROOT = USER_DATABASE_DIR / os.getenv("USER_RESUMES_DIR", "uploads/resumes")
 USER_PROJECTS_ROOT = USER_DATABASE_DIR / os.getenv("USER_PROJECTS_DIR", "uploads/projects")
 USER_ACHIEVEMENTS_ROOT = USER_DATABASE_DIR / os.getenv("USER_ACHIEVEMENTS_DIR", "uploads/achievements")
+# 🗄️ Local server state (journals, caches, mirrors)
+APP_DATA_DIR = SERVER_ROOT / os.getenv("APP_DATA_DIR", "data")
 
 
 # =========================
 # Question Resolver
 # =========================
 LLM_MODE_QUESTION_RESOLVER = os.getenv("LLM_MODE_QUESTION_RESOLVER", "BROWSER")
+# 📦 Pack several questions into one prompt (one generation turn per pack)
+PACKED_QUESTION_PROMPTS = os.getenv("PACKED_QUESTION_PROMPTS", "true").lower() == "true"
+PACK_TOKEN_BUDGET = int(os.getenv("PACK_TOKEN_BUDGET", "3000"))
+# 🗜️ Send a minified, job-relevance-trimmed profile as the context prompt
+COMPACT_CONTEXT_PROMPT = os.getenv("COMPACT_CONTEXT_PROMPT", "true").lower() == "true"
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))
 
 # =========================
 # Automation Modules Configuration
@@ -71,11 +79,11 @@ else:
 # =========================
 # ASSERT Before Starting the Server
 # =========================
-# Make sure directories exist
-USER_DATABASE_DIR.mkdir(parents=True, exist_ok=True)
-USER_RESUMES_ROOT.mkdir(parents=True, exist_ok=True)
-USER_PROJECTS_ROOT.mkdir(parents=True, exist_ok=True)
-USER_ACHIEVEMENTS_ROOT.mkdir(parents=True, exist_ok=True)
+# Make sure directories exist (called once at server startup, not at import)
+def ensure_directories() -> None:
+    for directory in (USER_DATABASE_DIR, USER_RESUMES_ROOT, USER_PROJECTS_ROOT, USER_ACHIEVEMENTS_ROOT, APP_DATA_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+
 assert BROWSER_NAME in ["Brave", "Chrome"], f"❌ BROWSER_NAME must be 'Brave' or 'Chrome', got: {BROWSER_NAME}"
 # assert DRIVER_PATH, "❌ DRIVER_PATH not set in .env"
 assert USER_RESUMES_ROOT, "❌ RESUME_ROOT not set in .env"
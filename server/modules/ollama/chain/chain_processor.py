@@ -1,36 +1,47 @@
 # server\modules\ollama\chain\chain_processor.py
 import json
-from typing import List, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Dict, Optional
 from modules.ollama.chain.prompt_models import PromptStep
 from modules.ollama.memory.conversation import Conversation
 from modules.ollama.client.ollama_chat_client import OllamaChatClient
+from modules.ollama.config.settings import settings
 from modules.ollama.core.enums import ResponseFormat
 
 
 class ChainProcessor:
 
-    def __init__(self, model: str):
+    def __init__(self, model: str, max_workers: Optional[int] = None):
         self.client = OllamaChatClient()
         self.model = model
+        self.max_workers = max_workers or settings.MAX_CONCURRENT_REQUESTS
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
 
     def process(
         self,
         conversation: Conversation,
         chain: List[PromptStep],
+        concurrent: bool = False,
     ) -> List[Any]:
         """
         Execute a chain of prompts:
         - Respects per-prompt persistence and persistence of responses
         - Handles sliding window
         - Supports JSON schema & streaming
+        - concurrent=True → see `process_concurrent`
         """
+        if concurrent and not any(step.stream for step in chain):
+            return self.process_concurrent(conversation, chain)
+
         outputs: List[Any] = []
 
         for step in chain:
 
             # Add prompt to memory (persist if flagged)
             conversation.add_message(
-                role=step.role.value if hasattr(step.role, "value") else step.role,
+                role=self._role(step),
                 content=step.content,
                 persist=step.persist
             )
@@ -39,13 +50,7 @@ class ChainProcessor:
                 continue
 
             # Call Ollama
-            response = self.client.chat(
-                model=self.model,
-                messages=conversation.get_messages(),
-                stream=step.stream,
-                json_mode=(step.response_format == ResponseFormat.JSON),
-                json_schema=step.json_schema,
-            )
+            response = self._call(step, conversation.get_messages())
 
             # Streaming → append generator directly
             if step.stream:
@@ -59,17 +64,107 @@ class ChainProcessor:
                 persist=step.persist_response
             )
 
-            # Decode JSON safely
-            if step.response_format == ResponseFormat.JSON:
-                if isinstance(response, str):
-                    try:
-                        outputs.append(json.loads(response))
-                    except Exception:
-                        outputs.append({"raw": response})
-                else:
-                    # Already dict
-                    outputs.append(response)
-            else:
-                outputs.append(response)
+            outputs.append(self._decode(step, response))
 
         return outputs
+
+    def process_concurrent(
+        self,
+        conversation: Conversation,
+        chain: List[PromptStep],
+    ) -> List[Any]:
+        """
+        Execute independent prompts in parallel:
+        - Steps without a response (system / context) are added to memory first and form the shared prefix
+        - Every responding step is a stateless request: prefix + that prompt only
+        - Requests go through a bounded thread pool; outputs keep chain order
+        - Only steps flagged `persist` / `persist_response` are written back to memory
+          (rolling turns would only crowd the prefix out of the window)
+        - Rolling no-response steps stay in memory until the caller resets it
+          (`Conversation.reset`), so a caller switching system prompts must reset first
+        """
+        for step in chain:
+            if not step.expect_response:
+                conversation.add_message(role=self._role(step), content=step.content, persist=step.persist)
+
+        prefix = conversation.get_messages()
+        steps = [step for step in chain if step.expect_response]
+        if not steps:
+            return []
+
+        pool = self._get_pool()
+        futures = [
+            pool.submit(self._call, step, prefix + [{"role": self._role(step), "content": step.content}])
+            for step in steps
+        ]
+        responses = [future.result() for future in futures]
+
+        outputs: List[Any] = []
+        for step, response in zip(steps, responses):
+            if step.persist:
+                conversation.add_message(role=self._role(step), content=step.content, persist=True)
+            if step.persist_response:
+                conversation.add_message(role="assistant", content=response, persist=True)
+            outputs.append(self._decode(step, response))
+
+        return outputs
+
+    # ============================================================
+    # Helpers
+    # ============================================================
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ollama-chain")
+            return self._pool
+
+    @staticmethod
+    def _role(step: PromptStep) -> str:
+        return step.role.value if hasattr(step.role, "value") else step.role
+
+    def _call(self, step: PromptStep, messages: List[Dict[str, str]]) -> Any:
+        return self.client.chat(
+            model=self.model,
+            messages=messages,
+            stream=step.stream,
+            json_mode=(step.response_format == ResponseFormat.JSON),
+            json_schema=step.json_schema,
+        )
+
+    @staticmethod
+    def _decode(step: PromptStep, response: Any) -> Any:
+        # Decode JSON safely
+        if step.response_format == ResponseFormat.JSON:
+            if isinstance(response, str):
+                try:
+                    return json.loads(response)
+                except Exception:
+                    return {"raw": response}
+            # Already dict
+            return response
+        return response
+
+
+if __name__ == "__main__":
+
+    # Wall time of a 15-question chain, sequential vs concurrent, against a simulated model
+    import random
+    import time
+    from modules.ollama.core.enums import PromptRole
+
+    class SimulatedClient:
+        def chat(self, model, messages, stream=False, json_mode=False, json_schema=None):
+            time.sleep(random.uniform(0.2, 0.6))
+            return json.dumps({"value": messages[-1]["content"]})
+
+    chain = [PromptStep(role=PromptRole.SYSTEM, content="system", expect_response=False)]
+    chain += [PromptStep(role=PromptRole.USER, content=f"question {i}", response_format=ResponseFormat.JSON) for i in range(15)]
+
+    for concurrent in (False, True):
+        processor = ChainProcessor(model="simulated", max_workers=15)
+        processor.client = SimulatedClient()
+        started = time.perf_counter()
+        outputs = processor.process(Conversation(window_size=3), chain, concurrent=concurrent)
+        assert [o["value"] for o in outputs] == [f"question {i}" for i in range(15)]
+        print(f"{'concurrent' if concurrent else 'sequential'}: {time.perf_counter() - started:.2f}s")
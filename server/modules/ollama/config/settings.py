@@ -5,6 +5,7 @@ class Settings(BaseSettings):
     OLLAMA_BASE_URL: str = "http://127.0.0.1:11434"
     DEFAULT_MODEL: str = "phi3:latest"
     TIMEOUT: tuple[int, int] = (10, 300)
+    MAX_CONCURRENT_REQUESTS: int = 4    # Thread pool bound for concurrent chains (match OLLAMA_NUM_PARALLEL)
 
     model_config = SettingsConfigDict(
         env_file=".env",
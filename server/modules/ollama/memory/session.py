@@ -12,8 +12,8 @@ class LLMSession:
         self.conversation = Conversation()
         self.processor = ChainProcessor(model=model)
 
-    def run_chain(self, chain: list):
-        return self.processor.process(self.conversation, chain)
+    def run_chain(self, chain: list, concurrent: bool = False):
+        return self.processor.process(self.conversation, chain, concurrent=concurrent)
 
     def reset(self):
         self.conversation.reset()
@@ -21,9 +21,9 @@ class InteractionService:
             raise TypeError("'size' argument must be an integer.")
         self.get_session(session_id).conversation.window_size = size
 
-    def run_chain(self, session_id: str, chain: List[PromptStep]) -> List[Any]:
+    def run_chain(self, session_id: str, chain: List[PromptStep], concurrent: bool = False) -> List[Any]:
         session = self.get_session(session_id)
-        return session.run_chain(chain)
+        return session.run_chain(chain, concurrent=concurrent)
 
     def reset_session(self, session_id: str):
         self.get_session(session_id).reset()
@@ -2,7 +2,6 @@ from difflib import SequenceMatcher
 import json
 import time
 from pathlib import Path
-import fitz  # PyMuPDF
 import random
 import string
 import ast
@@ -0,0 +1,15 @@
+# server\tests\conftest.py
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SERVER_ROOT))
+
+# Module-level stores (answer store, journal, caches) open their files on import — keep them out of server/data
+os.environ.setdefault("APP_DATA_DIR", tempfile.mkdtemp(prefix="server-tests-"))
+
+# `config.env_config` validates the browser on import; the modules under test never launch it
+os.environ.setdefault("BROWSER_NAME", "Chrome")
+os.environ.setdefault("CHROME_PATH", sys.executable)
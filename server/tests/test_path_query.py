@@ -0,0 +1,113 @@
+# server\tests\test_path_query.py
+import pytest
+
+from app.services.question_resolver.path_query import WILDCARD, compile_path, extract_paths, query_path
+from app.services.question_resolver.utils import resolve_nested_key
+
+
+@pytest.fixture
+def db():
+    return {
+        "email": "jane@example.com",
+        "firstName": "Jane",
+        "otherURLs": ["https://jane.dev", "https://github.com/jane"],
+        "primaryAddressContainerIdx": 1,
+        "employmentInfo": {"gender": "Female", "visaSponsorshipRequirement": False, "ethnicity": ["South Asian"]},
+        "salaryExpectation": {"min": 0, "max": None},
+        "workExperiences": [
+            {"company": "Acme", "jobTitle": "Engineer"},
+            {"company": None, "jobTitle": "Intern"},
+            {"company": "Globex", "jobTitle": "Lead"},
+        ],
+        "education": [
+            {"school": "State U", "degree": ["BSc"]},
+            {"school": "Tech", "degree": ["MSc", "PhD"]},
+            {"school": "Online"},
+        ],
+        "projects": {
+            "p1": {"title": "Vision", "url": "https://a.example"},
+            "p2": {"title": "IoT"},
+            "p3": {"title": "Web", "url": "https://c.example"},
+        },
+        "addresses": {"0": {"city": "Austin"}, "1": {"city": "Boston"}},
+        7: "non-string key",
+    }
+
+
+# ============================================================
+# Compilation
+# ============================================================
+
+@pytest.mark.parametrize("path, segments", [
+    ("a.b[0].c", ("a", "b", 0, "c")),
+    ("work[experience][0].title", ("work", "experience", 0, "title")),
+    ("workExperiences.0.jobTitle", ("workExperiences", 0, "jobTitle")),
+    ("workExperiences[*].company", ("workExperiences", WILDCARD, "company")),
+    ("projects.*.url", ("projects", WILDCARD, "url")),
+])
+def test_compile_path(path, segments):
+    assert compile_path(path) == segments
+
+
+# ============================================================
+# Plain paths match resolve_nested_key
+# ============================================================
+
+@pytest.mark.parametrize("path", [
+    "email", "firstName", "otherURLs", "otherURLs[1]",
+    "employmentInfo.gender", "employmentInfo.visaSponsorshipRequirement", "employmentInfo.ethnicity",
+    "salaryExpectation.min", "salaryExpectation.max",
+    "workExperiences[0].company", "workExperiences.0.jobTitle", "workExperiences[2].company",
+    "education[1].degree[0]", "education[1].degree.1", "addresses[primaryAddressContainerIdx]",
+    "missing.key", "workExperiences[99].company", "email.deeper", "education[2].degree[0]",
+])
+def test_plain_paths_match_resolve_nested_key(db, path):
+    assert query_path(db, path) == resolve_nested_key(db, path)
+
+def test_falsy_values_are_not_missing(db):
+    assert query_path(db, "salaryExpectation.min", fallback="n/a") == 0
+    assert query_path(db, "employmentInfo.visaSponsorshipRequirement", fallback="n/a") is False
+
+def test_missing_keys_use_fallback(db):
+    assert query_path(db, "missing.key", fallback="n/a") == "n/a"
+    assert query_path(db, "workExperiences[99].company", fallback="n/a") == "n/a"
+    assert extract_paths(db, ["email", "missing"], fallback="n/a") == {"email": "jane@example.com", "missing": "n/a"}
+
+
+# ============================================================
+# Wildcards
+# ============================================================
+
+def test_list_wildcard_drops_none(db):
+    assert query_path(db, "workExperiences[*].company") == ["Acme", "Globex"]
+
+def test_dict_wildcard(db):
+    assert query_path(db, "projects.*.url") == ["https://a.example", "https://c.example"]
+
+def test_nested_wildcards_flatten(db):
+    assert query_path(db, "education[*].degree[*]") == ["BSc", "MSc", "PhD"]
+
+def test_wildcard_without_matches_uses_fallback(db):
+    assert query_path(db, "missing[*].key", fallback="n/a") == "n/a"
+    assert query_path(db, "projects.*.missing", fallback="n/a") == "n/a"
+
+
+# ============================================================
+# Multi-path queries
+# ============================================================
+
+def test_shared_prefixes_resolve_together(db):
+    paths = ["workExperiences[0].company", "workExperiences[0].jobTitle", "workExperiences[*].jobTitle", "email"]
+    assert extract_paths(db, paths) == {
+        "workExperiences[0].company": "Acme",
+        "workExperiences[0].jobTitle": "Engineer",
+        "workExperiences[*].jobTitle": ["Engineer", "Intern", "Lead"],
+        "email": "jane@example.com",
+    }
+
+def test_non_string_paths_are_skipped(db):
+    assert extract_paths(db, ["email", 3, None]) == {"email": "jane@example.com"}
+    assert extract_paths(db, ["email", ["nested"], {"bad": 1}]) == {"email": "jane@example.com"}
+
+def test_non_string_keys_in_db_are_ignored(db):
+    assert query_path(db, "7", fallback="n/a") == resolve_nested_key(db, "7", fallback="n/a")
@@ -0,0 +1,80 @@
+# server\tests\test_semantic_index.py
+import pytest
+
+from app.services.question_resolver.semantic_index import SemanticIndex, tokenize
+
+FINGERPRINT = "test"
+YES_NO = ["Yes", "No"]
+
+
+def _index(*entries):
+    index = SemanticIndex(persist=False)
+    for label, answer, q_type in entries:
+        index.add({"labelText": label, "type": q_type, "options": YES_NO if q_type == "radio" else []}, answer, FINGERPRINT)
+    return index
+
+def _search(index, label, q_type="radio"):
+    return index.search([{"labelText": label, "type": q_type, "options": YES_NO if q_type == "radio" else []}], FINGERPRINT).get(0)
+
+
+# ============================================================
+# Tokens that change the answer are kept
+# ============================================================
+
+@pytest.mark.parametrize("label, token", [
+    ("Do you currently require visa sponsorship?", "currently"),
+    ("Will you in the future require visa sponsorship?", "future"),
+    ("Do you now require sponsorship?", "now"),
+    ("Are you authorized to work in the US?", "us_country"),
+    ("Are you authorized to work in the U.S.?", "us_country"),
+    ("Are you authorized to work in the United States?", "us_country"),
+    ("Are you authorized to work in the UK?", "uk_country"),
+    ("Are you authorized to work in Canada?", "ca_country"),
+    ("Are you not authorized to work?", "not"),
+    ("I don't require sponsorship", "not"),
+])
+def test_tokenize_keeps_meaningful_words(label, token):
+    assert token in tokenize(label)
+
+def test_lowercase_us_is_a_pronoun():
+    assert "us_country" not in tokenize("Tell us about yourself")
+
+
+# ============================================================
+# Yes / no reuse
+# ============================================================
+
+def test_currently_vs_future_sponsorship_not_reused():
+    index = _index(("Do you currently require visa sponsorship?", "No", "radio"))
+    assert _search(index, "Will you in the future require visa sponsorship?") is None
+
+@pytest.mark.parametrize("other", ["Are you authorized to work in the UK?", "Are you authorized to work in Canada?"])
+def test_country_mismatch_not_reused(other):
+    index = _index(("Are you authorized to work in the US?", "Yes", "radio"))
+    assert _search(index, other) is None
+
+def test_negation_mismatch_not_reused():
+    index = _index(("Are you authorized to work in the US?", "Yes", "radio"))
+    assert _search(index, "Are you not authorized to work in the US?") is None
+
+def test_choice_reuses_same_content_tokens():
+    index = _index(("Are you legally authorized to work in the United States?", "Yes", "radio"))
+    answer, score, label = _search(index, "Are you legally authorised to work in the USA?")
+    assert answer == "Yes" and score == 1.0 and label == "Are you legally authorized to work in the United States?"
+
+def test_choice_rejects_near_paraphrase():
+    index = _index(("Do you now or in the future require visa sponsorship?", "No", "radio"))
+    assert _search(index, "Will you need sponsorship?") is None
+
+
+# ============================================================
+# Free-text scalar reuse (similarity threshold + critical tokens)
+# ============================================================
+
+def test_scalar_negation_mismatch_not_reused():
+    index = _index(("Years of experience with Python", "5", "number"))
+    assert _search(index, "Years of experience without Python", "number") is None
+
+def test_scalar_paraphrase_reused():
+    index = _index(("Years of experience with Python", "5", "number"))
+    assert _search(index, "Python: years of experience", "number")[0] == "5"
@@ -942,22 +942,33 @@ deleteAllBtn.addEventListener("click", async (e) => {
    SERVER LISTENER
 ====================================================== */
 // Listen for server events
+// Events are typed (`event: <type>`, JSON data). EventSource reconnects on its own and
+// sends Last-Event-ID, so events fired while disconnected are replayed by the server.
 const eventSource = new EventSource(`${API_BASE}/job-status-stream`);
 
-eventSource.onmessage = function(event) {
-    console.log("Server Event:", event.data);
+function resetRunAllButton(event) {
+    const data = JSON.parse(event.data);
+    console.log("Server Event:", data.type);
+    const btn = document.getElementById('runAllBtn');
+    btn.classList.remove('active'); // Disable button visually
+    console.log("Chain ended, button reset!");
+}
 
-    if (event.data === "all_jobs_completed" || event.data === "jobs_stopped") {
-        const btn = document.getElementById('runAllBtn');
-        btn.classList.remove('active'); // Disable button visually
-        console.log("All jobs completed, button reset!");
-    }
-};
+eventSource.addEventListener("all_jobs_completed", resetRunAllButton);
+eventSource.addEventListener("jobs_stopped", resetRunAllButton);
+
+eventSource.addEventListener("lagged", (event) => {
+    // Missed events were dropped server-side; resync the button from the runner state.
+    console.warn("Server events missed:", JSON.parse(event.data).missed);
+    initRunAllJobButton();
+});
 
 eventSource.onerror = function(err) {
-    console.error("EventSource failed:", err);
-    // Stop retrying
-    eventSource.close(); // server isn't available.
+    if (eventSource.readyState === EventSource.CLOSED) {
+        console.error("EventSource closed:", err); // server isn't available.
+    } else {
+        console.warn("EventSource reconnecting...");
+    }
 };
 
 